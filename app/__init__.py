@@ -1,66 +1,168 @@
 import asyncio
 from contextlib import asynccontextmanager
-from functools import partial
 
-import redis.asyncio as redis
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
 from tiacore_lib.config import ConfigName, get_settings
-from tiacore_lib.rabbit.event_consumer import EventConsumer
-from tiacore_lib.rabbit.handlers import handle_user_event
-from tortoise import Tortoise
+from tiacore_lib.handlers.auth_handler import get_current_user
 
 from app.config import TestConfig, _load_settings
+from app.container import AppContainer
+from app.database.instrumentation import QueryStatsMiddleware, instrument_tortoise
+from app.database.router import replica_monitor
+from app.dependencies.permission_cache import permission_cache
+from app.dependencies.permissions import timed_get_current_user
+from app.exceptions.catch_middleware import CatchAllExceptionsMiddleware
+from app.extraction.pipeline import ExtractionPipeline
+from app.jobs.reconcile import run_reconcile_schedule
+from app.middleware.http_metrics import HttpMetricsMiddleware
+from app.middleware.idempotency import (
+    IdempotencyMiddleware,
+    IdempotentReplay,
+    replay_response,
+)
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.read_routing import ReadRoutingMiddleware
+from app.middleware.request_context import RequestContextMiddleware
+from app.middleware.server_timing import ServerTimingMiddleware
+from app.middleware.upload_admission import (
+    UploadAdmissionController,
+    UploadAdmissionMiddleware,
+)
 from app.routes import register_routes
+from app.utils.change_feed import change_feed
 from app.utils.db_helpers import create_data
+from app.utils.timing import TimedJSONResponse
+from app.webhooks.delivery import WebhookDispatcher
+from metrics.http_metrics import get_http_metrics
 from metrics.logger import setup_logger
 from metrics.tracer import init_tracer
 
 
-def provide_settings(config_name: ConfigName):
-    def _inner():
-        return _load_settings(config_name)
-
-    return _inner
-
-
 def create_app(config_name: ConfigName) -> FastAPI:
     settings = _load_settings(config_name)
+    container = AppContainer(settings)
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         if type(settings) is not TestConfig:
-            from app.database.config import TORTOISE_ORM
-
-            await Tortoise.init(config=TORTOISE_ORM)
-            Tortoise.init_models(["app.database.models"], "models")
+            await container.start()
             await create_data()
-            redis_url = settings.REDIS_URL
-            redis_client = redis.from_url(redis_url)
-            print("🔥 Redis инициализируется")
-            FastAPICache.init(RedisBackend(redis_client), prefix="fastapi-cache")
-            consumer = EventConsumer(
-                rabbit_url=settings.AUTH_BROKER_URL,
-                queue_name="contract-service",
-                routing_keys=["user.*"],
-            )
-            task = asyncio.create_task(
-                consumer.connect_and_consume(
-                    partial(handle_user_event, settings=settings)
+
+            if settings.EXTRACTION_ENABLED:
+                pipeline = ExtractionPipeline(
+                    process_workers=settings.EXTRACTION_PROCESS_WORKERS,
+                    concurrency=settings.EXTRACTION_CONCURRENCY,
+                    queue_size=settings.EXTRACTION_QUEUE_SIZE,
+                    max_file_size=settings.EXTRACTION_MAX_FILE_SIZE,
+                    max_chars=settings.EXTRACTION_MAX_CHARS,
+                    manager=container.s3,
+                )
+                await pipeline.start()
+                app.state.extraction_pipeline = pipeline
+
+            if settings.WEBHOOK_ENABLED:
+                dispatcher = WebhookDispatcher(settings)
+                await dispatcher.start()
+                app.state.webhook_dispatcher = dispatcher
+
+            if settings.REPLICA_DATABASE_URL:
+                replica_monitor.max_lag_seconds = settings.REPLICA_MAX_LAG_SECONDS
+                replica_monitor.interval_seconds = settings.REPLICA_LAG_CHECK_INTERVAL
+                app.state.replica_monitor_task = asyncio.create_task(
+                    replica_monitor.run()
                 )
-            )
-            app.state.rabbit_task = task
 
-        yield
+            if settings.RECONCILE_INTERVAL_SECONDS > 0:
+                app.state.reconcile_task = asyncio.create_task(
+                    run_reconcile_schedule(
+                        container.redis,
+                        settings.RECONCILE_INTERVAL_SECONDS,
+                        delete_orphans=settings.RECONCILE_DELETE_ORPHANS,
+                        grace_seconds=settings.RECONCILE_GRACE_SECONDS,
+                        manager=container.s3,
+                    )
+                )
 
-        await Tortoise.close_connections()
+            await container.become_ready()
 
-    app = FastAPI(title="contract", redirect_slashes=False, lifespan=lifespan)
-    app.dependency_overrides[get_settings] = provide_settings(config_name)
-    setup_logger()
+        yield
+
+        for name in ("reconcile_task", "replica_monitor_task"):
+            task = getattr(app.state, name, None)
+            if task:
+                task.cancel()
+        pipeline = getattr(app.state, "extraction_pipeline", None)
+        if pipeline:
+            await pipeline.stop()
+        dispatcher = getattr(app.state, "webhook_dispatcher", None)
+        if dispatcher:
+            await dispatcher.stop()
+        await container.close()
+
+    app = FastAPI(
+        title="contract",
+        redirect_slashes=False,
+        lifespan=lifespan,
+        default_response_class=TimedJSONResponse,
+    )
+    app.state.container = container
+    # Настройки собираются один раз; зависимость — обращение к атрибуту
+    app.dependency_overrides[get_settings] = container.get_settings
+    app.dependency_overrides[get_current_user] = timed_get_current_user
+    permission_cache.configure(
+        maxsize=settings.PERMISSION_CACHE_MAX_SIZE,
+        ttl_seconds=settings.PERMISSION_CACHE_TTL_SECONDS,
+    )
+    change_feed.configure(
+        stream_maxlen=settings.SSE_STREAM_MAXLEN,
+        stream_ttl_seconds=settings.SSE_STREAM_TTL_SECONDS,
+        queue_size=settings.SSE_CLIENT_QUEUE_SIZE,
+        heartbeat_seconds=settings.SSE_HEARTBEAT_SECONDS,
+        replay_limit=settings.SSE_REPLAY_LIMIT,
+        max_connections=settings.SSE_MAX_CONNECTIONS,
+    )
+    setup_logger(settings)
+    instrument_tortoise(
+        slow_query_ms=settings.DB_SLOW_QUERY_MS,
+        explain_slow=settings.DB_EXPLAIN_SLOW_QUERIES,
+    )
 
+    app.add_middleware(
+        CatchAllExceptionsMiddleware,
+        body_limit=settings.ERROR_BODY_CAPTURE_BYTES,
+        capture_statuses=tuple(settings.ERROR_BODY_CAPTURE_STATUSES),
+    )
+    if settings.REPLICA_DATABASE_URL:
+        app.add_middleware(
+            ReadRoutingMiddleware, window_seconds=settings.READ_YOUR_WRITES_SECONDS
+        )
+    app.add_middleware(
+        QueryStatsMiddleware, n_plus_one_threshold=settings.DB_N_PLUS_ONE_THRESHOLD
+    )
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(RateLimitMiddleware, limiter=container.rate_limiter)
+    app.add_middleware(
+        UploadAdmissionMiddleware,
+        controller=UploadAdmissionController(
+            max_concurrent=settings.UPLOAD_MAX_CONCURRENT,
+            max_inflight_bytes=settings.UPLOAD_MAX_INFLIGHT_BYTES,
+            max_waiters=settings.UPLOAD_MAX_WAITERS,
+            wait_timeout=settings.UPLOAD_WAIT_TIMEOUT,
+        ),
+        retry_after=settings.UPLOAD_RETRY_AFTER,
+    )
+    if settings.IDEMPOTENCY_ENABLED:
+        app.add_exception_handler(IdempotentReplay, replay_response)
+        app.add_middleware(
+            IdempotencyMiddleware,
+            container=container,
+            paths=settings.IDEMPOTENCY_PATHS,
+            ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+            lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+            wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+            max_response_bytes=settings.IDEMPOTENCY_MAX_RESPONSE_BYTES,
+        )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -68,9 +170,20 @@ def create_app(config_name: ConfigName) -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    if settings.SERVER_TIMING_ENABLED:
+        app.add_middleware(
+            ServerTimingMiddleware, slow_request_ms=settings.SLOW_REQUEST_LOG_MS
+        )
+    app.add_middleware(
+        HttpMetricsMiddleware,
+        metrics=get_http_metrics(
+            duration_buckets=settings.HTTP_METRICS_DURATION_BUCKETS,
+            size_buckets=settings.HTTP_METRICS_SIZE_BUCKETS,
+        ),
+    )
+    app.add_middleware(RequestContextMiddleware)
 
-    if config_name == "Production":
-        init_tracer(app)
+    init_tracer(app, settings)
 
     register_routes(app)
 
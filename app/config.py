@@ -1,5 +1,8 @@
+import os
+from functools import lru_cache
 from typing import Optional
 
+from dotenv import load_dotenv
 from pydantic_settings import SettingsConfigDict
 from tiacore_lib.config import (
     BaseConfig as SharedBaseConfig,
@@ -7,15 +10,162 @@ from tiacore_lib.config import (
     TestConfig as SharedTestConfig,
 )
 
+from metrics.http_metrics import DEFAULT_DURATION_BUCKETS, DEFAULT_SIZE_BUCKETS
+
 
 class BaseConfig(SharedBaseConfig):
+    STORAGE_BACKEND: str = "s3"
+    LOCAL_STORAGE_ROOT: str = "storage"
+
     ENDPOINT_URL: Optional[str] = None
     REGION_NAME: Optional[str] = None
     AWS_ACCESS_KEY_ID: Optional[str] = None
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
     BUCKET_NAME: Optional[str] = None
 
+    ZIP_FETCH_CONCURRENCY: int = 4
+    ZIP_CHUNK_SIZE: int = 64 * 1024
+
+    STORAGE_COMPRESSION_ENABLED: bool = False
+    STORAGE_COMPRESSION_LEVEL: int = 3
+    STORAGE_COMPRESSION_MIN_SIZE: int = 4096
+    STORAGE_COMPRESSION_MIN_RATIO: float = 0.9
+
+    EXTRACTION_ENABLED: bool = True
+    EXTRACTION_PROCESS_WORKERS: int = 2
+    EXTRACTION_CONCURRENCY: int = 2
+    EXTRACTION_QUEUE_SIZE: int = 1000
+    EXTRACTION_MAX_FILE_SIZE: int = 50 * 1024 * 1024
+    EXTRACTION_MAX_CHARS: int = 500_000
+
+    UPLOAD_MAX_CONCURRENT: int = 8
+    UPLOAD_MAX_INFLIGHT_BYTES: int = 256 * 1024 * 1024
+    UPLOAD_MAX_WAITERS: int = 16
+    UPLOAD_WAIT_TIMEOUT: float = 2.0
+    UPLOAD_RETRY_AFTER: int = 5
+
+    RECONCILE_INTERVAL_SECONDS: int = 0
+    RECONCILE_DELETE_ORPHANS: bool = True
+    RECONCILE_GRACE_SECONDS: int = 3600
+
+    HTTP_METRICS_DURATION_BUCKETS: list[float] = list(DEFAULT_DURATION_BUCKETS)
+    HTTP_METRICS_SIZE_BUCKETS: list[float] = list(DEFAULT_SIZE_BUCKETS)
+
+    DB_SLOW_QUERY_MS: int = 200
+    DB_EXPLAIN_SLOW_QUERIES: bool = True
+    DB_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Соединений к Postgres на под: воркеры gunicorn × DB_POOL_MAX_SIZE
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 5
+    DB_POOL_ACQUIRE_TIMEOUT: Optional[float] = 10.0
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300.0
+    DB_COMMAND_TIMEOUT: Optional[float] = 60.0
+    DB_PGBOUNCER_MODE: bool = False
+
+    REPLICA_DATABASE_URL: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 2.0
+    REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    SERVER_TIMING_ENABLED: bool = True
+    SLOW_REQUEST_LOG_MS: int = 1000
+
+    # "text" — для разработки, "json" — структурированный вывод для Loki
+    LOG_FORMAT: str = "text"
+    LOG_LEVEL: str = "DEBUG"
+    # Уровни по модулям: {"uvicorn.access": "WARNING", "app.routes": "INFO"}
+    LOG_LEVELS: dict[str, str] = {}
+    # Доля сохраняемых записей INFO и ниже по модулям: {"uvicorn.access": 0.1}
+    LOG_SAMPLE_RATES: dict[str, float] = {}
+    LOG_DIAGNOSE: bool = False
+    LOG_FILE: Optional[str] = "logs/app.log"
+    LOG_QUEUE_SIZE: int = 10000
+
+    # L1-кэш контекстов прав в воркере; TTL 0 выключает кэш
+    PERMISSION_CACHE_TTL_SECONDS: float = 30.0
+    PERMISSION_CACHE_MAX_SIZE: int = 10000
+
+    # Лимит запросов компании (token bucket в Redis) по классу эндпоинта
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CAPACITY: dict[str, int] = {"read": 300, "write": 60, "file": 30}
+    RATE_LIMIT_REFILL_PER_SECOND: dict[str, float] = {
+        "read": 50,
+        "write": 10,
+        "file": 3,
+    }
+    # Без Redis пропускаем, пока по последнему ответу в ведре больше этой
+    # доли ёмкости и с ответа прошло меньше RATE_LIMIT_LOCAL_SYNC_SECONDS
+    RATE_LIMIT_LOCAL_FRACTION: float = 0.5
+    RATE_LIMIT_LOCAL_SYNC_SECONDS: float = 1.0
+
+    # Idempotency-Key: ответы создающих запросов хранятся в Redis TTL секунд;
+    # LOCK — сколько держится отметка о выполняющемся запросе
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_PATHS: list[str] = ["/api/contracts/add", "/api/contract-files/add"]
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_SECONDS: int = 300
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = 64 * 1024
+
+    # Лента изменений (SSE): короткий Redis stream на компанию для
+    # Last-Event-ID, очередь на подключение и пульс для прокси
+    SSE_ENABLED: bool = True
+    SSE_STREAM_MAXLEN: int = 1000
+    SSE_STREAM_TTL_SECONDS: int = 3600
+    SSE_CLIENT_QUEUE_SIZE: int = 100
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_REPLAY_LIMIT: int = 500
+    SSE_MAX_CONNECTIONS: int = 1000
+
+    # Потребитель событий user.*: очередь привязывается к topic-обменнику
+    # events, как это делал EventConsumer из tiacore_lib
+    USER_EVENTS_QUEUE: str = "contract-service"
+    USER_EVENTS_EXCHANGE: str = "events"
+    USER_EVENTS_PREFETCH: int = 100
+    USER_EVENTS_CONCURRENCY: int = 8
+    USER_EVENTS_BATCH_WINDOW_MS: float = 50
+    USER_EVENTS_BATCH_MAX: int = 100
+
+    # Трассировка OpenTelemetry: доля трасс, решение наследуется от родителя
+    OTEL_ENABLED: bool = False
+    OTEL_SERVICE_NAME: str = "contract-fastapi"
+    OTEL_ENVIRONMENT: str = "dev"
+    OTEL_EXPORTER_ENDPOINT: str = "http://jaeger:4318/v1/traces"
+    OTEL_EXPORTER_TIMEOUT: int = 10
+    OTEL_SAMPLE_RATIO: float = 0.1
+    OTEL_BSP_MAX_QUEUE_SIZE: int = 2048
+    OTEL_BSP_MAX_EXPORT_BATCH_SIZE: int = 512
+    OTEL_BSP_SCHEDULE_DELAY_MS: int = 5000
+
+    # Прогрев воркера до приёма запросов: пул БД, хранилище, Redis
+    WARMUP_ENABLED: bool = True
+    WARMUP_TIMEOUT_SECONDS: float = 10.0
+    WARMUP_DB_CONNECTIONS: int = 2
+
+    # Начало тела запроса, которое логируется при ответах 400/422
+    ERROR_BODY_CAPTURE_BYTES: int = 4096
+    ERROR_BODY_CAPTURE_STATUSES: list[int] = [400, 422]
+
+    # Публичный адрес API: из него строятся ссылки на ресурсы в вебхуках
     WEBHOOK_BASE_URL: Optional[str] = None
+    # Доставка вебхуков: очередь в БД, пачки по адресу, повторы и предохранитель
+    WEBHOOK_ENABLED: bool = True
+    WEBHOOK_CONCURRENCY: int = 8
+    WEBHOOK_MAX_CONNECTIONS: int = 32
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_POLL_SECONDS: float = 2.0
+    WEBHOOK_CLAIM_LIMIT: int = 200
+    WEBHOOK_BATCH_SIZE: int = 50
+    WEBHOOK_LEASE_SECONDS: int = 120
+    WEBHOOK_SEND_ATTEMPTS: int = 3
+    WEBHOOK_SEND_BACKOFF_SECONDS: float = 0.5
+    WEBHOOK_MAX_ATTEMPTS: int = 10
+    WEBHOOK_RETRY_BASE_SECONDS: float = 30.0
+    WEBHOOK_RETRY_MAX_SECONDS: float = 3600.0
+    WEBHOOK_CIRCUIT_THRESHOLD: int = 5
+    WEBHOOK_CIRCUIT_OPEN_SECONDS: int = 300
 
     YANDEX_SPEECHKIT_API_URL: Optional[str] = None
     YANDEX_GPT_API_URL: Optional[str] = None
@@ -36,12 +186,118 @@ class BaseConfig(SharedBaseConfig):
 
 class TestConfig(SharedTestConfig):
     # ... остальные обязательные поля
+    STORAGE_BACKEND: str = "local"
+    LOCAL_STORAGE_ROOT: str = "/tmp/contract-service-test-storage"
     ENDPOINT_URL: str = ""
     REGION_NAME: str = ""
     AWS_ACCESS_KEY_ID: str = ""
     AWS_SECRET_ACCESS_KEY: str = ""
     BUCKET_NAME: str = ""
+    ZIP_FETCH_CONCURRENCY: int = 4
+    ZIP_CHUNK_SIZE: int = 64 * 1024
+    STORAGE_COMPRESSION_ENABLED: bool = False
+    STORAGE_COMPRESSION_LEVEL: int = 3
+    STORAGE_COMPRESSION_MIN_SIZE: int = 4096
+    STORAGE_COMPRESSION_MIN_RATIO: float = 0.9
+    EXTRACTION_ENABLED: bool = False
+    EXTRACTION_PROCESS_WORKERS: int = 1
+    EXTRACTION_CONCURRENCY: int = 1
+    EXTRACTION_QUEUE_SIZE: int = 100
+    EXTRACTION_MAX_FILE_SIZE: int = 50 * 1024 * 1024
+    EXTRACTION_MAX_CHARS: int = 500_000
+    UPLOAD_MAX_CONCURRENT: int = 8
+    UPLOAD_MAX_INFLIGHT_BYTES: int = 256 * 1024 * 1024
+    UPLOAD_MAX_WAITERS: int = 16
+    UPLOAD_WAIT_TIMEOUT: float = 2.0
+    UPLOAD_RETRY_AFTER: int = 5
+    RECONCILE_INTERVAL_SECONDS: int = 0
+    RECONCILE_DELETE_ORPHANS: bool = False
+    RECONCILE_GRACE_SECONDS: int = 3600
+    HTTP_METRICS_DURATION_BUCKETS: list[float] = list(DEFAULT_DURATION_BUCKETS)
+    HTTP_METRICS_SIZE_BUCKETS: list[float] = list(DEFAULT_SIZE_BUCKETS)
+    DB_SLOW_QUERY_MS: int = 200
+    DB_EXPLAIN_SLOW_QUERIES: bool = False
+    DB_N_PLUS_ONE_THRESHOLD: int = 5
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 5
+    DB_POOL_ACQUIRE_TIMEOUT: Optional[float] = 10.0
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300.0
+    DB_COMMAND_TIMEOUT: Optional[float] = 60.0
+    DB_PGBOUNCER_MODE: bool = False
+    REPLICA_DATABASE_URL: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 2.0
+    REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+    READ_YOUR_WRITES_SECONDS: int = 5
+    SERVER_TIMING_ENABLED: bool = True
+    SLOW_REQUEST_LOG_MS: int = 1000
+    LOG_FORMAT: str = "text"
+    LOG_LEVEL: str = "DEBUG"
+    LOG_LEVELS: dict[str, str] = {}
+    LOG_SAMPLE_RATES: dict[str, float] = {}
+    LOG_DIAGNOSE: bool = False
+    LOG_FILE: Optional[str] = None
+    LOG_QUEUE_SIZE: int = 10000
+    PERMISSION_CACHE_TTL_SECONDS: float = 0
+    PERMISSION_CACHE_MAX_SIZE: int = 10000
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_CAPACITY: dict[str, int] = {"read": 300, "write": 60, "file": 30}
+    RATE_LIMIT_REFILL_PER_SECOND: dict[str, float] = {
+        "read": 50,
+        "write": 10,
+        "file": 3,
+    }
+    RATE_LIMIT_LOCAL_FRACTION: float = 0.5
+    RATE_LIMIT_LOCAL_SYNC_SECONDS: float = 1.0
+    IDEMPOTENCY_ENABLED: bool = False
+    IDEMPOTENCY_PATHS: list[str] = ["/api/contracts/add", "/api/contract-files/add"]
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_SECONDS: int = 300
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = 64 * 1024
+    SSE_ENABLED: bool = False
+    SSE_STREAM_MAXLEN: int = 1000
+    SSE_STREAM_TTL_SECONDS: int = 3600
+    SSE_CLIENT_QUEUE_SIZE: int = 100
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_REPLAY_LIMIT: int = 500
+    SSE_MAX_CONNECTIONS: int = 1000
+    USER_EVENTS_QUEUE: str = "contract-service"
+    USER_EVENTS_EXCHANGE: str = "events"
+    USER_EVENTS_PREFETCH: int = 100
+    USER_EVENTS_CONCURRENCY: int = 8
+    USER_EVENTS_BATCH_WINDOW_MS: float = 50
+    USER_EVENTS_BATCH_MAX: int = 100
+    OTEL_ENABLED: bool = False
+    OTEL_SERVICE_NAME: str = "contract-fastapi"
+    OTEL_ENVIRONMENT: str = "test"
+    OTEL_EXPORTER_ENDPOINT: str = "http://jaeger:4318/v1/traces"
+    OTEL_EXPORTER_TIMEOUT: int = 10
+    OTEL_SAMPLE_RATIO: float = 1.0
+    OTEL_BSP_MAX_QUEUE_SIZE: int = 2048
+    OTEL_BSP_MAX_EXPORT_BATCH_SIZE: int = 512
+    OTEL_BSP_SCHEDULE_DELAY_MS: int = 5000
+    WARMUP_ENABLED: bool = False
+    WARMUP_TIMEOUT_SECONDS: float = 10.0
+    WARMUP_DB_CONNECTIONS: int = 2
+    ERROR_BODY_CAPTURE_BYTES: int = 4096
+    ERROR_BODY_CAPTURE_STATUSES: list[int] = [400, 422]
     WEBHOOK_BASE_URL: str = ""
+    WEBHOOK_ENABLED: bool = False
+    WEBHOOK_CONCURRENCY: int = 8
+    WEBHOOK_MAX_CONNECTIONS: int = 32
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_POLL_SECONDS: float = 2.0
+    WEBHOOK_CLAIM_LIMIT: int = 200
+    WEBHOOK_BATCH_SIZE: int = 50
+    WEBHOOK_LEASE_SECONDS: int = 120
+    WEBHOOK_SEND_ATTEMPTS: int = 3
+    WEBHOOK_SEND_BACKOFF_SECONDS: float = 0.5
+    WEBHOOK_MAX_ATTEMPTS: int = 10
+    WEBHOOK_RETRY_BASE_SECONDS: float = 30.0
+    WEBHOOK_RETRY_MAX_SECONDS: float = 3600.0
+    WEBHOOK_CIRCUIT_THRESHOLD: int = 5
+    WEBHOOK_CIRCUIT_OPEN_SECONDS: int = 300
     YANDEX_SPEECHKIT_API_URL: str = ""
     YANDEX_GPT_API_URL: str = ""
     YANDEX_API_KEY: str = ""
@@ -69,6 +325,7 @@ class DockerConfig(BaseConfig):
 
 class DevConfig(BaseConfig):
     DATABASE_URL: str = "sqlite:///server.db"
+    LOG_DIAGNOSE: bool = True
 
     @property
     def db_url(self) -> str:
@@ -85,6 +342,15 @@ class ServerConfig(BaseConfig):
 
 class ProdConfig(BaseConfig):
     DATABASE_URL: str = "sqlite:///server.db"
+    LOG_FORMAT: str = "json"
+    LOG_LEVEL: str = "INFO"
+    LOG_SAMPLE_RATES: dict[str, float] = {
+        "uvicorn.access": 0.1,
+        "gunicorn.access": 0.1,
+    }
+    LOG_FILE: Optional[str] = None
+    OTEL_ENABLED: bool = True
+    OTEL_ENVIRONMENT: str = "production"
 
     @property
     def db_url(self) -> str:
@@ -105,3 +371,13 @@ def _load_settings(config_name: str):
             return ServerConfig()
         case _:
             raise ValueError(f"❌ Unknown config_name: {config_name}")
+
+
+@lru_cache
+def default_settings():
+    """
+    Настройки для кода вне приложения (CLI-скрипты, aerich) по CONFIG_NAME
+    из окружения. Приложение берёт настройки из своего контейнера.
+    """
+    load_dotenv()
+    return _load_settings(ConfigName(os.getenv("CONFIG_NAME", "Development")))
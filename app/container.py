@@ -0,0 +1,185 @@
+import asyncio
+import time
+from typing import Optional
+
+import redis.asyncio as redis
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from loguru import logger
+from tiacore_lib.rabbit.handlers import handle_user_event
+from tortoise import Tortoise
+
+from app.database.config import build_tortoise_config
+from app.database.models import ContractType
+from app.database.router import PRIMARY, REPLICA
+from app.dependencies.permission_cache import (
+    listen_evictions,
+    permission_cache,
+    publish_eviction,
+    subjects_from_event,
+)
+from app.handlers.user_events import UserEventConsumer
+from app.middleware.rate_limit import RateLimiter
+from app.s3.s3_manager import AsyncS3Manager
+from app.storage import StorageBackend, build_storage_backend
+from app.utils.change_feed import change_feed
+from app.utils.timing import TimedCacheBackend
+from metrics.worker_metrics import worker_ready, worker_warmup_seconds
+
+
+class AppContainer:
+    """
+    Долгоживущие ресурсы приложения: настройки, хранилище файлов, пул БД,
+    Redis и потребитель RabbitMQ. Создаётся один раз в create_app и лежит
+    в app.state.container.
+
+    Настройки и менеджер файлов доступны сразу после создания. Сетевые
+    клиенты открываются в start() — из lifespan, то есть уже в процессе
+    воркера (после fork при preload_app), — и закрываются в close().
+    После прогрева контейнер помечается готовым — это отдаёт /ready.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.storage: StorageBackend = build_storage_backend(settings)
+        self.s3 = AsyncS3Manager(backend=self.storage, settings=settings)
+        self.redis: Optional[redis.Redis] = None
+        self.rate_limiter = RateLimiter.from_settings(settings)
+        self.rabbit_task: Optional[asyncio.Task] = None
+        self.permission_cache_task: Optional[asyncio.Task] = None
+        self.change_feed_task: Optional[asyncio.Task] = None
+        self.ready = False
+        self._db_started = False
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    def get_settings(self):
+        return self.settings
+
+    async def start(self):
+        self.redis = redis.from_url(self.settings.REDIS_URL)
+        logger.info("🔥 Redis инициализируется")
+        if self.settings.RATE_LIMIT_ENABLED:
+            self.rate_limiter.bind(self.redis)
+        FastAPICache.init(
+            TimedCacheBackend(RedisBackend(self.redis)), prefix="fastapi-cache"
+        )
+        # Независимые ресурсы открываются параллельно
+        await asyncio.gather(self._init_db(), self.storage.start())
+
+        consumer = UserEventConsumer.from_settings(self.settings, self._on_user_event)
+        self.rabbit_task = asyncio.create_task(consumer.run())
+        if permission_cache.enabled:
+            self.permission_cache_task = asyncio.create_task(
+                listen_evictions(self.redis)
+            )
+        if self.settings.SSE_ENABLED:
+            change_feed.bind(self.redis)
+            self.change_feed_task = asyncio.create_task(change_feed.run())
+
+    async def _on_user_event(self, event: dict):
+        try:
+            await handle_user_event(event, settings=self.settings)
+        finally:
+            # Вытесняем после обработки, чтобы промах не перечитал старые права
+            if permission_cache.enabled:
+                subjects = subjects_from_event(event)
+                if subjects:
+                    permission_cache.evict_subjects(subjects)
+                else:
+                    permission_cache.clear()
+                try:
+                    await publish_eviction(self.redis, subjects)
+                except Exception as e:
+                    logger.warning(f"Не удалось разослать вытеснение кэша прав: {e!r}")
+
+    async def _init_db(self):
+        await Tortoise.init(config=build_tortoise_config(self.settings))
+        Tortoise.init_models(["app.database.models"], "models")
+        self._db_started = True
+
+    async def warmup(self):
+        """Прогревает пул БД, клиент хранилища, Redis и горячие запросы."""
+        started = time.perf_counter()
+        await asyncio.gather(self._warm_db(), self.storage.warmup(), self.redis.ping())
+        # Справочник типов договоров читается почти каждой формой
+        await ContractType.all()
+        elapsed = time.perf_counter() - started
+        worker_warmup_seconds.observe(elapsed)
+        logger.info(f"🔥 Воркер прогрет за {elapsed * 1000:.0f} мс")
+
+    async def _warm_db(self):
+        # Параллельные запросы заставляют пул открыть несколько соединений
+        count = min(self.settings.WARMUP_DB_CONNECTIONS, self.settings.DB_POOL_MAX_SIZE)
+        names = [PRIMARY]
+        if self.settings.REPLICA_DATABASE_URL:
+            names.append(REPLICA)
+        await asyncio.gather(
+            *(
+                Tortoise.get_connection(name).execute_query("SELECT 1")
+                for name in names
+                for _ in range(max(count, 1))
+            )
+        )
+
+    async def become_ready(self):
+        """
+        Прогрев с ограничением по времени. Lifespan ждёт его, поэтому новый
+        воркер не берёт запросы холодным. Если прогрев не удался, воркер
+        всё же стартует, /ready отвечает 503, а прогрев повторяется в фоне.
+        """
+        if not self.settings.WARMUP_ENABLED:
+            self._set_ready(True)
+            return
+        try:
+            await asyncio.wait_for(
+                self.warmup(), timeout=self.settings.WARMUP_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Прогрев воркера не удался: {e!r}")
+            self._warmup_task = asyncio.create_task(self._retry_warmup())
+            return
+        self._set_ready(True)
+
+    async def _retry_warmup(self):
+        delay = 1.0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await asyncio.wait_for(
+                    self.warmup(), timeout=self.settings.WARMUP_TIMEOUT_SECONDS
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Повторный прогрев воркера не удался: {e!r}")
+                delay = min(delay * 2, 30.0)
+                continue
+            self._set_ready(True)
+            return
+
+    def _set_ready(self, ready: bool):
+        self.ready = ready
+        worker_ready.set(1 if ready else 0)
+
+    async def close(self):
+        # Сначала снимаем готовность, чтобы балансировщик перестал слать трафик
+        self._set_ready(False)
+        if self._warmup_task:
+            self._warmup_task.cancel()
+            self._warmup_task = None
+        for task in (
+            self.rabbit_task,
+            self.permission_cache_task,
+            self.change_feed_task,
+        ):
+            if task:
+                task.cancel()
+        self.rabbit_task = self.permission_cache_task = self.change_feed_task = None
+        change_feed.bind(None)
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+        await self.storage.close()
+        if self._db_started:
+            await Tortoise.close_connections()
+            self._db_started = False
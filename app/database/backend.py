@@ -0,0 +1,80 @@
+"""
+Движок Tortoise поверх asyncpg с метриками пула.
+
+Подключается через "engine": "app.database.backend" в TORTOISE_ORM.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+import asyncpg
+from tortoise.backends.asyncpg.client import AsyncpgDBClient
+
+from metrics.db_metrics import (
+    db_pool_acquire_seconds,
+    db_pool_acquire_timeouts_total,
+    db_pool_in_use,
+    db_pool_max_size,
+    db_pool_size,
+)
+
+
+class InstrumentedPool:
+    """
+    Прокси над asyncpg.Pool: замеряет ожидание acquire() и обновляет gauges.
+    Tortoise берёт соединения только через `await pool.acquire()`.
+    """
+
+    def __init__(
+        self, pool: asyncpg.Pool, name: str, acquire_timeout: Optional[float] = None
+    ):
+        self._pool = pool
+        self._acquire_timeout = acquire_timeout
+        self._size = db_pool_size.labels(connection=name)
+        self._in_use = db_pool_in_use.labels(connection=name)
+        self._wait = db_pool_acquire_seconds.labels(connection=name)
+        self._timeouts = db_pool_acquire_timeouts_total.labels(connection=name)
+        db_pool_max_size.labels(connection=name).set(pool.get_max_size())
+        self._update()
+
+    def _update(self):
+        size = self._pool.get_size()
+        self._size.set(size)
+        self._in_use.set(size - self._pool.get_idle_size())
+
+    async def acquire(self, *, timeout: Optional[float] = None):
+        started = time.perf_counter()
+        try:
+            connection = await self._pool.acquire(
+                timeout=timeout if timeout is not None else self._acquire_timeout
+            )
+        except asyncio.TimeoutError:
+            self._timeouts.inc()
+            raise
+        finally:
+            self._wait.observe(time.perf_counter() - started)
+        self._update()
+        return connection
+
+    async def release(self, connection, *, timeout: Optional[float] = None):
+        try:
+            await self._pool.release(connection, timeout=timeout)
+        finally:
+            self._update()
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+class InstrumentedAsyncpgClient(AsyncpgDBClient):
+    def __init__(self, *args, acquire_timeout: Optional[float] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquire_timeout = acquire_timeout
+
+    async def create_pool(self, **kwargs) -> InstrumentedPool:
+        pool = await super().create_pool(**kwargs)
+        return InstrumentedPool(pool, self.connection_name, self.acquire_timeout)
+
+
+client_class = InstrumentedAsyncpgClient
@@ -1,22 +1,58 @@
-import os
+from tortoise.backends.base.config_generator import expand_db_url
 
-from dotenv import load_dotenv
-from tiacore_lib.config import ConfigName
+from app.config import default_settings
 
-from app.config import _load_settings
 
-load_dotenv()
+def build_db_connection(settings, db_url: str) -> dict:
+    """
+    Параметры подключения с настройками пула. Параметры из query-строки URL
+    приоритетнее настроек — так можно переопределить пул для одной базы.
+    """
+    connection = expand_db_url(db_url)
+    if connection["engine"] != "tortoise.backends.asyncpg":
+        return connection
+    connection["engine"] = "app.database.backend"
+    credentials = connection["credentials"]
+    credentials.setdefault("minsize", settings.DB_POOL_MIN_SIZE)
+    credentials.setdefault("maxsize", settings.DB_POOL_MAX_SIZE)
+    credentials.setdefault(
+        "max_inactive_connection_lifetime",
+        settings.DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+    )
+    credentials.setdefault("command_timeout", settings.DB_COMMAND_TIMEOUT)
+    credentials.setdefault("acquire_timeout", settings.DB_POOL_ACQUIRE_TIMEOUT)
+    # PgBouncer в режиме transaction не держит именованные prepared statements
+    # между транзакциями — кэш выключаем, asyncpg перейдёт на безымянные
+    credentials["statement_cache_size"] = (
+        0 if settings.DB_PGBOUNCER_MODE else settings.DB_STATEMENT_CACHE_SIZE
+    )
+    return connection
 
-CONFIG_NAME = ConfigName(os.getenv("CONFIG_NAME", "Development"))
-settings = _load_settings(config_name=CONFIG_NAME)
 
-TORTOISE_ORM = {
-    "connections": {"default": settings.db_url},
-    "apps": {
-        "models": {
-            # Укажите только модуль
-            "models": ["app.database.models", "aerich.models"],
-            "default_connection": "default",
+def build_tortoise_config(settings) -> dict:
+    config = {
+        "connections": {"default": build_db_connection(settings, settings.db_url)},
+        "apps": {
+            "models": {
+                # Укажите только модуль
+                "models": ["app.database.models", "aerich.models"],
+                "default_connection": "default",
+            },
         },
-    },
-}
+    }
+    if settings.REPLICA_DATABASE_URL:
+        config["connections"]["replica"] = build_db_connection(
+            settings, settings.REPLICA_DATABASE_URL
+        )
+        config["routers"] = ["app.database.router.ReplicaRouter"]
+    return config
+
+
+def __getattr__(name: str):
+    # aerich и CLI-скрипты читают TORTOISE_ORM из модуля. Настройки
+    # загружаются при первом обращении, а не при импорте модуля
+    if name == "settings":
+        return default_settings()
+    if name == "TORTOISE_ORM":
+        return build_tortoise_config(default_settings())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,246 @@
+import asyncio
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache, wraps
+from typing import Optional
+
+from loguru import logger
+from starlette.types import ASGIApp, Receive, Scope, Send
+from tortoise.backends.asyncpg.client import AsyncpgDBClient, TransactionWrapper
+
+from app.utils.timing import DB, record
+from app.utils.tracing import set_span_attributes
+from metrics.db_metrics import (
+    db_n_plus_one_total,
+    db_queries_per_request,
+    db_query_duration_seconds,
+    db_slow_queries_total,
+)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"\$\d+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+_FINGERPRINT_MAX_LEN = 200
+# Сверх этого числа отпечатки сливаются в "other", чтобы не раздувать метки
+_MAX_FINGERPRINTS = 500
+_EXPLAIN_INTERVAL = 300.0
+
+_INSTRUMENTED_METHODS = (
+    (AsyncpgDBClient, "execute_insert", "insert"),
+    (AsyncpgDBClient, "execute_many", "many"),
+    (AsyncpgDBClient, "execute_query", "query"),
+    (AsyncpgDBClient, "execute_query_dict", "query"),
+    (TransactionWrapper, "execute_many", "many"),
+)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    rows: int = 0
+    fingerprints: Counter = field(default_factory=Counter)
+
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "db_request_stats", default=None
+)
+_in_explain: ContextVar[bool] = ContextVar("db_in_explain", default=False)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """Нормализует SQL: литералы и параметры → ?, списки IN (?, ?, …) → (?+)."""
+    normalized = _STRING_RE.sub("?", sql)
+    normalized = _PARAM_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("(?+)", normalized)
+    normalized = _SPACE_RE.sub(" ", normalized).strip()
+    return normalized[:_FINGERPRINT_MAX_LEN]
+
+
+def _row_count(result) -> int:
+    # execute_query → (rowcount, rows), execute_query_dict → list
+    if isinstance(result, tuple) and result and isinstance(result[0], int):
+        return result[0]
+    if isinstance(result, list):
+        return len(result)
+    return 0
+
+
+class QueryInstrumentation:
+    def __init__(
+        self,
+        slow_query_ms: float = 200,
+        explain_slow: bool = True,
+    ):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.explain_slow = explain_slow
+        self._known: set[str] = set()
+        self._explained_at: dict[str, float] = {}
+        self._explain_tasks: set[asyncio.Task] = set()
+
+    def label(self, fp: str) -> str:
+        if fp in self._known:
+            return fp
+        if len(self._known) >= _MAX_FINGERPRINTS:
+            return "other"
+        self._known.add(fp)
+        return fp
+
+    def record(
+        self,
+        client,
+        sql: str,
+        values,
+        operation: str,
+        elapsed: float,
+        rows: int = 0,
+    ):
+        fp = fingerprint(sql)
+        label = self.label(fp)
+        db_query_duration_seconds.labels(
+            fingerprint=label, operation=operation
+        ).observe(elapsed)
+        record(DB, elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+            stats.rows += rows
+            stats.fingerprints[fp] += 1
+
+        if elapsed < self.slow_query_seconds:
+            return
+        db_slow_queries_total.labels(fingerprint=label).inc()
+        logger.warning(f"🐢 Медленный запрос {elapsed * 1000:.0f} мс: {fp}")
+        if self.explain_slow and operation == "query":
+            self._schedule_explain(client, fp, sql, values)
+
+    def _schedule_explain(self, client, fp: str, sql: str, values):
+        statement = sql.lstrip().split(None, 1)
+        if not statement or statement[0].upper() not in ("SELECT", "WITH"):
+            return
+        now = time.monotonic()
+        if now - self._explained_at.get(fp, 0.0) < _EXPLAIN_INTERVAL:
+            return
+        self._explained_at[fp] = now
+        # План снимаем в фоне, чтобы не удлинять и без того медленный запрос
+        task = asyncio.create_task(self._explain(client, fp, sql, values))
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    async def _explain(self, client, fp: str, sql: str, values):
+        # Транзакция запроса к этому моменту может быть закрыта — берём корневой пул
+        root = client
+        while isinstance(root, TransactionWrapper):
+            root = root._parent
+        token = _in_explain.set(True)
+        try:
+            rows = await root.execute_query_dict(f"EXPLAIN {sql}", values)
+            plan = "\n".join(row["QUERY PLAN"] for row in rows)
+            logger.warning(f"🔍 План медленного запроса {fp}:\n{plan}")
+        except Exception as e:
+            logger.debug(f"Не удалось получить EXPLAIN для {fp}: {e}")
+        finally:
+            _in_explain.reset(token)
+
+    def wrap(self, method, operation: str):
+        @wraps(method)
+        async def _wrapper(client, query: str, *args, **kwargs):
+            if _in_explain.get():
+                return await method(client, query, *args, **kwargs)
+            started = time.perf_counter()
+            result = None
+            try:
+                result = await method(client, query, *args, **kwargs)
+                return result
+            finally:
+                values = args[0] if args else kwargs.get("values")
+                self.record(
+                    client,
+                    query,
+                    values,
+                    operation,
+                    time.perf_counter() - started,
+                    _row_count(result),
+                )
+
+        _wrapper.__db_instrumented__ = True
+        return _wrapper
+
+
+_instrumentation: Optional[QueryInstrumentation] = None
+
+
+def instrument_tortoise(
+    slow_query_ms: float = 200, explain_slow: bool = True
+) -> QueryInstrumentation:
+    """Оборачивает execute_* клиента asyncpg. Повторный вызов обновляет пороги."""
+    global _instrumentation
+    if _instrumentation is None:
+        _instrumentation = QueryInstrumentation(slow_query_ms, explain_slow)
+        for cls, name, operation in _INSTRUMENTED_METHODS:
+            method = cls.__dict__[name]
+            if not getattr(method, "__db_instrumented__", False):
+                setattr(cls, name, _instrumentation.wrap(method, operation))
+    else:
+        _instrumentation.slow_query_seconds = slow_query_ms / 1000
+        _instrumentation.explain_slow = explain_slow
+    return _instrumentation
+
+
+class QueryStatsMiddleware:
+    """
+    Считает SQL-запросы каждого HTTP-запроса и предупреждает о N+1 — когда
+    один отпечаток повторился не меньше `n_plus_one_threshold` раз.
+    """
+
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_stats.reset(token)
+            if stats.count:
+                self._report(scope, stats)
+                # На серверный спан — чтобы искать тяжёлые по БД трассы
+                set_span_attributes(
+                    **{
+                        "db.query_count": stats.count,
+                        "db.duration_ms": round(stats.duration * 1000, 3),
+                        "db.rows": stats.rows,
+                    }
+                )
+
+    def _report(self, scope: Scope, stats: QueryStats):
+        route = getattr(scope.get("route"), "path", None)
+        route_label = route or "__unmatched__"
+        db_queries_per_request.labels(route=route_label).observe(stats.count)
+        logger.info(
+            f"🗄️ {scope['method']} {route or scope['path']}: "
+            f"{stats.count} SQL-запросов, {stats.duration * 1000:.1f} мс"
+        )
+        for fp, count in stats.fingerprints.most_common():
+            if count < self.n_plus_one_threshold:
+                break
+            label = _instrumentation.label(fp) if _instrumentation else "other"
+            db_n_plus_one_total.labels(route=route_label, fingerprint=label).inc()
+            logger.warning(
+                f"🔁 Возможный N+1 в {scope['method']} {route or scope['path']}: "
+                f"{count} одинаковых запросов: {fp}"
+            )
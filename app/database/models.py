@@ -41,6 +41,8 @@ class ContractFile(Model):
     name = fields.CharField(max_length=255)
     extension = fields.CharField(max_length=10)
     s3_key = fields.CharField(max_length=255)
+    codec = fields.CharField(max_length=16, default="identity")
+    original_size = fields.BigIntField(null=True)
     contract = fields.ForeignKeyField("models.Contract", related_name="contract_files")
 
     created_at = fields.DatetimeField(auto_now_add=True)
@@ -50,3 +52,58 @@ class ContractFile(Model):
 
     class Meta:
         table = "contract_files"
+
+
+class ContractFileContent(Model):
+    id = fields.UUIDField(pk=True, default=uuid.uuid4)
+    contract_file = fields.OneToOneField(
+        "models.ContractFile", related_name="content"
+    )
+    text = fields.TextField()
+    status = fields.CharField(max_length=20)
+    error = fields.TextField(null=True)
+    extracted_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "contract_file_contents"
+
+
+class WebhookSubscription(Model):
+    id = fields.UUIDField(pk=True, default=uuid.uuid4)
+    company_id = fields.UUIDField(index=True)
+    url = fields.CharField(max_length=2048)
+    secret = fields.CharField(max_length=128)
+    # Пустой список — все события
+    events = fields.JSONField(default=list)
+    is_active = fields.BooleanField(default=True)
+    # Предохранитель: подряд идущие ошибки и время, до которого адрес выключен
+    failure_count = fields.IntField(default=0)
+    disabled_until = fields.DatetimeField(null=True)
+    last_error = fields.TextField(null=True)
+
+    created_at = fields.DatetimeField(auto_now_add=True)
+    created_by = fields.UUIDField()
+    modified_at = fields.DatetimeField(auto_now=True)
+    modified_by = fields.UUIDField()
+
+    class Meta:
+        table = "webhook_subscriptions"
+
+
+class WebhookDelivery(Model):
+    id = fields.BigIntField(pk=True)
+    subscription = fields.ForeignKeyField(
+        "models.WebhookSubscription", related_name="deliveries"
+    )
+    event = fields.CharField(max_length=100)
+    payload = fields.JSONField()
+    # pending → delivered | failed
+    status = fields.CharField(max_length=20, default="pending")
+    attempts = fields.IntField(default=0)
+    next_attempt_at = fields.DatetimeField()
+    last_error = fields.TextField(null=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    delivered_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        table = "webhook_deliveries"
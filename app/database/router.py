@@ -0,0 +1,124 @@
+import asyncio
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from loguru import logger
+from tortoise import Tortoise
+
+from metrics.db_metrics import (
+    db_reads_total,
+    db_replica_healthy,
+    db_replica_lag_seconds,
+)
+
+PRIMARY = "default"
+REPLICA = "replica"
+
+# Реплика без новых WAL-записей не отстаёт, даже если последняя транзакция давно
+_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END AS lag
+"""
+
+
+@dataclass
+class ReadRouting:
+    """Состояние маршрутизации чтений одного HTTP-запроса."""
+
+    replica_allowed: bool = True
+    use_replica: bool = False
+
+
+_routing: ContextVar[Optional[ReadRouting]] = ContextVar(
+    "db_read_routing", default=None
+)
+
+
+class ReplicaLagMonitor:
+    """Периодически меряет отставание реплики; до первой проверки реплика закрыта."""
+
+    def __init__(self, max_lag_seconds: float = 2.0, interval_seconds: float = 5.0):
+        self.max_lag_seconds = max_lag_seconds
+        self.interval_seconds = interval_seconds
+        self.healthy = False
+        self.lag: Optional[float] = None
+
+    async def check(self) -> bool:
+        try:
+            rows = await Tortoise.get_connection(REPLICA).execute_query_dict(_LAG_SQL)
+            self.lag = float(rows[0]["lag"])
+        except Exception as e:
+            if self.healthy:
+                logger.warning(f"⚠️ Реплика недоступна, чтения идут в primary: {e}")
+            self.lag = None
+            self.healthy = False
+        else:
+            healthy = self.lag <= self.max_lag_seconds
+            if healthy != self.healthy:
+                if healthy:
+                    logger.info(f"✅ Реплика в строю, отставание {self.lag:.2f} с")
+                else:
+                    logger.warning(
+                        f"⚠️ Отставание реплики {self.lag:.2f} с, чтения идут в primary"
+                    )
+            self.healthy = healthy
+            db_replica_lag_seconds.set(self.lag)
+        db_replica_healthy.set(1 if self.healthy else 0)
+        return self.healthy
+
+    async def run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval_seconds)
+
+
+replica_monitor = ReplicaLagMonitor()
+
+
+def start_routing(replica_allowed: bool):
+    return _routing.set(ReadRouting(replica_allowed=replica_allowed))
+
+
+def end_routing(token):
+    _routing.reset(token)
+
+
+def mark_read_only():
+    routing = _routing.get()
+    if routing is not None:
+        routing.use_replica = True
+
+
+def read_alias() -> str:
+    routing = _routing.get()
+    if (
+        routing is not None
+        and routing.use_replica
+        and routing.replica_allowed
+        and replica_monitor.healthy
+    ):
+        return REPLICA
+    return PRIMARY
+
+
+def read_connection():
+    """Соединение для сырых SELECT с учётом маршрутизации текущего запроса."""
+    return Tortoise.get_connection(read_alias())
+
+
+class ReplicaRouter:
+    """Роутер Tortoise: чтения помеченных запросов — в реплику, остальное — в primary."""
+
+    def db_for_read(self, model) -> str:
+        alias = read_alias()
+        db_reads_total.labels(target=alias).inc()
+        return alias
+
+    def db_for_write(self, model) -> str:
+        return PRIMARY
@@ -0,0 +1,17 @@
+from fastapi import Request
+
+from app.container import AppContainer
+from app.s3.s3_manager import AsyncS3Manager
+
+
+def get_container(request: Request) -> AppContainer:
+    return request.app.state.container
+
+
+def get_s3_manager(request: Request) -> AsyncS3Manager:
+    """Общий менеджер файлов приложения; в тестах подменяется через overrides."""
+    return request.app.state.container.s3
+
+
+def get_redis(request: Request):
+    return request.app.state.container.redis
@@ -0,0 +1,6 @@
+from app.database.router import mark_read_only
+
+
+async def use_read_replica():
+    """Разрешает чтения запроса из реплики; запись по-прежнему идёт в primary."""
+    mark_read_only()
@@ -0,0 +1,317 @@
+"""
+L1-кэш контекстов прав в памяти воркера.
+
+Зависимости tiacore_lib (get_current_user, require_permission_in_context) на
+каждый запрос проверяют JWT и читают пользователя и права из Redis. Кэш
+хранит уже вычисленный контекст по токену и параметрам запроса, от которых
+зависимость зависит. Запись живёт не дольше TTL и срока действия токена и
+удаляется сразу по событию user.* — в этом воркере напрямую, в остальных
+через Redis pub/sub (очередь RabbitMQ у воркеров общая, событие получает
+только один из них).
+"""
+
+import asyncio
+import base64
+import inspect
+import json
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from typing import Any, Callable, Iterable, Optional
+
+from fastapi import Request, Security
+from fastapi.concurrency import run_in_threadpool
+from fastapi.dependencies.utils import (
+    get_dependant,
+    get_flat_dependant,
+    solve_dependencies,
+)
+from fastapi.exceptions import RequestValidationError
+from loguru import logger
+
+from metrics.auth_metrics import (
+    permission_cache_evictions_total,
+    permission_cache_requests_total,
+)
+
+EVICT_CHANNEL = "contract-service:permission-cache:evict"
+EVICT_ALL = "*"
+
+# Поля события и контекста, по которым находится пользователь
+SUBJECT_KEYS = ("sub", "login", "email", "user_id", "id")
+
+_hits = permission_cache_requests_total.labels(result="hit")
+_misses = permission_cache_requests_total.labels(result="miss")
+
+
+def token_claims(authorization: str) -> dict:
+    """
+    Полезная нагрузка JWT без проверки подписи. Используется только для
+    индексации и срока жизни записи: в кэш попадает токен, который
+    зависимость уже проверила.
+    """
+    token = authorization.rpartition(" ")[2]
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (IndexError, ValueError):
+        return {}
+    return claims if isinstance(claims, dict) else {}
+
+
+def _subjects_of(value: Any) -> set[str]:
+    if not isinstance(value, dict):
+        return set()
+    subjects = {str(value[key]) for key in SUBJECT_KEYS if value.get(key) is not None}
+    for nested in ("user", "data", "payload"):
+        if isinstance(value.get(nested), dict):
+            subjects |= _subjects_of(value[nested])
+    return subjects
+
+
+def subjects_from_event(*args, **kwargs) -> set[str]:
+    """Идентификаторы пользователя из события user.* (dict, JSON или сообщение)."""
+    subjects: set[str] = set()
+    for value in (*args, *kwargs.values()):
+        body = getattr(value, "body", value)
+        if isinstance(body, (bytes, str)):
+            try:
+                body = json.loads(body)
+            except ValueError:
+                continue
+        subjects |= _subjects_of(body)
+    return subjects
+
+
+class PermissionContextCache:
+    """Ограниченный LRU с TTL и индексом записей по пользователю."""
+
+    def __init__(self, maxsize: int = 10000, ttl_seconds: float = 30.0):
+        # Счётчик вытеснений: контекст, вычисленный до вытеснения его
+        # пользователя или очистки кэша, класть нельзя — он мог устареть
+        self._generation = 0
+        self.configure(maxsize, ttl_seconds)
+
+    def configure(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl_seconds > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            _misses.inc()
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            permission_cache_evictions_total.labels(reason="expired").inc()
+            _misses.inc()
+            return None
+        self._entries.move_to_end(key)
+        _hits.inc()
+        return value
+
+    def put(
+        self,
+        key,
+        value: Any,
+        subjects: Iterable[str],
+        expires_in: Optional[float] = None,
+        generation: Optional[int] = None,
+    ):
+        """generation — значение счётчика до вычисления value."""
+        subjects = tuple(subjects)
+        if generation is not None and self._stale(subjects, generation):
+            return
+        ttl = self.ttl_seconds
+        if expires_in is not None:
+            ttl = min(ttl, expires_in)
+        if ttl <= 0:
+            return
+        self._remove(key)
+        self._entries[key] = (value, time.monotonic() + ttl, subjects)
+        for subject in subjects:
+            self._index.setdefault(subject, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            permission_cache_evictions_total.labels(reason="lru").inc()
+
+    def _stale(self, subjects: tuple, generation: int) -> bool:
+        if self._cleared_at > generation:
+            return True
+        return any(self._evicted_at.get(s, 0) > generation for s in subjects)
+
+    def evict_subjects(self, subjects: Iterable[str]) -> int:
+        self._generation += 1
+        evicted = 0
+        for subject in subjects:
+            self._evicted_at[str(subject)] = self._generation
+            for key in self._index.pop(str(subject), ()):
+                if key in self._entries:
+                    self._remove(key)
+                    evicted += 1
+        if evicted:
+            permission_cache_evictions_total.labels(reason="event").inc(evicted)
+        return evicted
+
+    def clear(self):
+        self._generation += 1
+        self._cleared_at = self._generation
+        self._entries: OrderedDict = OrderedDict()
+        self._index: dict[str, set] = {}
+        self._evicted_at: dict[str, int] = {}
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for subject in entry[2]:
+            keys = self._index.get(subject)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[subject]
+
+
+permission_cache = PermissionContextCache()
+
+
+def _copy(value: Any) -> Any:
+    # Маршруты получают свою копию: изменения не попадут в кэш
+    return dict(value) if isinstance(value, dict) else value
+
+
+def cached_dependency(
+    dependency: Callable, scope: str, cache: PermissionContextCache = permission_cache
+) -> Callable:
+    """
+    Ставит кэш перед зависимостью. Сигнатура обёртки — Request и схемы
+    безопасности исходной зависимости (они только читают заголовок и
+    сохраняют описание авторизации в OpenAPI). Под-зависимости исходной
+    зависимости разрешаются только при промахе, с учётом dependency_overrides.
+    Ключ — scope, заголовок Authorization и значения параметров запроса,
+    которые читает исходная зависимость.
+    """
+    flat = get_flat_dependant(get_dependant(path="", call=dependency))
+    param_names = tuple(f.alias for f in flat.query_params + flat.path_params)
+    header_names = tuple(f.alias.lower() for f in flat.header_params)
+    cookie_names = tuple(f.alias for f in flat.cookie_params)
+    dependants: dict[str, Any] = {}
+    is_coroutine = inspect.iscoroutinefunction(dependency)
+
+    async def _resolve(request: Request):
+        route = request.scope.get("route")
+        path = getattr(route, "path_format", "")
+        dependant = dependants.get(path)
+        if dependant is None:
+            dependant = dependants[path] = get_dependant(path=path, call=dependency)
+        async with AsyncExitStack() as stack:
+            solved = await solve_dependencies(
+                request=request,
+                dependant=dependant,
+                dependency_overrides_provider=request.app,
+                async_exit_stack=stack,
+                embed_body_fields=False,
+            )
+            if solved.errors:
+                raise RequestValidationError(solved.errors)
+            if is_coroutine:
+                return await dependency(**solved.values)
+            return await run_in_threadpool(dependency, **solved.values)
+
+    async def _cached(request: Request, **_security):
+        authorization = request.headers.get("authorization")
+        if not cache.enabled or not authorization:
+            return await _resolve(request)
+        key = (
+            scope,
+            authorization,
+            tuple(
+                request.path_params.get(name, request.query_params.get(name))
+                for name in param_names
+            ),
+            tuple(request.headers.get(name) for name in header_names),
+            tuple(request.cookies.get(name) for name in cookie_names),
+        )
+        value = cache.get(key)
+        if value is not None:
+            return _copy(value)
+
+        generation = cache.generation
+        value = await _resolve(request)
+        claims = token_claims(authorization)
+        subjects = _subjects_of(claims) | _subjects_of(value)
+        expires_in = None
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_in = claims["exp"] - time.time()
+        cache.put(key, value, subjects, expires_in, generation)
+        return _copy(value)
+
+    parameters = [
+        inspect.Parameter(
+            "request", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request
+        )
+    ]
+    for i, requirement in enumerate(flat.security_requirements):
+        parameters.append(
+            inspect.Parameter(
+                f"_security_{i}",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=Security(
+                    requirement.security_scheme, scopes=requirement.scopes
+                ),
+            )
+        )
+    _cached.__signature__ = inspect.Signature(parameters)
+    _cached.__name__ = getattr(dependency, "__name__", "cached_dependency")
+    return _cached
+
+
+async def publish_eviction(redis_client, subjects: Iterable[str]):
+    """Рассылает вытеснение остальным воркерам; пустой набор — очистить всё."""
+    subjects = list(subjects) or [EVICT_ALL]
+    await redis_client.publish(EVICT_CHANNEL, json.dumps(subjects))
+
+
+async def listen_evictions(
+    redis_client, cache: PermissionContextCache = permission_cache
+):
+    """Применяет вытеснения из Redis pub/sub до отмены задачи."""
+    delay = 1.0
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(EVICT_CHANNEL)
+            # Пока подписки не было, события могли быть пропущены
+            cache.clear()
+            delay = 1.0
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                subjects = json.loads(message["data"])
+                if EVICT_ALL in subjects:
+                    cache.clear()
+                else:
+                    cache.evict_subjects(subjects)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Подписка на вытеснение кэша прав прервана: {e!r}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+        finally:
+            await pubsub.aclose()
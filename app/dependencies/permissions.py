@@ -1 +1,85 @@
+import inspect
+from functools import wraps
+from typing import Callable
 
+from fastapi.concurrency import run_in_threadpool
+from tiacore_lib.handlers.auth_handler import get_current_user
+from tiacore_lib.handlers.dependency_handler import (
+    require_permission_in_context as _require_permission_in_context,
+)
+from tiacore_lib.handlers.permissions_handler import (
+    with_permission_and_company_from_body_check as _with_permission_and_company,
+)
+
+from app.dependencies.permission_cache import cached_dependency
+from app.middleware.idempotency import check_idempotency
+from app.middleware.rate_limit import enforce_rate_limit
+from app.utils.timing import AUTH, IDEMPOTENCY, RATE_LIMIT, measure
+from app.utils.tracing import annotate_context
+
+
+def timed_dependency(dependency: Callable, category: str = AUTH) -> Callable:
+    """
+    Оборачивает зависимость FastAPI замером времени. functools.wraps сохраняет
+    __wrapped__, поэтому FastAPI видит исходную сигнатуру и её под-зависимости.
+    """
+    if inspect.iscoroutinefunction(dependency):
+
+        @wraps(dependency)
+        async def _async_timed(*args, **kwargs):
+            with measure(category):
+                return await dependency(*args, **kwargs)
+
+        return _async_timed
+
+    @wraps(dependency)
+    def _timed(*args, **kwargs):
+        with measure(category):
+            return dependency(*args, **kwargs)
+
+    return _timed
+
+
+def after_context(dependency: Callable) -> Callable:
+    """
+    Шаги, которым нужен готовый контекст прав: атрибуты спана запроса,
+    лимит запросов компании и Idempotency-Key. Оборачивает уже замеренную
+    зависимость, чтобы эти шаги не попадали во время auth.
+    """
+    is_async = inspect.iscoroutinefunction(dependency)
+
+    @wraps(dependency)
+    async def _after_context(*args, **kwargs):
+        if is_async:
+            context = await dependency(*args, **kwargs)
+        else:
+            context = await run_in_threadpool(dependency, *args, **kwargs)
+        annotate_context(context)
+        with measure(RATE_LIMIT):
+            await enforce_rate_limit(context)
+        # Повтор может ждать исходный запрос до IDEMPOTENCY_WAIT_SECONDS
+        with measure(IDEMPOTENCY):
+            await check_idempotency(context)
+        return context
+
+    return _after_context
+
+
+def require_permission_in_context(permission: str) -> Callable:
+    return after_context(
+        timed_dependency(
+            cached_dependency(_require_permission_in_context(permission), permission)
+        )
+    )
+
+
+def with_permission_and_company_from_body_check(permission: str) -> Callable:
+    return after_context(timed_dependency(_with_permission_and_company(permission)))
+
+
+# Подменяется через dependency_overrides: get_current_user вызывается внутри
+# зависимостей библиотеки, и обёртка выше его время не видит. Проверка прав
+# по телу запроса не кэшируется — её результат зависит от тела
+timed_get_current_user = timed_dependency(
+    cached_dependency(get_current_user, "current_user")
+)
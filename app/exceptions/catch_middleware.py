@@ -1,23 +1,94 @@
+import json
 import traceback
+
 from loguru import logger
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Заголовки, которые не попадают в лог
+SENSITIVE_HEADERS = frozenset({b"authorization", b"cookie", b"x-api-key"})
+
+_ERROR_BODY = json.dumps({"detail": "Internal Server Error"}).encode()
+
+
+class CatchAllExceptionsMiddleware:
+    """
+    Перехватывает необработанные исключения (ответ 500) и логирует запросы,
+    завершившиеся ответом из capture_statuses, вместе с началом тела.
+
+    Чистый ASGI: без отдельной задачи и обёртки потока на запрос, поэтому
+    не мешает StreamingResponse и потоковой загрузке. Тело запроса не
+    перечитывается — первые body_limit байт копируются по мере чтения
+    приложением, остальное не хранится.
+    """
 
+    def __init__(
+        self,
+        app: ASGIApp,
+        body_limit: int = 4096,
+        capture_statuses: tuple[int, ...] = (400, 422),
+    ):
+        self.app = app
+        self.body_limit = body_limit
+        self.capture_statuses = frozenset(capture_statuses)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        body = bytearray()
+        limit = self.body_limit
+        status = None
+
+        async def _receive() -> Message:
+            message = await receive()
+            if len(body) < limit and message["type"] == "http.request":
+                body.extend(message.get("body", b"")[: limit - len(body)])
+            return message
+
+        async def _send(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
 
-class CatchAllExceptionsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
         try:
-            response = await call_next(request)
-            if response.status_code == 400:
-                body = await request.body()
-                logger.error("🚨 400 Bad Request от FastAPI")
-                logger.error(f"➡️ URL: {request.url}")
-                logger.error(f"➡️ Headers: {dict(request.headers)}")
-                logger.error(
-                    f"➡️ Body: {body.decode('utf-8', errors='ignore')}")
-            return response
+            await self.app(scope, _receive if limit else receive, _send)
         except Exception as e:
             tb = traceback.format_exc()
             logger.critical("🔥 Исключение в middleware!")
             logger.critical(f"{e}\n{tb}")
-            return JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
+            if status is not None:
+                # Ответ уже начат (потоковая выдача) — 500 отправить нельзя
+                return
+            status = 500
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 500,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(_ERROR_BODY)).encode()),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": _ERROR_BODY})
+            return
+
+        if status in self.capture_statuses:
+            self._log_rejected(scope, status, body)
+
+    def _log_rejected(self, scope: Scope, status: int, body: bytearray):
+        path = scope["path"]
+        if scope.get("query_string"):
+            path = f"{path}?{scope['query_string'].decode('latin-1')}"
+        headers = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope["headers"]
+            if key not in SENSITIVE_HEADERS
+        }
+        truncated = " (обрезано)" if len(body) >= self.body_limit else ""
+        logger.error(f"🚨 {status} от FastAPI")
+        logger.error(f"➡️ URL: {scope['method']} {path}")
+        logger.error(f"➡️ Headers: {headers}")
+        logger.error(f"➡️ Body{truncated}: {body.decode('utf-8', errors='ignore')}")
@@ -0,0 +1,34 @@
+import argparse
+import asyncio
+
+from tortoise import Tortoise
+
+from app.database.config import TORTOISE_ORM, settings
+from app.extraction.pipeline import ExtractionPipeline
+
+
+async def run_backfill(batch_size: int):
+    await Tortoise.init(config=TORTOISE_ORM)
+    pipeline = ExtractionPipeline(
+        process_workers=settings.EXTRACTION_PROCESS_WORKERS,
+        concurrency=settings.EXTRACTION_CONCURRENCY,
+        queue_size=settings.EXTRACTION_QUEUE_SIZE,
+        max_file_size=settings.EXTRACTION_MAX_FILE_SIZE,
+        max_chars=settings.EXTRACTION_MAX_CHARS,
+    )
+    await pipeline.start()
+    try:
+        await pipeline.backfill(batch_size=batch_size)
+        await pipeline.join()
+    finally:
+        await pipeline.stop()
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Извлечение текста из уже загруженных файлов контрактов"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run_backfill(args.batch_size))
@@ -0,0 +1,59 @@
+import re
+import zipfile
+from xml.etree import ElementTree
+
+# Функции этого модуля выполняются в ProcessPoolExecutor,
+# поэтому должны быть верхнеуровневыми и не трогать event loop.
+
+TEXT_EXTENSIONS = {"txt", "csv", "xml", "html", "htm", "json", "md", "rtf"}
+SUPPORTED_EXTENSIONS = TEXT_EXTENSIONS | {"pdf", "docx"}
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _decode(data: bytes) -> str:
+    for encoding in ("utf-8", "cp1251"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="ignore")
+
+
+def _extract_docx(path: str) -> str:
+    paragraphs = []
+    with zipfile.ZipFile(path) as archive:
+        with archive.open("word/document.xml") as document:
+            for _, element in ElementTree.iterparse(document):
+                if element.tag == f"{_WORD_NS}p":
+                    text = "".join(
+                        node.text or "" for node in element.iter(f"{_WORD_NS}t")
+                    )
+                    if text:
+                        paragraphs.append(text)
+                    element.clear()
+    return "\n".join(paragraphs)
+
+
+def _extract_pdf(path: str) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_text(path: str, extension: str, max_chars: int) -> str:
+    extension = extension.lower()
+    if extension == "docx":
+        text = _extract_docx(path)
+    elif extension == "pdf":
+        text = _extract_pdf(path)
+    elif extension in TEXT_EXTENSIONS:
+        with open(path, "rb") as f:
+            text = _decode(f.read(max_chars * 4))
+    else:
+        raise ValueError(f"Неподдерживаемое расширение: {extension}")
+
+    text = _WHITESPACE_RE.sub(" ", text.replace("\x00", "")).strip()
+    return text[:max_chars]
@@ -0,0 +1,203 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import aclosing
+from typing import Optional
+from uuid import UUID
+
+from fastapi import FastAPI
+from loguru import logger
+from tortoise import Tortoise
+
+from app.database.models import ContractFile, ContractFileContent
+from app.extraction.extractors import SUPPORTED_EXTENSIONS, extract_text
+from app.s3.codec import IDENTITY
+from app.s3.s3_manager import AsyncS3Manager
+from metrics.extraction_metrics import (
+    extraction_backfill_remaining,
+    extraction_bytes_total,
+    extraction_dropped_total,
+    extraction_duration_seconds,
+    extraction_files_total,
+    extraction_queue_depth,
+)
+
+_BACKFILL_SQL = """
+    SELECT cf.id FROM contract_files cf
+    LEFT JOIN contract_file_contents c ON c.contract_file_id = cf.id
+    WHERE c.id IS NULL AND cf.id > $1
+    ORDER BY cf.id
+    LIMIT $2
+"""
+_BACKFILL_COUNT_SQL = """
+    SELECT count(*) AS total FROM contract_files cf
+    LEFT JOIN contract_file_contents c ON c.contract_file_id = cf.id
+    WHERE c.id IS NULL
+"""
+
+
+class ExtractionPipeline:
+    def __init__(
+        self,
+        process_workers: int = 2,
+        concurrency: int = 2,
+        queue_size: int = 1000,
+        max_file_size: int = 50 * 1024 * 1024,
+        max_chars: int = 500_000,
+        manager: Optional[AsyncS3Manager] = None,
+    ):
+        self.process_workers = process_workers
+        self.manager = manager
+        self.concurrency = concurrency
+        self.max_file_size = max_file_size
+        self.max_chars = max_chars
+        self._queue: asyncio.Queue[UUID] = asyncio.Queue(maxsize=queue_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._workers: list[asyncio.Task] = []
+
+    async def start(self):
+        # spawn: форк процесса с запущенным event loop и потоками небезопасен
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.process_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+        logger.info(f"📄 Пайплайн извлечения текста запущен ({self.concurrency})")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def join(self):
+        await self._queue.join()
+
+    def enqueue(self, contract_file_id: UUID) -> bool:
+        try:
+            self._queue.put_nowait(contract_file_id)
+        except asyncio.QueueFull:
+            # Файл подберёт backfill
+            extraction_dropped_total.inc()
+            logger.warning(
+                f"Очередь извлечения переполнена, {contract_file_id} пропущен"
+            )
+            return False
+        extraction_queue_depth.set(self._queue.qsize())
+        return True
+
+    async def backfill(self, batch_size: int = 500) -> int:
+        conn = Tortoise.get_connection("default")
+        remaining = (await conn.execute_query_dict(_BACKFILL_COUNT_SQL))[0]["total"]
+        extraction_backfill_remaining.set(remaining)
+        logger.info(f"Backfill: файлов без текста — {remaining}")
+
+        last_id = UUID(int=0)
+        queued = 0
+        while True:
+            rows = await conn.execute_query_dict(_BACKFILL_SQL, [last_id, batch_size])
+            if not rows:
+                break
+            for row in rows:
+                # put() блокируется на полной очереди — естественный backpressure
+                await self._queue.put(row["id"])
+                extraction_queue_depth.set(self._queue.qsize())
+                queued += 1
+                extraction_backfill_remaining.set(max(remaining - queued, 0))
+            last_id = rows[-1]["id"]
+        logger.info(f"Backfill: поставлено в очередь {queued} файлов")
+        return queued
+
+    async def _worker(self):
+        while True:
+            contract_file_id = await self._queue.get()
+            extraction_queue_depth.set(self._queue.qsize())
+            try:
+                await self._process(contract_file_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                extraction_files_total.labels(status="error").inc()
+                logger.error(f"Ошибка извлечения текста {contract_file_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, contract_file_id: UUID):
+        contract_file = await ContractFile.filter(id=contract_file_id).first()
+        if not contract_file:
+            return
+        extension = contract_file.extension.lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            await self._save(contract_file, "", "unsupported")
+            extraction_files_total.labels(status="unsupported").inc()
+            return
+
+        start = time.perf_counter()
+        fd, path = tempfile.mkstemp(suffix=f".{extension}")
+        try:
+            size = 0
+            manager = self.manager or AsyncS3Manager()
+            with os.fdopen(fd, "wb") as tmp:
+                if contract_file.codec == IDENTITY:
+                    size = await manager.download_to(
+                        contract_file.s3_key, tmp, limit=self.max_file_size
+                    )
+                else:
+                    stream = manager.stream_file(
+                        contract_file.s3_key, codec=contract_file.codec
+                    )
+                    async with aclosing(stream):
+                        async for chunk in stream:
+                            size += len(chunk)
+                            if size > self.max_file_size:
+                                break
+                            await asyncio.to_thread(tmp.write, chunk)
+            if size > self.max_file_size:
+                await self._save(contract_file, "", "too_large")
+                extraction_files_total.labels(status="too_large").inc()
+                return
+
+            loop = asyncio.get_running_loop()
+            try:
+                text = await loop.run_in_executor(
+                    self._executor, extract_text, path, extension, self.max_chars
+                )
+            except Exception as e:
+                await self._save(contract_file, "", "failed", str(e))
+                extraction_files_total.labels(status="failed").inc()
+                return
+        finally:
+            os.unlink(path)
+
+        await self._save(contract_file, text, "ok")
+        extraction_bytes_total.inc(size)
+        extraction_files_total.labels(status="ok").inc()
+        extraction_duration_seconds.observe(time.perf_counter() - start)
+
+    async def _save(
+        self,
+        contract_file: ContractFile,
+        text: str,
+        status: str,
+        error: Optional[str] = None,
+    ):
+        await ContractFileContent.update_or_create(
+            contract_file_id=contract_file.id,
+            defaults={"text": text, "status": status, "error": error},
+        )
+
+
+def enqueue_extraction(app: FastAPI, contract_file_id: UUID):
+    pipeline: Optional[ExtractionPipeline] = getattr(
+        app.state, "extraction_pipeline", None
+    )
+    if pipeline:
+        pipeline.enqueue(contract_file_id)
@@ -0,0 +1,271 @@
+"""
+Потребитель событий user.* из RabbitMQ.
+
+После массового импорта пользователей в сервисе авторизации в очередь
+приходят тысячи событий, и обработка по одному растягивается на минуты.
+Здесь сообщения забираются пачками (prefetch), раскладываются по шардам
+по пользователю — события одного пользователя обрабатываются строго по
+порядку, разных пользователей параллельно — и подряд идущие одинаковые
+события одного пользователя сливаются в одно.
+"""
+
+import asyncio
+import json
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+import aio_pika
+from aio_pika.abc import AbstractIncomingMessage, AbstractQueue
+from loguru import logger
+
+from metrics.event_metrics import (
+    user_event_batch_size,
+    user_event_handle_seconds,
+    user_event_lag_seconds,
+    user_events_in_flight,
+    user_events_queue_depth,
+    user_events_total,
+)
+
+# Поля с идентификатором пользователя — в порядке предпочтения
+USER_KEYS = ("user_id", "sub", "login", "email", "id")
+_NESTED_KEYS = ("user", "data", "payload")
+_DEPTH_INTERVAL = 10.0
+_RETRY_DELAY = 1.0
+_RETRY_MAX_DELAY = 30.0
+
+UserEventHandler = Callable[[dict], Awaitable[Any]]
+
+
+def user_key(payload: dict) -> Optional[str]:
+    """Ключ шардирования: идентификатор пользователя из события."""
+    for nested in _NESTED_KEYS:
+        if isinstance(payload.get(nested), dict):
+            key = user_key(payload[nested])
+            if key is not None:
+                return key
+    for name in USER_KEYS:
+        if payload.get(name) is not None:
+            return str(payload[name])
+    return None
+
+
+@dataclass(eq=False)
+class _Event:
+    key: str
+    routing_key: str
+    payload: dict
+    published: Optional[float]
+    messages: list = field(default_factory=list)
+
+
+class UserEventConsumer:
+    def __init__(
+        self,
+        url: str,
+        handler: UserEventHandler,
+        *,
+        queue_name: str = "contract-service",
+        routing_keys: Sequence[str] = ("user.*",),
+        exchange: str = "events",
+        prefetch: int = 100,
+        concurrency: int = 8,
+        batch_window_ms: float = 50,
+        batch_max: int = 100,
+    ):
+        self.url = url
+        self.handler = handler
+        self.queue_name = queue_name
+        self.routing_keys = tuple(routing_keys)
+        self.exchange = exchange
+        self.prefetch = prefetch
+        self.concurrency = max(concurrency, 1)
+        self.batch_window = batch_window_ms / 1000
+        self.batch_max = max(batch_max, 1)
+        self._buffer: asyncio.Queue = asyncio.Queue()
+        self._shards = [asyncio.Queue() for _ in range(self.concurrency)]
+        # Последнее ещё не начатое событие каждого пользователя — с ним
+        # сливаются повторы, пока шард занят предыдущими
+        self._pending: dict[str, _Event] = {}
+        self._in_flight = 0
+        self._depth_reported = 0.0
+
+    @classmethod
+    def from_settings(cls, settings, handler: UserEventHandler):
+        return cls(
+            settings.AUTH_BROKER_URL,
+            handler,
+            queue_name=settings.USER_EVENTS_QUEUE,
+            exchange=settings.USER_EVENTS_EXCHANGE,
+            prefetch=settings.USER_EVENTS_PREFETCH,
+            concurrency=settings.USER_EVENTS_CONCURRENCY,
+            batch_window_ms=settings.USER_EVENTS_BATCH_WINDOW_MS,
+            batch_max=settings.USER_EVENTS_BATCH_MAX,
+        )
+
+    async def run(self):
+        """Подключается и потребляет до отмены задачи."""
+        delay = _RETRY_DELAY
+        while True:
+            try:
+                # Робастное соединение само восстанавливается и заново
+                # подписывает потребителя после обрыва
+                connection = await aio_pika.connect_robust(self.url)
+                async with connection:
+                    channel = await connection.channel()
+                    await channel.set_qos(prefetch_count=self.prefetch)
+                    queue = await self._declare(channel)
+                    await queue.consume(self.submit)
+                    logger.info(
+                        f"🐇 Потребитель {self.queue_name}: prefetch {self.prefetch}, "
+                        f"{self.concurrency} шардов"
+                    )
+                    delay = _RETRY_DELAY
+                    await self.process(queue)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Ошибка объявления очереди (например, PRECONDITION_FAILED) не
+                # должна молча останавливать обработку событий user.*
+                logger.error(
+                    f"🐇 Потребитель {self.queue_name} не запущен: {e!r}, "
+                    f"повтор через {delay:.0f} с"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _RETRY_MAX_DELAY)
+
+    async def _declare(self, channel) -> AbstractQueue:
+        queue = await channel.declare_queue(self.queue_name, durable=True)
+        if self.exchange:
+            exchange = await channel.declare_exchange(
+                self.exchange, aio_pika.ExchangeType.TOPIC, durable=True
+            )
+            for routing_key in self.routing_keys:
+                await queue.bind(exchange, routing_key)
+        return queue
+
+    async def submit(self, message: AbstractIncomingMessage):
+        """Колбэк aio-pika: сообщение ждёт своей пачки в буфере."""
+        self._in_flight += 1
+        user_events_in_flight.inc()
+        self._buffer.put_nowait(message)
+
+    async def process(self, queue: Optional[AbstractQueue] = None):
+        """Собирает пачки из буфера и раздаёт события по шардам."""
+        workers = [asyncio.create_task(self._work(shard)) for shard in self._shards]
+        try:
+            while True:
+                batch = await self._next_batch()
+                user_event_batch_size.observe(len(batch))
+                for message in batch:
+                    await self._dispatch(message)
+                if queue is not None:
+                    await self._report_depth(queue)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Неподтверждённые сообщения брокер вернёт в очередь сам
+            user_events_in_flight.dec(self._in_flight)
+            self._in_flight = 0
+            self._buffer = asyncio.Queue()
+            self._shards = [asyncio.Queue() for _ in range(self.concurrency)]
+            self._pending.clear()
+
+    async def _next_batch(self) -> list:
+        batch = [await self._buffer.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.batch_max:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._buffer.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _dispatch(self, message: AbstractIncomingMessage):
+        routing_key = message.routing_key or "unknown"
+        try:
+            payload = json.loads(message.body)
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            logger.warning(f"🐇 Некорректное событие {routing_key} отброшено")
+            user_events_total.labels(event=routing_key, outcome="invalid").inc()
+            await self._settle(message, "reject")
+            return
+
+        key = user_key(payload) or f"~{id(message)}"
+        published = message.timestamp.timestamp() if message.timestamp else None
+        pending = self._pending.get(key)
+        if pending is not None and pending.routing_key == routing_key:
+            # Повтор того же события: обрабатываем только последнее состояние
+            pending.payload = payload
+            pending.messages.append(message)
+            user_events_total.labels(event=routing_key, outcome="coalesced").inc()
+            return
+
+        event = _Event(key, routing_key, payload, published, [message])
+        self._pending[key] = event
+        self._shards[zlib.crc32(key.encode()) % self.concurrency].put_nowait(event)
+
+    async def _work(self, shard: asyncio.Queue):
+        while True:
+            event = await shard.get()
+            if self._pending.get(event.key) is event:
+                del self._pending[event.key]
+            await self._handle(event)
+
+    async def _handle(self, event: _Event):
+        started = time.perf_counter()
+        try:
+            await self.handler(event.payload)
+        except Exception as e:
+            logger.warning(f"🐇 Ошибка обработки {event.routing_key}: {e!r}")
+            outcome = "failed"
+        else:
+            outcome = "processed"
+        user_event_handle_seconds.observe(time.perf_counter() - started)
+        user_events_total.labels(event=event.routing_key, outcome=outcome).inc()
+        if event.published is not None:
+            user_event_lag_seconds.observe(max(time.time() - event.published, 0))
+
+        for message in event.messages:
+            if outcome == "processed":
+                await self._settle(message, "ack")
+            elif message.redelivered:
+                # Уже повторяли — не крутим ядовитое сообщение бесконечно
+                await self._settle(message, "reject")
+            else:
+                await self._settle(message, "requeue")
+
+    async def _settle(self, message: AbstractIncomingMessage, action: str):
+        self._in_flight -= 1
+        user_events_in_flight.dec()
+        try:
+            if action == "ack":
+                await message.ack()
+            elif action == "requeue":
+                await message.nack(requeue=True)
+            else:
+                await message.reject(requeue=False)
+        except Exception as e:
+            # Канал мог закрыться: брокер сам вернёт сообщение в очередь
+            logger.warning(f"🐇 Не удалось подтвердить сообщение: {e!r}")
+
+    async def _report_depth(self, queue: AbstractQueue):
+        now = time.monotonic()
+        if now - self._depth_reported < _DEPTH_INTERVAL:
+            return
+        self._depth_reported = now
+        try:
+            declared = await queue.declare()
+        except Exception as e:
+            logger.warning(f"🐇 Не удалось узнать глубину очереди: {e!r}")
+            return
+        user_events_queue_depth.set(declared.message_count or 0)
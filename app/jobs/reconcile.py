@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import datetime
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+from tortoise import Tortoise
+
+from app.s3.s3_manager import AsyncS3Manager
+from metrics.reconcile_metrics import (
+    reconcile_dangling_rows,
+    reconcile_deleted_total,
+    reconcile_last_success,
+    reconcile_orphans,
+)
+
+# COLLATE "C" сортирует по байтам UTF-8 — так же, как S3 отдаёт ключи
+_KEYS_SQL = """
+    SELECT DISTINCT s3_key COLLATE "C" AS s3_key FROM contract_files
+    WHERE starts_with(s3_key, $1) AND s3_key COLLATE "C" > $2
+    ORDER BY 1
+    LIMIT $3
+"""
+_LOCK_KEY = "contract-service:reconcile-lock"
+# Блокировка продлевается, пока идёт сверка, и не может истечь посреди прогона
+_LOCK_TTL_SECONDS = 60
+_EXTEND_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class ReconcileLockLost(Exception):
+    pass
+
+
+@dataclass
+class ReconcileReport:
+    scanned_objects: int = 0
+    scanned_rows: int = 0
+    orphans: int = 0
+    deleted: int = 0
+    dangling: int = 0
+    dangling_sample: list[str] = field(default_factory=list)
+
+
+async def _iter_db_keys(prefix: str, batch_size: int) -> AsyncIterator[str]:
+    conn = Tortoise.get_connection("default")
+    last_key = ""
+    while True:
+        rows = await conn.execute_query_dict(_KEYS_SQL, [prefix, last_key, batch_size])
+        if not rows:
+            return
+        for row in rows:
+            yield row["s3_key"]
+        last_key = rows[-1]["s3_key"]
+
+
+async def _anext_or_none(iterator: AsyncIterator):
+    try:
+        return await anext(iterator)
+    except StopAsyncIteration:
+        return None
+
+
+async def reconcile(
+    manager: Optional[AsyncS3Manager] = None,
+    delete_orphans: bool = True,
+    grace_seconds: int = 3600,
+    batch_size: int = 1000,
+    sample_size: int = 100,
+) -> ReconcileReport:
+    """
+    Сверяет объекты S3 с contract_files.s3_key слиянием двух отсортированных
+    потоков. Память ограничена размером пачки удаления и выборки отчёта.
+    """
+    manager = manager or AsyncS3Manager()
+    prefix = f"{manager.bucket_folder}/"
+    # Файл сначала загружается в S3, потом пишется в БД — свежие объекты не трогаем
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+        seconds=grace_seconds
+    )
+    report = ReconcileReport()
+    orphan_batch: list[str] = []
+
+    async def _flush():
+        if not orphan_batch:
+            return
+        if delete_orphans:
+            deleted = await manager.delete_files(list(orphan_batch))
+            report.deleted += len(deleted)
+            reconcile_deleted_total.inc(len(deleted))
+        orphan_batch.clear()
+
+    objects = manager.iter_objects(prefix, page_size=batch_size)
+    db_keys = _iter_db_keys(prefix, batch_size)
+    obj = await _anext_or_none(objects)
+    db_key = await _anext_or_none(db_keys)
+
+    while obj is not None or db_key is not None:
+        if db_key is None or (obj is not None and obj.key < db_key):
+            report.scanned_objects += 1
+            if obj.last_modified < cutoff:
+                report.orphans += 1
+                orphan_batch.append(obj.key)
+                if len(orphan_batch) >= batch_size:
+                    await _flush()
+            obj = await _anext_or_none(objects)
+        elif obj is None or db_key < obj.key:
+            report.scanned_rows += 1
+            report.dangling += 1
+            if len(report.dangling_sample) < sample_size:
+                report.dangling_sample.append(db_key)
+            db_key = await _anext_or_none(db_keys)
+        else:
+            report.scanned_objects += 1
+            report.scanned_rows += 1
+            obj = await _anext_or_none(objects)
+            db_key = await _anext_or_none(db_keys)
+    await _flush()
+
+    reconcile_orphans.set(report.orphans)
+    reconcile_dangling_rows.set(report.dangling)
+    reconcile_last_success.set(time.time())
+    logger.info(
+        f"🧹 Сверка S3/БД: объектов {report.scanned_objects}, "
+        f"записей {report.scanned_rows}, сирот {report.orphans} "
+        f"(удалено {report.deleted}), висячих записей {report.dangling}"
+    )
+    if report.dangling_sample:
+        logger.warning(f"Записи без объекта в S3: {report.dangling_sample}")
+    return report
+
+
+async def _extend_lock(redis_client, token: str, ttl_seconds: float) -> bool:
+    extended = await redis_client.eval(
+        _EXTEND_LOCK_LUA, 1, _LOCK_KEY, token, int(ttl_seconds * 1000)
+    )
+    return bool(extended)
+
+
+async def _keep_lock(redis_client, token: str, ttl_seconds: float):
+    while True:
+        await asyncio.sleep(ttl_seconds / 3)
+        if not await _extend_lock(redis_client, token, ttl_seconds):
+            raise ReconcileLockLost("Блокировка сверки перехвачена другим воркером")
+
+
+async def run_locked(redis_client, token: str, ttl_seconds: float, coro):
+    """
+    Выполняет coro, продлевая блокировку. Если продлить не удалось (блокировка
+    истекла или Redis недоступен), прогон прерывается: удалять объекты
+    параллельно с другим воркером нельзя.
+    """
+    run = asyncio.ensure_future(coro)
+    keeper = asyncio.create_task(_keep_lock(redis_client, token, ttl_seconds))
+    try:
+        done, _ = await asyncio.wait({run, keeper}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        keeper.cancel()
+        if not run.done():
+            run.cancel()
+    if run in done:
+        return run.result()
+    await asyncio.gather(run, return_exceptions=True)
+    keeper.result()
+
+
+async def run_reconcile_schedule(
+    redis_client,
+    interval_seconds: int,
+    delete_orphans: bool = True,
+    grace_seconds: int = 3600,
+    manager: Optional[AsyncS3Manager] = None,
+):
+    # Запускается в каждом воркере, но сверку выполняет только взявший блокировку
+    while True:
+        await asyncio.sleep(interval_seconds * random.uniform(0.9, 1.1))
+        try:
+            token = uuid.uuid4().hex
+            acquired = await redis_client.set(
+                _LOCK_KEY, token, nx=True, ex=_LOCK_TTL_SECONDS
+            )
+            if not acquired:
+                continue
+            await run_locked(
+                redis_client,
+                token,
+                _LOCK_TTL_SECONDS,
+                reconcile(
+                    manager, delete_orphans=delete_orphans, grace_seconds=grace_seconds
+                ),
+            )
+            # Остальные воркеры проснутся в пределах джиттера — пропускают этот круг
+            await _extend_lock(
+                redis_client, token, max(interval_seconds // 2, _LOCK_TTL_SECONDS)
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка сверки S3/БД: {e}")
+
+
+async def _main(args):
+    from app.database.config import TORTOISE_ORM
+
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        report = await reconcile(
+            delete_orphans=not args.dry_run,
+            grace_seconds=args.grace_seconds,
+            batch_size=args.batch_size,
+        )
+    finally:
+        await Tortoise.close_connections()
+    print(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сверка объектов S3 и contract_files")
+    parser.add_argument("--dry-run", action="store_true", help="Ничего не удалять")
+    parser.add_argument("--grace-seconds", type=int, default=3600)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(_main(parser.parse_args()))
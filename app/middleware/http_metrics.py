@@ -0,0 +1,84 @@
+import time
+from typing import Sequence
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from metrics.http_metrics import HttpMetrics
+
+UNMATCHED_ROUTE = "__unmatched__"
+
+
+def _status_class(status: int) -> str:
+    return f"{status // 100}xx"
+
+
+class HttpMetricsMiddleware:
+    """
+    Гистограммы длительности и размеров запросов по шаблону маршрута.
+    Сырой путь в метки не попадает: у запроса без маршрута route=__unmatched__.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        metrics: HttpMetrics,
+        exclude_paths: Sequence[str] = ("/metrics", "/ready"),
+    ):
+        self.app = app
+        self.metrics = metrics
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        request_size = 0
+        response_size = 0
+        # Тело может остаться непрочитанным (например, при 401) — берём заявленный размер
+        declared_size = 0
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared_size = int(value)
+                except ValueError:
+                    pass
+                break
+
+        async def _receive() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def _send(message: Message):
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        inflight = self.metrics.inflight.labels(method=method)
+        inflight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, _receive, _send)
+        finally:
+            elapsed = time.perf_counter() - started
+            inflight.dec()
+            # Router кладёт сработавший маршрут в тот же scope
+            route = scope.get("route")
+            labels = {
+                "route": getattr(route, "path", UNMATCHED_ROUTE),
+                "method": method,
+                "status": _status_class(status),
+            }
+            self.metrics.duration.labels(**labels).observe(elapsed)
+            self.metrics.request_size.labels(**labels).observe(
+                max(request_size, declared_size)
+            )
+            self.metrics.response_size.labels(**labels).observe(response_size)
@@ -0,0 +1,300 @@
+"""
+Idempotency-Key для создающих запросов.
+
+Клиенты повторяют POST по таймауту, и без ключа повтор создаёт второй
+договор или второй раз грузит файл в S3. Первый запрос с ключом занимает
+запись в Redis, выполняется и сохраняет отпечаток тела и ответ. Повтор,
+пришедший во время выполнения, ждёт исходный запрос; повтор после
+завершения получает сохранённый ответ вместо вызова обработчика маршрута
+(его бросает зависимость прав уже после проверки токена и лимита запросов).
+Тот же ключ с другим телом — 422.
+
+Ключ занимается уже после проверки прав (after_context в зависимостях) и
+действует в пределах проверенной личности — пользователя из токена и его
+компании. Обновление токена между повторами ключ не меняет, чужой ответ по
+угаданному ключу не получить, а сохранённый ответ без действующего токена
+не отдаётся.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from metrics.idempotency_metrics import (
+    idempotency_requests_total,
+    idempotency_wait_seconds,
+)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+_KEY_PREFIX = "contract-service:idempotency"
+_VALID_KEY = re.compile(r"^[\x21-\x7e]{1,255}$")
+_BOUNDARY_RE = re.compile(rb"boundary=\"?([^\";]+)\"?")
+_IN_PROGRESS = "in_progress"
+_DONE = "done"
+
+
+class BodyFingerprint:
+    """
+    SHA-256 тела запроса. Граница multipart каждый клиент генерирует заново,
+    поэтому она вырезается из потока — иначе повтор той же загрузки
+    считался бы другим запросом.
+    """
+
+    def __init__(self, method: str, path: str, content_type: bytes = b""):
+        self._hash = hashlib.sha256(f"{method} {path}\n".encode())
+        match = _BOUNDARY_RE.search(content_type)
+        self._boundary = match.group(1) if match else b""
+        self._tail = b""
+
+    def update(self, chunk: bytes):
+        if not self._boundary:
+            self._hash.update(chunk)
+            return
+        data = (self._tail + chunk).replace(self._boundary, b"")
+        # Хвост может оказаться началом границы, разрезанной между кусками
+        cut = max(len(data) - len(self._boundary) + 1, 0)
+        self._hash.update(data[:cut])
+        self._tail = data[cut:]
+
+    def hexdigest(self) -> str:
+        self._hash.update(self._tail)
+        self._tail = b""
+        return self._hash.hexdigest()
+
+
+class IdempotentReplay(Exception):
+    """Запрос уже выполнен — отдаём сохранённый ответ."""
+
+    def __init__(self, record: dict):
+        self.record = record
+
+
+@dataclass(eq=False)
+class _Slot:
+    middleware: "IdempotencyMiddleware"
+    redis: Any
+    key: str
+    fingerprint: BodyFingerprint
+    body_read: bool = False
+    checked: bool = False
+    digest: Optional[str] = None
+    # Ключ в Redis, если его занял этот запрос
+    redis_key: Optional[str] = None
+
+
+_slot: ContextVar[Optional[_Slot]] = ContextVar("idempotency_slot", default=None)
+
+
+async def check_idempotency(context: dict):
+    """
+    Вызывается после проверки прав: занимает Idempotency-Key текущего запроса
+    или отдаёт результат исходного (IdempotentReplay, 409, 422).
+    """
+    slot = _slot.get()
+    if slot is None or slot.checked:
+        return
+    slot.checked = True
+    if not slot.body_read:
+        # Тело прочитано не полностью — отпечаток неполный, выполняем без ключа
+        idempotency_requests_total.labels(outcome="not_stored").inc()
+        return
+    await slot.middleware.claim(slot, context)
+
+
+async def replay_response(request: Request, exc: IdempotentReplay) -> Response:
+    record = exc.record
+    return Response(
+        content=base64.b64decode(record["body"]),
+        status_code=record["status"],
+        media_type=record.get("content_type"),
+        headers={REPLAYED_HEADER.decode(): "true"},
+    )
+
+
+class IdempotencyMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        container,
+        paths: Sequence[str] = ("/api/contracts/add", "/api/contract-files/add"),
+        ttl_seconds: int = 86400,
+        lock_seconds: int = 120,
+        wait_seconds: float = 30.0,
+        max_response_bytes: int = 64 * 1024,
+    ):
+        self.app = app
+        self.container = container
+        self.paths = frozenset(paths)
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.lock_ms = int(lock_seconds * 1000)
+        self.wait_seconds = wait_seconds
+        self.max_response_bytes = max_response_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        raw_key = headers.get(IDEMPOTENCY_HEADER)
+        redis = self.container.redis
+        if raw_key is None or redis is None:
+            await self.app(scope, receive, send)
+            return
+        key = raw_key.decode("latin-1")
+        if not _VALID_KEY.match(key):
+            await self._error(send, 400, "Некорректный Idempotency-Key")
+            return
+
+        slot = _Slot(
+            self,
+            redis,
+            key,
+            BodyFingerprint(
+                scope["method"], scope["path"], headers.get(b"content-type", b"")
+            ),
+        )
+        token = _slot.set(slot)
+        try:
+            await self._execute(scope, receive, send, slot)
+        finally:
+            _slot.reset(token)
+
+    async def claim(self, slot: _Slot, context: dict):
+        identity = f"{context.get('user_id')}:{context.get('company_id')}"
+        scope_hash = hashlib.sha256(identity.encode()).hexdigest()
+        redis_key = f"{_KEY_PREFIX}:{scope_hash[:32]}:{slot.key}"
+        slot.digest = slot.fingerprint.hexdigest()
+
+        try:
+            record = await self._claim_or_wait(slot.redis, redis_key)
+        except Exception as e:
+            # Без Redis выполняем как обычный запрос
+            logger.warning(f"Idempotency-Key не проверен, Redis недоступен: {e!r}")
+            idempotency_requests_total.labels(outcome="unavailable").inc()
+            return
+
+        if record is None:
+            slot.redis_key = redis_key
+            return
+        if record.get("state") == _IN_PROGRESS:
+            idempotency_requests_total.labels(outcome="conflict").inc()
+            raise HTTPException(
+                status_code=409, detail="Запрос с этим Idempotency-Key ещё выполняется"
+            )
+        if record.get("fingerprint") != slot.digest:
+            idempotency_requests_total.labels(outcome="mismatch").inc()
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key уже использован с другим телом запроса",
+            )
+        idempotency_requests_total.labels(outcome="replayed").inc()
+        raise IdempotentReplay(record)
+
+    async def _claim_or_wait(self, redis, redis_key: str) -> Optional[dict]:
+        """None — ключ занят этим запросом, иначе запись исходного запроса."""
+        started = time.perf_counter()
+        delay = 0.05
+        while True:
+            claim = json.dumps({"state": _IN_PROGRESS})
+            if await redis.set(redis_key, claim, nx=True, px=self.lock_ms):
+                return None
+            raw = await redis.get(redis_key)
+            if raw is None:
+                # Исходный запрос упал или истёк — пробуем занять снова
+                continue
+            record = json.loads(raw)
+            waited = time.perf_counter() - started
+            if record.get("state") == _DONE or waited >= self.wait_seconds:
+                idempotency_wait_seconds.observe(waited)
+                return record
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _execute(self, scope: Scope, receive: Receive, send: Send, slot: _Slot):
+        response = {"status": 500, "content_type": None, "body": bytearray()}
+
+        async def _receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request" and not slot.checked:
+                slot.fingerprint.update(message.get("body", b""))
+                slot.body_read = not message.get("more_body", False)
+            return message
+
+        async def _send(message: Message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type":
+                        response["content_type"] = value.decode("latin-1")
+            elif (
+                message["type"] == "http.response.body" and response["body"] is not None
+            ):
+                response["body"] += message.get("body", b"")
+                if len(response["body"]) > self.max_response_bytes:
+                    response["body"] = None
+            await send(message)
+
+        try:
+            await self.app(scope, _receive, _send)
+        except BaseException:
+            if slot.redis_key is not None:
+                await self._release(slot.redis, slot.redis_key)
+            raise
+
+        # Ключ не занят: повтор, отказ в доступе или маршрут без проверки прав
+        if slot.redis_key is None:
+            return
+        # 5xx и слишком большие ответы не сохраняем: повтор выполнится заново
+        if response["status"] >= 500 or response["body"] is None:
+            await self._release(slot.redis, slot.redis_key)
+            idempotency_requests_total.labels(outcome="not_stored").inc()
+            return
+        record = {
+            "state": _DONE,
+            "fingerprint": slot.digest,
+            "status": response["status"],
+            "content_type": response["content_type"],
+            "body": base64.b64encode(bytes(response["body"])).decode(),
+        }
+        try:
+            await slot.redis.set(slot.redis_key, json.dumps(record), px=self.ttl_ms)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить ответ по Idempotency-Key: {e!r}")
+        idempotency_requests_total.labels(outcome="executed").inc()
+
+    async def _release(self, redis, redis_key: str):
+        try:
+            await redis.delete(redis_key)
+        except Exception as e:
+            logger.warning(f"Не удалось освободить Idempotency-Key: {e!r}")
+
+    async def _error(self, send: Send, status: int, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,245 @@
+"""
+Лимит запросов компании: token bucket в Redis на пару (компания, класс
+эндпоинта — read, write или file).
+
+Ведро пополняется непрерывно со скоростью refill и вмещает не больше
+capacity токенов; запрос тратит один токен. Списание выполняется Lua-
+скриптом атомарно, поэтому лимит общий для всех воркеров. Компания,
+которой по последнему ответу Redis далеко до лимита, проходит локально,
+а накопленный расход списывается следующим обращением к Redis.
+
+Компания известна только после проверки прав, поэтому решение принимает
+зависимость контекста прав (enforce_rate_limit), а middleware лишь
+готовит состояние запроса и дописывает заголовки RateLimit-* в ответ.
+"""
+
+import math
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException
+from loguru import logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from metrics.rate_limit_metrics import (
+    rate_limit_decisions_total,
+    rate_limit_rejections_total,
+)
+
+READ, WRITE, FILE = "read", "write", "file"
+FILE_PREFIXES = ("/api/contract-files",)
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+_KEY_PREFIX = "contract-service:ratelimit"
+_MAX_LOCAL_BUCKETS = 10000
+_WARN_INTERVAL = 30.0
+
+# KEYS[1] — ведро; ARGV: ёмкость, пополнение в секунду, долг локально
+# пропущенных запросов, стоимость запроса. Время берётся у Redis, чтобы
+# часы воркеров не влияли на пополнение
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local debt = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - debt
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+local retry_after = 0
+if allowed == 0 then
+    retry_after = (cost - tokens) / rate
+end
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+def endpoint_class(method: str, path: str) -> str:
+    if path.startswith(FILE_PREFIXES):
+        return FILE
+    return READ if method in _READ_METHODS else WRITE
+
+
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    remaining: float
+    reset: float
+    retry_after: float = 0.0
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(max(int(self.remaining), 0)),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after), 1))
+        return headers
+
+
+@dataclass
+class _LocalBucket:
+    tokens: float
+    synced: float
+    debt: int = 0
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        capacity: dict[str, int],
+        refill_per_second: dict[str, float],
+        local_fraction: float = 0.5,
+        local_sync_seconds: float = 1.0,
+    ):
+        self.capacity = capacity
+        self.refill = refill_per_second
+        self.local_fraction = local_fraction
+        self.local_sync_seconds = local_sync_seconds
+        self.redis = None
+        self._script = None
+        self._local: dict[str, _LocalBucket] = {}
+        self._warned = 0.0
+
+    @classmethod
+    def from_settings(cls, settings) -> "RateLimiter":
+        return cls(
+            capacity=settings.RATE_LIMIT_CAPACITY,
+            refill_per_second=settings.RATE_LIMIT_REFILL_PER_SECOND,
+            local_fraction=settings.RATE_LIMIT_LOCAL_FRACTION,
+            local_sync_seconds=settings.RATE_LIMIT_LOCAL_SYNC_SECONDS,
+        )
+
+    def bind(self, redis):
+        self.redis = redis
+        self._script = redis.register_script(TOKEN_BUCKET_LUA)
+
+    async def acquire(self, company: str, klass: str) -> Optional[RateLimitDecision]:
+        capacity = self.capacity.get(klass)
+        rate = self.refill.get(klass)
+        if not capacity or not rate or self._script is None:
+            return None
+        key = f"{_KEY_PREFIX}:{klass}:{company}"
+        now = time.monotonic()
+
+        # Локальная оценка не учитывает пополнение и расход других воркеров,
+        # поэтому пропускаем без Redis только с большим запасом и недолго
+        local = self._local.get(key)
+        if local is not None and now - local.synced < self.local_sync_seconds:
+            estimate = local.tokens - local.debt - 1
+            if estimate >= capacity * self.local_fraction:
+                local.debt += 1
+                rate_limit_decisions_total.labels(source="local").inc()
+                return RateLimitDecision(
+                    True, capacity, estimate, (capacity - estimate) / rate
+                )
+
+        # Долг забираем до await: параллельный запрос того же ключа не должен
+        # отправить его в Redis второй раз
+        debt = 0
+        if local is not None:
+            debt, local.debt = local.debt, 0
+        try:
+            allowed, tokens, retry_after = await self._script(
+                keys=[key], args=[capacity, rate, debt, 1]
+            )
+        except Exception as e:
+            current = self._local.get(key)
+            if current is not None:
+                current.debt += debt
+            # Без Redis не блокируем: лимит — защита, а не условие работы
+            rate_limit_decisions_total.labels(source="fail_open").inc()
+            if now - self._warned > _WARN_INTERVAL:
+                self._warned = now
+                logger.warning(f"⏱️ Лимитер недоступен, запросы пропускаются: {e!r}")
+            return None
+
+        tokens = float(tokens)
+        # Долг, набранный локально за время ожидания, в этот ответ не вошёл
+        current = self._local.get(key)
+        pending = current.debt if current is not None else 0
+        if len(self._local) >= _MAX_LOCAL_BUCKETS:
+            self._local.clear()
+        self._local[key] = _LocalBucket(tokens, now, pending)
+        rate_limit_decisions_total.labels(source="redis").inc()
+        return RateLimitDecision(
+            bool(allowed),
+            capacity,
+            tokens,
+            (capacity - tokens) / rate,
+            float(retry_after),
+        )
+
+
+@dataclass
+class _RequestLimit:
+    limiter: RateLimiter
+    scope: Scope
+    decision: Optional[RateLimitDecision] = None
+
+
+_current: ContextVar[Optional[_RequestLimit]] = ContextVar(
+    "rate_limit_request", default=None
+)
+
+
+async def enforce_rate_limit(context) -> None:
+    """Списывает токен компании из контекста прав; при исчерпании — 429."""
+    state = _current.get()
+    if state is None or not isinstance(context, dict):
+        return
+    company = context.get("company_id")
+    subject = f"company:{company}" if company else f"user:{context.get('user_id')}"
+    klass = endpoint_class(state.scope["method"], state.scope["path"])
+    decision = await state.limiter.acquire(subject, klass)
+    if decision is None:
+        return
+    state.decision = decision
+    if not decision.allowed:
+        rate_limit_rejections_total.labels(
+            company_id=str(company or "none"), endpoint_class=klass
+        ).inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Превышен лимит запросов компании",
+            headers=decision.headers(),
+        )
+
+
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = _RequestLimit(self.limiter, scope)
+        token = _current.set(state)
+
+        async def _send(message: Message):
+            if message["type"] == "http.response.start" and state.decision:
+                headers = MutableHeaders(scope=message)
+                for name, value in state.decision.headers().items():
+                    headers[name] = value
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,66 @@
+import time
+from http.cookies import SimpleCookie
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database.router import end_routing, start_routing
+
+COOKIE_NAME = "rw_until"
+FORCE_PRIMARY_HEADER = b"x-read-your-writes"
+_MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class ReadRoutingMiddleware:
+    """
+    Контекст маршрутизации чтений и окно read-your-writes: после успешной
+    мутации клиент получает cookie, и пока оно живо, его чтения идут в
+    primary. Заголовок X-Read-Your-Writes: 1 делает то же для клиентов без cookie.
+    """
+
+    def __init__(self, app: ASGIApp, window_seconds: int = 5):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    def _sticky(self, scope: Scope) -> bool:
+        now = time.time()
+        for name, value in scope["headers"]:
+            if name == FORCE_PRIMARY_HEADER and value.strip() not in (b"", b"0"):
+                return True
+            if name == b"cookie":
+                morsel = SimpleCookie(value.decode("latin-1")).get(COOKIE_NAME)
+                if morsel is None:
+                    continue
+                try:
+                    if float(morsel.value) > now:
+                        return True
+                except ValueError:
+                    pass
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mutating = scope["method"] in _MUTATING_METHODS
+        token = start_routing(replica_allowed=not mutating and not self._sticky(scope))
+
+        async def _send(message: Message):
+            if (
+                mutating
+                and message["type"] == "http.response.start"
+                and message["status"] < 400
+            ):
+                until = time.time() + self.window_seconds
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{COOKIE_NAME}={until:.3f}; Max-Age={self.window_seconds}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            end_routing(token)
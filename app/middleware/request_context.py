@@ -0,0 +1,54 @@
+import re
+import uuid
+
+from loguru import logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.tracing import current_trace_id, set_span_attributes
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# Входящий идентификатор принимается, только если похож на id, а не на
+# произвольную строку: он попадает в логи и в заголовок ответа
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestContextMiddleware:
+    """
+    Присваивает запросу идентификатор (из X-Request-ID или новый), кладёт его
+    в контекст loguru на всё время обработки — включая фоновые задачи,
+    созданные из запроса, — и возвращает в заголовке ответа.
+    """
+
+    def __init__(self, app: ASGIApp, header: str = REQUEST_ID_HEADER):
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == self.header:
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    request_id = candidate
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+
+        scope.setdefault("state", {})["request_id"] = request_id
+        header = self.header.decode("latin-1")
+
+        async def _send(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[header] = request_id
+            await send(message)
+
+        # trace_id в логах связывает строку лога с трассой в Jaeger
+        set_span_attributes(**{"app.request_id": request_id})
+        with logger.contextualize(request_id=request_id, trace_id=current_trace_id()):
+            await self.app(scope, receive, _send)
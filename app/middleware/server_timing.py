@@ -0,0 +1,66 @@
+import time
+
+from loguru import logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.timing import end_request, start_request
+
+
+class ServerTimingMiddleware:
+    """
+    Отдаёт заголовок Server-Timing с разбивкой времени по категориям (auth,
+    cache, db, storage, render) и пишет структурированный лог медленных
+    запросов. Заголовок уходит вместе с началом ответа, поэтому время
+    потоковой выдачи тела в него не попадает — только в лог.
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_ms: int = 1000):
+        self.app = app
+        self.slow_request_seconds = slow_request_ms / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = start_request()
+        started = time.perf_counter()
+        status = 500
+        event_stream = False
+
+        async def _send(message: Message):
+            nonlocal status, event_stream
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = MutableHeaders(scope=message).get("content-type", "")
+                event_stream = content_type.startswith("text/event-stream")
+                parts = [
+                    f'{name};dur={seconds * 1000:.1f};desc="{count} calls"'
+                    for name, (seconds, count) in timings.categories.items()
+                ]
+                parts.append(f"total;dur={(time.perf_counter() - started) * 1000:.1f}")
+                MutableHeaders(scope=message).append("server-timing", ", ".join(parts))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            end_request(token)
+            elapsed = time.perf_counter() - started
+            # SSE-поток живёт долго по определению — это не медленный запрос
+            if elapsed >= self.slow_request_seconds and not event_stream:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                logger.bind(
+                    route=route,
+                    method=scope["method"],
+                    status=status,
+                    duration_ms=round(elapsed * 1000, 1),
+                    timings={
+                        name: round(seconds * 1000, 1)
+                        for name, (seconds, _) in timings.categories.items()
+                    },
+                ).warning(
+                    f"🐢 Медленный HTTP-запрос {scope['method']} {route}: "
+                    f"{elapsed * 1000:.0f} мс"
+                )
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Optional, Sequence
+
+from loguru import logger
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from metrics.upload_metrics import (
+    upload_admitted_total,
+    upload_inflight,
+    upload_inflight_bytes,
+    upload_queue_depth,
+    upload_rejected_total,
+    upload_wait_seconds,
+)
+
+
+class UploadRejected(Exception):
+    def __init__(self, reason: str):
+        self.reason = reason
+        super().__init__(reason)
+
+
+class UploadAdmissionController:
+    """Ограничивает число и суммарный объём загрузок в пределах одного воркера."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_inflight_bytes: int = 256 * 1024 * 1024,
+        max_waiters: int = 16,
+        wait_timeout: float = 2.0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_inflight_bytes = max_inflight_bytes
+        self.max_waiters = max_waiters
+        self.wait_timeout = wait_timeout
+        self.active = 0
+        self.inflight_bytes = 0
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+
+    def _fits(self, size: int) -> bool:
+        if self.active >= self.max_concurrent:
+            return False
+        # Файл больше лимита пропускаем только в одиночку
+        return self.inflight_bytes == 0 or (
+            self.inflight_bytes + size <= self.max_inflight_bytes
+        )
+
+    def _admit(self, size: int):
+        self.active += 1
+        self.inflight_bytes += size
+        upload_inflight.set(self.active)
+        upload_inflight_bytes.set(self.inflight_bytes)
+        upload_admitted_total.inc()
+
+    async def acquire(self, size: int):
+        if not self._waiters and self._fits(size):
+            self._admit(size)
+            return
+        if len(self._waiters) >= self.max_waiters:
+            upload_rejected_total.labels(reason="queue_full").inc()
+            raise UploadRejected("queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (size, future)
+        self._waiters.append(waiter)
+        upload_queue_depth.set(len(self._waiters))
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Допуск выдан в момент отмены — возвращаем его
+                self.release(size)
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            upload_rejected_total.labels(reason="timeout").inc()
+            raise UploadRejected("timeout")
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            upload_queue_depth.set(len(self._waiters))
+            upload_wait_seconds.observe(time.perf_counter() - start)
+
+    def release(self, size: int):
+        self.active -= 1
+        self.inflight_bytes -= size
+        upload_inflight.set(self.active)
+        upload_inflight_bytes.set(self.inflight_bytes)
+        self._wake()
+
+    def _wake(self):
+        # FIFO: первый ожидающий блокирует остальных, чтобы не голодал
+        while self._waiters:
+            size, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if not self._fits(size):
+                break
+            self._waiters.popleft()
+            self._admit(size)
+            future.set_result(None)
+        upload_queue_depth.set(len(self._waiters))
+
+
+class UploadAdmissionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: UploadAdmissionController,
+        path_prefixes: Sequence[str] = ("/api/contract-files",),
+        methods: Sequence[str] = ("POST", "PATCH", "PUT"),
+        retry_after: int = 5,
+        unknown_size: Optional[int] = None,
+    ):
+        self.app = app
+        self.controller = controller
+        self.path_prefixes = tuple(path_prefixes)
+        self.methods = set(methods)
+        self.retry_after = retry_after
+        self.unknown_size = unknown_size or (
+            controller.max_inflight_bytes // max(controller.max_concurrent, 1)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in self.methods
+            or not scope["path"].startswith(self.path_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        size = self.unknown_size
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    size = int(value)
+                except ValueError:
+                    pass
+                break
+
+        try:
+            await self.controller.acquire(size)
+        except UploadRejected as e:
+            logger.warning(f"Загрузка отклонена ({e.reason}): {scope['path']}")
+            await self._reject(send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(size)
+
+    async def _reject(self, send: Send):
+        body = json.dumps(
+            {"detail": "Сервер перегружен загрузками, повторите позже"}
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -67,6 +67,19 @@ class ContractFileListResponseSchema(CleanableBaseModel):
     contract_files: List[ContractFileSchema]
 
 
+class ContractFileSearchResultSchema(CleanableBaseModel):
+    contract_file_id: UUID
+    contract_file_name: str
+    contract_id: UUID
+    snippet: str
+    rank: float
+
+
+class ContractFileSearchResponseSchema(CleanableBaseModel):
+    total: int
+    results: List[ContractFileSearchResultSchema]
+
+
 def contract_file_filter_params(
     contract_file_name: Optional[str] = Query(
         None, description="Фильтр по названию промпта"
@@ -83,3 +96,25 @@ def contract_file_filter_params(
         "page": page,
         "page_size": page_size,
     }
+
+
+def contract_file_archive_params(
+    contract_id: Optional[List[UUID]] = Query(
+        None, description="ID контрактов (можно передать несколько)"
+    ),
+    contract_name: Optional[str] = Query(None, description="Фильтр по названию"),
+    date: Optional[datetime.date] = Query(None, description="Фильтр по дате"),
+):
+    return {
+        "contract_id": contract_id,
+        "contract_name": contract_name,
+        "date": date,
+    }
+
+
+def contract_file_search_params(
+    q: str = Query(..., min_length=2, max_length=200, description="Поисковый запрос"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+):
+    return {"q": q, "page": page, "page_size": page_size}
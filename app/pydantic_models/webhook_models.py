@@ -0,0 +1,93 @@
+import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import Field, field_validator
+from tiacore_lib.pydantic_models.clean_model import CleanableBaseModel
+
+from app.utils.change_events import CHANGE_EVENTS
+from app.webhooks.targets import check_webhook_url
+
+
+def _check_events(events: Optional[List[str]]) -> Optional[List[str]]:
+    if events is None:
+        return events
+    unknown = sorted(set(events) - set(CHANGE_EVENTS))
+    if unknown:
+        raise ValueError(f"Неизвестные события: {', '.join(unknown)}")
+    return sorted(set(events))
+
+
+class WebhookCreateSchema(CleanableBaseModel):
+    url: str = Field(..., max_length=2048)
+    events: List[str] = Field(default_factory=list)
+    company_id: UUID = Field(...)
+
+    @field_validator("url")
+    @classmethod
+    def validate_url(cls, url):
+        return url if url is None else check_webhook_url(url)
+
+    @field_validator("events")
+    @classmethod
+    def validate_events(cls, events):
+        return _check_events(events)
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+
+class WebhookEditSchema(CleanableBaseModel):
+    url: Optional[str] = Field(None, max_length=2048)
+    events: Optional[List[str]] = Field(None)
+    is_active: Optional[bool] = Field(None)
+    company_id: Optional[UUID] = Field(None)
+
+    @field_validator("url")
+    @classmethod
+    def validate_url(cls, url):
+        return url if url is None else check_webhook_url(url)
+
+    @field_validator("events")
+    @classmethod
+    def validate_events(cls, events):
+        return _check_events(events)
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+
+class WebhookSchema(CleanableBaseModel):
+    id: UUID = Field(..., alias="webhook_id")
+    url: str = Field(...)
+    events: List[str] = Field(...)
+    company_id: UUID = Field(...)
+    is_active: bool = Field(...)
+    failure_count: int = Field(...)
+    disabled_until: Optional[datetime.datetime] = Field(None)
+    last_error: Optional[str] = Field(None)
+    created_at: datetime.datetime = Field(...)
+    created_by: UUID = Field(...)
+    modified_at: datetime.datetime = Field(...)
+    modified_by: UUID = Field(...)
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+
+class WebhookResponseSchema(CleanableBaseModel):
+    webhook_id: UUID
+
+
+class WebhookCreateResponseSchema(CleanableBaseModel):
+    webhook_id: UUID
+    # Показывается один раз: им подписаны все запросы на этот адрес
+    secret: str
+
+
+class WebhookListResponseSchema(CleanableBaseModel):
+    total: int
+    webhooks: List[WebhookSchema]
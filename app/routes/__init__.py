@@ -5,9 +5,12 @@ from tiacore_lib.routes.invite_route import invite_router
 from tiacore_lib.routes.register_route import register_router
 from tiacore_lib.routes.user_route import user_router
 
+from .change_stream_route import change_stream_router
+from .contract_file_route import contract_file_router
 from .contract_route import contract_router
 from .contract_type_route import contract_type_router
 from .monitoring_route import monitoring_router
+from .webhook_route import webhook_router
 
 
 def register_routes(app: FastAPI):
@@ -21,3 +24,8 @@ def register_routes(app: FastAPI):
         contract_type_router, prefix="/api/contract-types", tags=["ContractTypes"]
     )
     app.include_router(contract_router, prefix="/api/contracts", tags=["Contracts"])
+    app.include_router(
+        contract_file_router, prefix="/api/contract-files", tags=["ContractFiles"]
+    )
+    app.include_router(webhook_router, prefix="/api/webhooks", tags=["Webhooks"])
+    app.include_router(change_stream_router, prefix="/api/changes", tags=["Changes"])
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.dependencies.permissions import require_permission_in_context
+from app.utils.change_feed import change_feed
+
+change_stream_router = APIRouter()
+
+
+@change_stream_router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    summary="Лента изменений договоров и файлов (Server-Sent Events)",
+)
+async def stream_changes(
+    last_event_id: Optional[str] = Header(None),
+    context: dict = Depends(require_permission_in_context("get_all_contracts")),
+):
+    if change_feed.redis is None:
+        raise HTTPException(status_code=503, detail="Лента изменений недоступна")
+    if change_feed.full:
+        raise HTTPException(
+            status_code=503,
+            detail="Слишком много подключений к ленте изменений",
+            headers={"Retry-After": "5"},
+        )
+    # Суперадмин без компании получает изменения всех компаний
+    company = None if context["is_superadmin"] else str(context["company_id"])
+    return StreamingResponse(
+        change_feed.stream(company, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,24 +1,78 @@
+import mimetypes
+from urllib.parse import quote
 from uuid import UUID
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Path, UploadFile, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Path,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from loguru import logger
-from tiacore_lib.handlers.dependency_handler import require_permission_in_context
+from tiacore_lib.config import get_settings
 from tiacore_lib.utils.validate_helpers import validate_company_access, validate_exists
 from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
 
 from app.database.models import Contract, ContractFile
+from app.database.router import read_connection
+from app.dependencies.container import get_s3_manager
+from app.dependencies.database import use_read_replica
+from app.dependencies.permissions import require_permission_in_context
+from app.extraction.pipeline import enqueue_extraction
 from app.pydantic_models.contract_file_models import (
     ContractFileCreateSchema,
     ContractFileEditSchema,
     ContractFileListResponseSchema,
     ContractFileResponseSchema,
     ContractFileSchema,
+    ContractFileSearchResponseSchema,
+    ContractFileSearchResultSchema,
+    contract_file_archive_params,
     contract_file_filter_params,
+    contract_file_search_params,
 )
+from app.s3.codec import IDENTITY
 from app.s3.s3_manager import AsyncS3Manager
+from app.utils.change_events import (
+    CONTRACT_FILE_CREATED,
+    CONTRACT_FILE_DELETED,
+    CONTRACT_FILE_UPDATED,
+    publish_change,
+    record_change,
+)
+from app.utils.zip_stream import ZipEntry, stream_zip
 
 contract_file_router = APIRouter()
 
+# Выражение должно совпадать с GIN-индексом idx_contract_file_contents_tsv
+_SEARCH_SQL = """
+    SELECT cf.id, cf.name, cf.contract_id,
+        ts_rank(to_tsvector('russian', c.text), q) AS rank,
+        ts_headline('russian', c.text, q, 'MaxFragments=1, MaxWords=30, MinWords=10')
+            AS snippet
+    FROM contract_file_contents c
+    JOIN contract_files cf ON cf.id = c.contract_file_id
+    JOIN contracts ct ON ct.id = cf.contract_id,
+    plainto_tsquery('russian', $1) q
+    WHERE to_tsvector('russian', c.text) @@ q
+        AND ($2::uuid IS NULL OR ct.company_id = $2::uuid)
+    ORDER BY rank DESC, cf.id
+    LIMIT $3 OFFSET $4
+"""
+_SEARCH_COUNT_SQL = """
+    SELECT count(*) AS total
+    FROM contract_file_contents c
+    JOIN contract_files cf ON cf.id = c.contract_file_id
+    JOIN contracts ct ON ct.id = cf.contract_id
+    WHERE to_tsvector('russian', c.text) @@ plainto_tsquery('russian', $1)
+        AND ($2::uuid IS NULL OR ct.company_id = $2::uuid)
+"""
+
 
 @contract_file_router.post(
     "/add",
@@ -27,19 +81,17 @@ contract_file_router = APIRouter()
     status_code=status.HTTP_201_CREATED,
 )
 async def add_contract_file(
-    data: ContractFileCreateSchema = Body(...),
+    request: Request,
+    data: ContractFileCreateSchema = Depends(ContractFileCreateSchema.as_form),
     context=Depends(require_permission_in_context("add_contract_file")),
+    manager: AsyncS3Manager = Depends(get_s3_manager),
 ):
-    file_bytes = await data.file.read()
-    if not file_bytes:
+    if not data.file.size:
         raise HTTPException(status_code=400, detail="Не удалось загрузить данные файла")
-    logger.info(
-        f"""Тип загружаемых данных: {type(file_bytes)}, 
-            размер: {len(file_bytes)} байт"""
-    )
+    logger.info(f"Размер загружаемого файла: {data.file.size} байт")
     await validate_exists(Contract, data.contract_id, "Контракт")
+    contract = await Contract.get(id=data.contract_id)
     if not context["is_superadmin"]:
-        contract = await Contract.get(id=data.contract_id)
         if str(contract.company_id) != str(context["company_id"]):
             raise HTTPException(
                 status_code=403, detail="Вы не может добавлять файлы не в свою компанию"
@@ -51,23 +103,40 @@ async def add_contract_file(
     else:
         name, extension = filename, ""
 
-    manager = AsyncS3Manager()
     contract_id = data.contract_id
-    s3_key = await manager.upload_bytes(file_bytes, str(contract_id), filename)
-    contract_file = await ContractFile.create(
-        contract_id=contract_id,
-        s3_key=s3_key,
-        name=name,
-        extension=extension,
-        created_by=context["user_id"],
-        modified_by=context["user_id"],
+    stored = await manager.store_fileobj(
+        data.file.file,
+        str(contract_id),
+        filename,
+        size=data.file.size,
+        content_type=data.file.content_type,
     )
-    if not contract_file:
-        logger.error("Не удалось создать файла контракта")
-        raise HTTPException(
-            status_code=500, detail="Не удалось создать файла контракта"
+    async with in_transaction() as conn:
+        contract_file = await ContractFile.create(
+            contract_id=contract_id,
+            s3_key=stored.key,
+            codec=stored.codec,
+            original_size=stored.original_size,
+            name=name,
+            extension=extension,
+            created_by=context["user_id"],
+            modified_by=context["user_id"],
+            using_db=conn,
+        )
+        if not contract_file:
+            logger.error("Не удалось создать файла контракта")
+            raise HTTPException(
+                status_code=500, detail="Не удалось создать файла контракта"
+            )
+        change = await record_change(
+            conn,
+            CONTRACT_FILE_CREATED,
+            contract.company_id,
+            {"contract_file_id": contract_file.id, "contract_id": contract_id},
         )
 
+    enqueue_extraction(request.app, contract_file.id)
+    await publish_change(change)
     logger.success(
         f"файла контракта {contract_file.name} ({contract_file.id}) успешно создан"
     )
@@ -80,11 +149,13 @@ async def add_contract_file(
     status_code=status.HTTP_204_NO_CONTENT,
 )
 async def edit_contract_file(
+    request: Request,
     contract_file_id: UUID = Path(
         ..., title="ID файла контракта", description="ID изменяемого файла контракта"
     ),
-    data: ContractFileEditSchema = Body(...),
+    data: ContractFileEditSchema = Depends(ContractFileEditSchema.as_form),
     context=Depends(require_permission_in_context("edit_contract_file")),
+    manager: AsyncS3Manager = Depends(get_s3_manager),
 ):
     logger.info(f"Обновление файла контракта {contract_file_id}")
 
@@ -106,9 +177,7 @@ async def edit_contract_file(
     else:
         contract_id = contract_file.contract.id
     if data.file:
-        manager = AsyncS3Manager()
-        file_bytes = await data.file.read()
-        if not file_bytes:
+        if not data.file.size:
             raise HTTPException(status_code=400, detail="Не удалось загрузить файл")
 
         filename = data.file.filename or "Unknown"
@@ -119,13 +188,31 @@ async def edit_contract_file(
         contract_id_str = str(contract_id)
 
         await manager.delete_file(contract_file.s3_key)
-        new_s3_key = await manager.upload_bytes(file_bytes, contract_id_str, filename)
-        update_data["s3_key"] = new_s3_key
+        stored = await manager.store_fileobj(
+            data.file.file,
+            contract_id_str,
+            filename,
+            size=data.file.size,
+            content_type=data.file.content_type,
+        )
+        update_data["s3_key"] = stored.key
+        update_data["codec"] = stored.codec
+        update_data["original_size"] = stored.original_size
         update_data["name"] = name
         update_data["extension"] = extension
     contract_file.modified_by = context["user_id"]
     await contract_file.update_from_dict(update_data)
-    await contract_file.save()
+    async with in_transaction() as conn:
+        await contract_file.save(using_db=conn)
+        change = await record_change(
+            conn,
+            CONTRACT_FILE_UPDATED,
+            contract_file.contract.company_id,
+            {"contract_file_id": contract_file.id, "contract_id": contract_id},
+        )
+    if data.file:
+        enqueue_extraction(request.app, contract_file.id)
+    await publish_change(change)
     return ContractFileResponseSchema(contract_file_id=contract_file.id)
 
 
@@ -139,6 +226,7 @@ async def delete_contract_file(
         ..., title="ID файла контракта", description="ID удаляемого файла контракта"
     ),
     context=Depends(require_permission_in_context("delete_contract_file")),
+    manager: AsyncS3Manager = Depends(get_s3_manager),
 ):
     contract_file = (
         await ContractFile.filter(id=contract_file_id)
@@ -149,13 +237,24 @@ async def delete_contract_file(
         logger.warning(f"файла контракта {contract_file_id} не найден")
         raise HTTPException(status_code=404, detail="файла контракта не найден")
     validate_company_access(contract_file.contract, context, "файлом контракта")
-    manager = AsyncS3Manager()
     await manager.delete_file(contract_file.s3_key)
-    await contract_file.delete()
+    async with in_transaction() as conn:
+        await contract_file.delete(using_db=conn)
+        change = await record_change(
+            conn,
+            CONTRACT_FILE_DELETED,
+            contract_file.contract.company_id,
+            {
+                "contract_file_id": contract_file_id,
+                "contract_id": contract_file.contract.id,
+            },
+        )
+    await publish_change(change)
 
 
 @contract_file_router.get(
     "/all",
+    dependencies=[Depends(use_read_replica)],
     response_model=ContractFileListResponseSchema,
     summary="Получение списка файла контрактаов с фильтрацией",
 )
@@ -206,23 +305,218 @@ async def get_contract_files(
 
 
 @contract_file_router.get(
-    "/{contract_file_id}/download", summary="Скачивание файла контракта"
+    "/search",
+    dependencies=[Depends(use_read_replica)],
+    response_model=ContractFileSearchResponseSchema,
+    summary="Полнотекстовый поиск по содержимому файлов контрактов",
+)
+async def search_contract_files(
+    filters: dict = Depends(contract_file_search_params),
+    context=Depends(require_permission_in_context("get_all_contract_files")),
+):
+    company_id = None if context["is_superadmin"] else str(context["company_id"])
+    page = filters["page"]
+    page_size = filters["page_size"]
+    conn = read_connection()
+
+    total = (
+        await conn.execute_query_dict(_SEARCH_COUNT_SQL, [filters["q"], company_id])
+    )[0]["total"]
+    rows = await conn.execute_query_dict(
+        _SEARCH_SQL,
+        [filters["q"], company_id, page_size, (page - 1) * page_size],
+    )
+
+    return ContractFileSearchResponseSchema(
+        total=total,
+        results=[
+            ContractFileSearchResultSchema(
+                contract_file_id=row["id"],
+                contract_file_name=row["name"],
+                contract_id=row["contract_id"],
+                snippet=row["snippet"],
+                rank=row["rank"],
+            )
+            for row in rows
+        ],
+    )
+
+
+@contract_file_router.get(
+    "/archive",
+    dependencies=[Depends(use_read_replica)],
+    summary="Скачивание ZIP-архива файлов контрактов",
+    response_class=StreamingResponse,
+)
+async def download_contract_files_archive(
+    filters: dict = Depends(contract_file_archive_params),
+    settings=Depends(get_settings),
+    context=Depends(require_permission_in_context("download_contract_file")),
+    manager: AsyncS3Manager = Depends(get_s3_manager),
+):
+    if not any(filters.values()):
+        raise HTTPException(
+            status_code=400, detail="Укажите контракт или фильтр для архива"
+        )
+    query = Q()
+    if not context["is_superadmin"]:
+        query &= Q(contract__company_id=context["company_id"])
+    if filters.get("contract_id"):
+        query &= Q(contract_id__in=filters["contract_id"])
+    if filters.get("contract_name"):
+        query &= Q(contract__name__icontains=filters["contract_name"])
+    if filters.get("date"):
+        query &= Q(contract__date=filters["date"])
+
+    rows = (
+        await ContractFile.filter(query)
+        .order_by("contract_id", "created_at")
+        .values(
+            "name",
+            "extension",
+            "s3_key",
+            "codec",
+            "modified_at",
+            "contract_id",
+            contract_number="contract__number",
+        )
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Файлы контрактов не найдены")
+
+    single_contract = len({row["contract_id"] for row in rows}) == 1
+    used_names: set[str] = set()
+    entries = []
+    for row in rows:
+        filename = _safe_name(
+            f"{row['name']}.{row['extension']}" if row["extension"] else row["name"]
+        )
+        if not single_contract:
+            folder = _safe_name(
+                f"{row['contract_number']}_{str(row['contract_id'])[:8]}"
+            )
+            filename = f"{folder}/{filename}"
+        arcname = _unique_arcname(filename, used_names)
+        entries.append(
+            ZipEntry(
+                arcname=arcname,
+                key=row["s3_key"],
+                extension=row["extension"],
+                codec=row["codec"],
+                modified_at=row["modified_at"],
+            )
+        )
+
+    archive_name = (
+        _safe_name(f"contract_{rows[0]['contract_number']}.zip")
+        if single_contract
+        else "contract_files.zip"
+    )
+    logger.info(f"Формирование архива {archive_name}: {len(entries)} файлов")
+
+    chunk_size = settings.ZIP_CHUNK_SIZE
+    return StreamingResponse(
+        stream_zip(
+            entries,
+            lambda entry: manager.stream_file(
+                entry.key, chunk_size=chunk_size, codec=entry.codec
+            ),
+            concurrency=settings.ZIP_FETCH_CONCURRENCY,
+        ),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(archive_name)}"
+        },
+    )
+
+
+def _safe_name(name: str) -> str:
+    return name.replace("/", "_").replace("\\", "_")
+
+
+def _unique_arcname(arcname: str, used_names: set[str]) -> str:
+    candidate = arcname
+    counter = 1
+    while candidate in used_names:
+        counter += 1
+        stem, dot, extension = arcname.rpartition(".")
+        candidate = (
+            f"{stem} ({counter}).{extension}" if dot else f"{arcname} ({counter})"
+        )
+    used_names.add(candidate)
+    return candidate
+
+
+@contract_file_router.get(
+    "/{contract_file_id}/download",
+    summary="Скачивание файла контракта",
+    dependencies=[Depends(use_read_replica)],
 )
 async def download_contract_file(
+    request: Request,
     contract_file_id: UUID,
     context=Depends(require_permission_in_context("download_contract_file")),
+    manager: AsyncS3Manager = Depends(get_s3_manager),
 ):
-    contract_file = await ContractFile.filter(id=contract_file_id).first()
+    contract_file = (
+        await ContractFile.filter(id=contract_file_id)
+        .prefetch_related("contract")
+        .first()
+    )
     if not contract_file:
         raise HTTPException(status_code=404, detail="Файл контракта не найден")
     validate_company_access(contract_file.contract, context, "файлом контракта")
-    manager = AsyncS3Manager()
+    proxy_url = f"{request.url.path.rsplit('/', 1)[0]}/content"
+    if contract_file.codec != IDENTITY:
+        # Сжатый объект по прямой ссылке отдать нельзя — только через прокси
+        return {"url": proxy_url}
     url = await manager.generate_presigned_url(contract_file.s3_key)
-    return {"url": url}
+    return {"url": url or proxy_url}
+
+
+@contract_file_router.get(
+    "/{contract_file_id}/content",
+    dependencies=[Depends(use_read_replica)],
+    summary="Потоковая выдача содержимого файла контракта",
+    response_class=StreamingResponse,
+)
+async def get_contract_file_content(
+    contract_file_id: UUID,
+    settings=Depends(get_settings),
+    context=Depends(require_permission_in_context("download_contract_file")),
+    manager: AsyncS3Manager = Depends(get_s3_manager),
+):
+    contract_file = (
+        await ContractFile.filter(id=contract_file_id)
+        .prefetch_related("contract")
+        .first()
+    )
+    if not contract_file:
+        raise HTTPException(status_code=404, detail="Файл контракта не найден")
+    validate_company_access(contract_file.contract, context, "файлом контракта")
+
+    filename = (
+        f"{contract_file.name}.{contract_file.extension}"
+        if contract_file.extension
+        else contract_file.name
+    )
+    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"}
+    if contract_file.original_size is not None:
+        headers["Content-Length"] = str(contract_file.original_size)
+    return StreamingResponse(
+        manager.stream_file(
+            contract_file.s3_key,
+            chunk_size=settings.ZIP_CHUNK_SIZE,
+            codec=contract_file.codec,
+        ),
+        media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        headers=headers,
+    )
 
 
 @contract_file_router.get(
     "/{contract_file_id}",
+    dependencies=[Depends(use_read_replica)],
     response_model=ContractFileSchema,
     summary="Просмотр файла контракта",
 )
@@ -256,5 +550,5 @@ async def get_contract_file(
         modified_by=contract_file.modified_by,
     )
 
-    logger.success(f"файла контракта найдена: {contract_file_schema}")
+    logger.debug(f"файл контракта {contract_file_id} найден")
     return contract_file_schema
@@ -2,17 +2,19 @@ import datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from tiacore_lib.handlers.dependency_handler import require_permission_in_context
-from tiacore_lib.handlers.permissions_handler import (
-    with_permission_and_company_from_body_check,
-)
 from tiacore_lib.utils.validate_helpers import validate_company_access, validate_exists
 from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
 
 from app.database.models import (
     Contract,
     ContractType,
 )
+from app.dependencies.database import use_read_replica
+from app.dependencies.permissions import (
+    require_permission_in_context,
+    with_permission_and_company_from_body_check,
+)
 from app.pydantic_models.contract_models import (
     Contract_filter_params,
     ContractCreateSchema,
@@ -21,6 +23,13 @@ from app.pydantic_models.contract_models import (
     ContractResponseSchema,
     ContractSchema,
 )
+from app.utils.change_events import (
+    CONTRACT_CREATED,
+    CONTRACT_DELETED,
+    CONTRACT_UPDATED,
+    publish_change,
+    record_change,
+)
 
 contract_router = APIRouter()
 
@@ -37,11 +46,17 @@ async def add_contract(
 ):
     await validate_exists(ContractType, data.contract_type_id, "Тип Контракта")
 
-    contract = await Contract.create(
-        created_by=context["user_id"],
-        modified_by=context["user_id"],
-        **data.model_dump(),
-    )
+    async with in_transaction() as conn:
+        contract = await Contract.create(
+            created_by=context["user_id"],
+            modified_by=context["user_id"],
+            using_db=conn,
+            **data.model_dump(),
+        )
+        change = await record_change(
+            conn, CONTRACT_CREATED, contract.company_id, {"contract_id": contract.id}
+        )
+    await publish_change(change)
     return ContractResponseSchema(contract_id=contract.id)
 
 
@@ -65,7 +80,12 @@ async def update_contract(
         await validate_exists(ContractType, data.contract_type_id, "Тип Контракта")
     contract.modified_by = context["user_id"]
     await contract.update_from_dict(update_data)
-    await contract.save()
+    async with in_transaction() as conn:
+        await contract.save(using_db=conn)
+        change = await record_change(
+            conn, CONTRACT_UPDATED, contract.company_id, {"contract_id": contract.id}
+        )
+    await publish_change(change)
 
     return ContractResponseSchema(contract_id=contract.id)
 
@@ -83,12 +103,18 @@ async def delete_contract(
     if not contract:
         raise HTTPException(status_code=404, detail="контракт не найден")
     validate_company_access(contract, context, "контрактом")
-    await contract.delete()
+    async with in_transaction() as conn:
+        await contract.delete(using_db=conn)
+        change = await record_change(
+            conn, CONTRACT_DELETED, contract.company_id, {"contract_id": contract_id}
+        )
+    await publish_change(change)
     return
 
 
 @contract_router.get(
     "/all",
+    dependencies=[Depends(use_read_replica)],
     response_model=ContractListResponseSchema,
     summary="Получение списка контрактов",
 )
@@ -158,6 +184,7 @@ async def get_contracts(
 
 @contract_router.get(
     "/{contract_id}",
+    dependencies=[Depends(use_read_replica)],
     response_model=ContractSchema,
     summary="Просмотр одного юридического лица",
 )
@@ -4,6 +4,7 @@ from tiacore_lib.handlers.auth_handler import get_current_user
 from tortoise.expressions import Q
 
 from app.database.models import ContractType
+from app.dependencies.database import use_read_replica
 from app.pydantic_models.contract_type_models import (
     ContractTypeListResponse,
     ContractTypeSchema,
@@ -15,6 +16,7 @@ contract_type_router = APIRouter()
 
 @contract_type_router.get(
     "/all",
+    dependencies=[Depends(use_read_replica)],
     response_model=ContractTypeListResponse,
     summary="Получение списка типов юр. лиц с фильтрацией",
 )
@@ -22,7 +24,7 @@ async def get_contract_types(
     filters: FilterParams = Depends(),
     _: str = Depends(get_current_user),
 ):
-    logger.info(f"Запрос на список типов юр. лиц: {filters}")
+    logger.debug("Запрос на список типов юр. лиц: {}", filters)
 
     query = Q()
 
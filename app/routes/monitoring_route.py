@@ -1,9 +1,36 @@
-from fastapi import APIRouter, Response
-from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import os
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
 
 monitoring_router = APIRouter()
 
 
+def _registry():
+    # Под gunicorn каждый воркер пишет метрики в PROMETHEUS_MULTIPROC_DIR,
+    # поэтому отдаём агрегат по всем воркерам, а не реестр текущего процесса
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return registry
+
+
 @monitoring_router.get("/metrics")
 def monitoring():
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+@monitoring_router.get("/ready")
+def readiness(request: Request):
+    # 200 только после прогрева воркера: пул БД, хранилище и кэши готовы
+    if request.app.state.container.ready:
+        return {"status": "ready"}
+    return JSONResponse(status_code=503, content={"status": "warming_up"})
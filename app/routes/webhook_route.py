@@ -0,0 +1,146 @@
+import secrets
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from tiacore_lib.utils.validate_helpers import validate_company_access
+
+from app.database.models import WebhookSubscription
+from app.dependencies.permissions import (
+    require_permission_in_context,
+    with_permission_and_company_from_body_check,
+)
+from app.pydantic_models.webhook_models import (
+    WebhookCreateResponseSchema,
+    WebhookCreateSchema,
+    WebhookEditSchema,
+    WebhookListResponseSchema,
+    WebhookResponseSchema,
+    WebhookSchema,
+)
+from app.webhooks.targets import UnsafeWebhookTarget, resolve_webhook_url
+
+webhook_router = APIRouter()
+
+
+async def _validate_target(url: str):
+    try:
+        await resolve_webhook_url(url)
+    except UnsafeWebhookTarget as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except OSError:
+        raise HTTPException(status_code=422, detail="Имя хоста вебхука не разрешается")
+
+
+def _to_schema(subscription: WebhookSubscription) -> WebhookSchema:
+    return WebhookSchema(
+        webhook_id=subscription.id,
+        url=subscription.url,
+        events=subscription.events,
+        company_id=subscription.company_id,
+        is_active=subscription.is_active,
+        failure_count=subscription.failure_count,
+        disabled_until=subscription.disabled_until,
+        last_error=subscription.last_error,
+        created_at=subscription.created_at,
+        created_by=subscription.created_by,
+        modified_at=subscription.modified_at,
+        modified_by=subscription.modified_by,
+    )
+
+
+@webhook_router.post(
+    "/add",
+    response_model=WebhookCreateResponseSchema,
+    summary="Добавить подписку на вебхуки",
+    status_code=status.HTTP_201_CREATED,
+)
+async def add_webhook(
+    data: WebhookCreateSchema,
+    context=Depends(with_permission_and_company_from_body_check("add_webhook")),
+):
+    await _validate_target(data.url)
+    secret = secrets.token_hex(32)
+    subscription = await WebhookSubscription.create(
+        secret=secret,
+        created_by=context["user_id"],
+        modified_by=context["user_id"],
+        **data.model_dump(),
+    )
+    return WebhookCreateResponseSchema(webhook_id=subscription.id, secret=secret)
+
+
+@webhook_router.patch(
+    "/{webhook_id}",
+    response_model=WebhookResponseSchema,
+    summary="Изменить подписку на вебхуки",
+)
+async def update_webhook(
+    webhook_id: UUID,
+    data: WebhookEditSchema,
+    context=Depends(with_permission_and_company_from_body_check("edit_webhook")),
+):
+    subscription = await WebhookSubscription.filter(id=webhook_id).first()
+    if not subscription:
+        raise HTTPException(status_code=404, detail="подписка не найдена")
+    validate_company_access(subscription, context, "подпиской")
+    if data.url is not None:
+        await _validate_target(data.url)
+    update_data = data.model_dump(exclude_unset=True)
+    update_data.pop("company_id", None)
+    if update_data.get("is_active") or "url" in update_data:
+        # Включение или новый адрес — предохранитель начинает с чистого листа
+        update_data.update(failure_count=0, disabled_until=None, last_error=None)
+    subscription.modified_by = context["user_id"]
+    await subscription.update_from_dict(update_data)
+    await subscription.save()
+    return WebhookResponseSchema(webhook_id=subscription.id)
+
+
+@webhook_router.delete(
+    "/{webhook_id}",
+    summary="Удалить подписку на вебхуки",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def delete_webhook(
+    webhook_id: UUID,
+    context=Depends(require_permission_in_context("delete_webhook")),
+):
+    subscription = await WebhookSubscription.filter(id=webhook_id).first()
+    if not subscription:
+        raise HTTPException(status_code=404, detail="подписка не найдена")
+    validate_company_access(subscription, context, "подпиской")
+    await subscription.delete()
+
+
+@webhook_router.get(
+    "/all",
+    response_model=WebhookListResponseSchema,
+    summary="Получение списка подписок на вебхуки",
+)
+async def get_webhooks(
+    context: dict = Depends(require_permission_in_context("get_all_webhooks")),
+):
+    query = WebhookSubscription.all()
+    if not context["is_superadmin"]:
+        query = query.filter(company_id=context["company_id"])
+    subscriptions = await query.order_by("created_at")
+    return WebhookListResponseSchema(
+        total=len(subscriptions),
+        webhooks=[_to_schema(subscription) for subscription in subscriptions],
+    )
+
+
+@webhook_router.get(
+    "/{webhook_id}",
+    response_model=WebhookSchema,
+    summary="Просмотр подписки на вебхуки",
+)
+async def get_webhook(
+    webhook_id: UUID,
+    context: dict = Depends(require_permission_in_context("view_webhook")),
+):
+    subscription = await WebhookSubscription.filter(id=webhook_id).first()
+    if not subscription:
+        raise HTTPException(status_code=404, detail="подписка не найдена")
+    validate_company_access(subscription, context, "подпиской")
+    return _to_schema(subscription)
@@ -0,0 +1,85 @@
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, BinaryIO, Optional
+
+import zstandard
+
+IDENTITY = "identity"
+ZSTD = "zstd"
+
+# DOCX/XLSX уже сжаты deflate внутри zip — повторное сжатие почти ничего не даёт
+COMPRESSIBLE_EXTENSIONS = {
+    "csv",
+    "doc",
+    "htm",
+    "html",
+    "json",
+    "log",
+    "md",
+    "rtf",
+    "svg",
+    "txt",
+    "xls",
+    "xml",
+}
+COMPRESSIBLE_MIME_TYPES = {
+    "application/json",
+    "application/msword",
+    "application/rtf",
+    "application/vnd.ms-excel",
+    "application/xml",
+    "image/svg+xml",
+}
+
+_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor(max_workers: int = 2) -> ThreadPoolExecutor:
+    # zstandard отпускает GIL, поэтому потоков достаточно
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="storage-codec"
+        )
+    return _executor
+
+
+def is_compressible(extension: str, content_type: Optional[str] = None) -> bool:
+    if extension.lower() in COMPRESSIBLE_EXTENSIONS:
+        return True
+    if content_type:
+        mime = content_type.split(";", 1)[0].strip().lower()
+        return mime.startswith("text/") or mime in COMPRESSIBLE_MIME_TYPES
+    return False
+
+
+def compress_to_spool(src: BinaryIO, level: int = 3) -> tuple[BinaryIO, int, int]:
+    """Потоково сжимает src во временный файл. Возвращает (файл, исходный, сжатый)."""
+    dst = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+    compressor = zstandard.ZstdCompressor(level=level)
+    original_size, compressed_size = compressor.copy_stream(src, dst)
+    dst.seek(0)
+    return dst, original_size, compressed_size
+
+
+async def compress_fileobj(src: BinaryIO, level: int = 3) -> tuple[BinaryIO, int, int]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), compress_to_spool, src, level)
+
+
+async def decompress_stream(
+    chunks: AsyncGenerator[bytes, None],
+) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    # Клиент может отключиться посреди ответа — тело S3 и соединение закрываем сразу
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            data = await loop.run_in_executor(
+                get_executor(), decompressor.decompress, chunk
+            )
+            if data:
+                yield data
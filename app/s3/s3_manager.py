@@ -1,28 +1,44 @@
-import os
+import io
 import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import BinaryIO, Optional
 
-import aioboto3
-from botocore.exceptions import ClientError
-from dotenv import load_dotenv
 from loguru import logger
 
-from app.config import ConfigName, _load_settings
+from app.config import default_settings
+from app.s3.codec import (
+    IDENTITY,
+    ZSTD,
+    compress_fileobj,
+    decompress_stream,
+    is_compressible,
+)
+from app.storage import StorageBackend, build_storage_backend
+from app.utils.timing import STORAGE, measure
 
-load_dotenv()
-CONFIG_NAME = ConfigName(os.getenv("CONFIG_NAME", "Development"))
-settings = _load_settings(config_name=CONFIG_NAME)
 
+@lru_cache
+def _default_backend() -> StorageBackend:
+    return build_storage_backend(default_settings())
 
-class AsyncS3Manager:
-    endpoint_url = settings.ENDPOINT_URL
-    region_name = settings.REGION_NAME
-    aws_access_key_id = settings.AWS_ACCESS_KEY_ID
-    aws_secret_access_key = settings.AWS_SECRET_ACCESS_KEY
-    bucket_name = settings.BUCKET_NAME
-    bucket_folder = settings.APP
 
-    def _get_session(self):
-        return aioboto3.Session()
+@dataclass
+class StoredFile:
+    key: str
+    codec: str
+    original_size: int
+
+
+class AsyncS3Manager:
+    def __init__(self, backend: Optional[StorageBackend] = None, settings=None):
+        settings = settings or default_settings()
+        self.backend = backend or _default_backend()
+        self.bucket_folder = settings.APP
+        self.compression_enabled = settings.STORAGE_COMPRESSION_ENABLED
+        self.compression_level = settings.STORAGE_COMPRESSION_LEVEL
+        self.compression_min_size = settings.STORAGE_COMPRESSION_MIN_SIZE
+        self.compression_min_ratio = settings.STORAGE_COMPRESSION_MIN_RATIO
 
     def _normalize_filename(self, filename: str) -> str:
         filename = filename.strip()
@@ -33,67 +49,99 @@ class AsyncS3Manager:
     def _build_path(self, contract_id: str, filename: str) -> str:
         return f"{self.bucket_folder}/{contract_id}/{filename}"
 
-    def _get_client(self):
-        session = self._get_session()
-        return session.client(
-            "s3",
-            endpoint_url=self.endpoint_url,
-            region_name=self.region_name,
-            aws_access_key_id=self.aws_access_key_id,
-            aws_secret_access_key=self.aws_secret_access_key,
-        )
-
     async def upload_bytes(self, file_bytes: bytes, contract_id: str, filename: str):
+        return await self.upload_fileobj(io.BytesIO(file_bytes), contract_id, filename)
+
+    async def upload_fileobj(
+        self,
+        fileobj,
+        contract_id: str,
+        filename: str,
+        metadata: Optional[dict[str, str]] = None,
+    ):
         filename = self._normalize_filename(filename)
         key = self._build_path(contract_id, filename)
+        with measure(STORAGE):
+            await self.backend.put_stream(key, fileobj, metadata)
+        logger.info(f"✅ Файл загружен: {key}")
+        return key
 
-        async with self._get_client() as s3:  # type: ignore[attr-defined]
+    async def store_fileobj(
+        self,
+        fileobj: BinaryIO,
+        contract_id: str,
+        filename: str,
+        size: int,
+        content_type: Optional[str] = None,
+    ) -> StoredFile:
+        extension = filename.rsplit(".", 1)[1] if "." in filename else ""
+        if (
+            self.compression_enabled
+            and size >= self.compression_min_size
+            and is_compressible(extension, content_type)
+        ):
+            compressed, original_size, compressed_size = await compress_fileobj(
+                fileobj, self.compression_level
+            )
             try:
-                await s3.put_object(
-                    Bucket=self.bucket_name, Key=key, Body=file_bytes, ACL="private"
-                )
-                logger.info(f"✅ Файл загружен: {key}")
-                return key
-            except ClientError as e:
-                logger.error(f"Ошибка загрузки: {e}")
-                raise
+                if compressed_size <= original_size * self.compression_min_ratio:
+                    key = await self.upload_fileobj(
+                        compressed,
+                        contract_id,
+                        filename,
+                        metadata={"codec": ZSTD, "original-size": str(original_size)},
+                    )
+                    logger.info(
+                        f"🗜️ {key}: {original_size} → {compressed_size} байт (zstd)"
+                    )
+                    return StoredFile(key=key, codec=ZSTD, original_size=original_size)
+            finally:
+                compressed.close()
+            fileobj.seek(0)
+
+        key = await self.upload_fileobj(fileobj, contract_id, filename)
+        return StoredFile(key=key, codec=IDENTITY, original_size=size)
 
     async def generate_presigned_url(self, key, expiration=3600):
-        async with self._get_client() as s3:  # type: ignore[attr-defined]
-            try:
-                return await s3.generate_presigned_url(
-                    ClientMethod="get_object",
-                    Params={"Bucket": self.bucket_name, "Key": key},
-                    ExpiresIn=expiration,
-                )
-            except ClientError as e:
-                logger.error(f"Ошибка при генерации ссылки: {e}")
-                return None
+        with measure(STORAGE):
+            return await self.backend.presign(key, expiration)
+
+    def stream_file(
+        self, key: str, chunk_size: int = 64 * 1024, codec: str = IDENTITY
+    ):
+        stream = self.backend.get_stream(key, chunk_size)
+        if codec == ZSTD:
+            return decompress_stream(stream)
+        return stream
+
+    async def read_range(self, key: str, start: int, end: int) -> bytes:
+        with measure(STORAGE):
+            return await self.backend.get_range(key, start, end)
+
+    async def download_to(
+        self, key: str, fileobj: BinaryIO, limit: Optional[int] = None
+    ) -> int:
+        with measure(STORAGE):
+            return await self.backend.download_to(key, fileobj, limit)
+
+    def iter_objects(self, prefix: str, page_size: int = 1000):
+        return self.backend.list(prefix, page_size)
 
     async def list_chat_files(self, chat_id: int) -> list[str]:
         prefix = f"{self.bucket_folder}/{chat_id}/"
-        async with self._get_client() as s3:  # type: ignore[attr-defined]
-            try:
-                response = await s3.list_objects_v2(
-                    Bucket=self.bucket_name, Prefix=prefix
-                )
-                return [obj["Key"] for obj in response.get("Contents", [])]
-            except ClientError as e:
-                logger.error(f"Ошибка при получении списка файлов: {e}")
-                return []
+        try:
+            return [obj.key async for obj in self.iter_objects(prefix)]
+        except Exception as e:
+            logger.error(f"Ошибка при получении списка файлов: {e}")
+            return []
+
+    async def delete_files(self, keys: list[str]) -> list[str]:
+        with measure(STORAGE):
+            deleted = await self.backend.delete_batch(keys)
+        logger.info(f"🗑️ Удалено файлов: {len(deleted)}")
+        return deleted
 
     async def delete_file(self, key):
-        session = self._get_session()
-        async with session.client(
-            "s3",
-            endpoint_url=self.endpoint_url,
-            region_name=self.region_name,
-            aws_access_key_id=self.aws_access_key_id,
-            aws_secret_access_key=self.aws_secret_access_key,
-        ) as s3:  # type: ignore[attr-defined]
-            try:
-                await s3.delete_object(Bucket=self.bucket_name, Key=key)
-                logger.info(f"🗑️ Файл удалён: {key}")
-            except ClientError as e:
-                logger.error(f"Ошибка при удалении файла: {e}")
-                raise
+        with measure(STORAGE):
+            await self.backend.delete_batch([key])
+        logger.info(f"🗑️ Файл удалён: {key}")
@@ -0,0 +1,32 @@
+from app.storage.base import ObjectInfo, StorageBackend
+from app.storage.local import LocalStorageBackend
+from app.storage.memory import MemoryStorageBackend
+from app.storage.s3 import S3StorageBackend
+
+
+def build_storage_backend(settings) -> StorageBackend:
+    match settings.STORAGE_BACKEND:
+        case "s3":
+            return S3StorageBackend(
+                bucket_name=settings.BUCKET_NAME,
+                endpoint_url=settings.ENDPOINT_URL,
+                region_name=settings.REGION_NAME,
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            )
+        case "local":
+            return LocalStorageBackend(settings.LOCAL_STORAGE_ROOT)
+        case "memory":
+            return MemoryStorageBackend()
+        case _:
+            raise ValueError(f"❌ Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+
+
+__all__ = [
+    "LocalStorageBackend",
+    "MemoryStorageBackend",
+    "ObjectInfo",
+    "S3StorageBackend",
+    "StorageBackend",
+    "build_storage_backend",
+]
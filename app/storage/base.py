@@ -0,0 +1,64 @@
+import asyncio
+import datetime
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, BinaryIO, Optional
+
+
+@dataclass
+class ObjectInfo:
+    key: str
+    size: int
+    last_modified: datetime.datetime
+
+
+class StorageBackend(ABC):
+    """Хранилище файлов контрактов. Ключи — пути вида `{APP}/{contract_id}/{file}`."""
+
+    @abstractmethod
+    async def put_stream(
+        self, key: str, fileobj: BinaryIO, metadata: Optional[dict[str, str]] = None
+    ) -> None: ...
+
+    @abstractmethod
+    def get_stream(
+        self, key: str, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]: ...
+
+    @abstractmethod
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        """Байты [start, end] включительно, как в HTTP Range."""
+
+    @abstractmethod
+    async def delete_batch(self, keys: list[str]) -> list[str]: ...
+
+    @abstractmethod
+    async def presign(self, key: str, expiration: int = 3600) -> Optional[str]:
+        """Прямая ссылка на объект или None, если бэкенд их не выдаёт."""
+
+    @abstractmethod
+    def list(self, prefix: str, page_size: int = 1000) -> AsyncIterator[ObjectInfo]:
+        """Объекты под префиксом в байтовом порядке ключей (как S3)."""
+
+    async def download_to(
+        self, key: str, fileobj: BinaryIO, limit: Optional[int] = None
+    ) -> int:
+        """Копирует объект в файл; при limit останавливается после limit + 1 байт."""
+        # Запись на диск не должна блокировать event loop
+        written = 0
+        async for chunk in self.get_stream(key):
+            if limit is not None and written + len(chunk) > limit:
+                await asyncio.to_thread(fileobj.write, chunk[: limit + 1 - written])
+                return limit + 1
+            await asyncio.to_thread(fileobj.write, chunk)
+            written += len(chunk)
+        return written
+
+    async def start(self) -> None:
+        """Открывает долгоживущие клиенты; без вызова бэкенд тоже работает."""
+
+    async def warmup(self) -> None:
+        """Устанавливает соединение с хранилищем заранее, до первого запроса."""
+
+    async def close(self) -> None:
+        pass
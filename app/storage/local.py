@@ -0,0 +1,155 @@
+import asyncio
+import datetime
+import mmap
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Iterator, Optional
+
+from app.storage.base import ObjectInfo, StorageBackend
+
+_TMP_PREFIX = ".tmp-"
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Хранилище в локальной файловой системе для тестов и edge-инсталляций.
+    Метаданные объектов не сохраняются — codec и размер уже лежат в БД.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root) or path == self.root:
+            raise ValueError(f"Недопустимый ключ: {key}")
+        return path
+
+    def _write(self, key: str, fileobj: BinaryIO):
+        # Пишем во временный файл рядом и атомарно подменяем целевой
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=_TMP_PREFIX, dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                shutil.copyfileobj(fileobj, tmp, 1024 * 1024)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    async def put_stream(
+        self, key: str, fileobj: BinaryIO, metadata: Optional[dict[str, str]] = None
+    ) -> None:
+        await asyncio.to_thread(self._write, key, fileobj)
+
+    async def get_stream(
+        self, key: str, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, self._path(key), "rb")
+        try:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+        finally:
+            f.close()
+
+    def _read_range(self, key: str, start: int, end: int) -> bytes:
+        with open(self._path(key), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or start >= size:
+                return b""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[start : min(end, size - 1) + 1]
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        return await asyncio.to_thread(self._read_range, key, start, end)
+
+    def _sendfile(self, key: str, fileobj: BinaryIO, limit: Optional[int]) -> int:
+        fileobj.flush()
+        out_fd = fileobj.fileno()
+        with open(self._path(key), "rb") as src:
+            remaining = os.fstat(src.fileno()).st_size
+            if limit is not None:
+                remaining = min(remaining, limit + 1)
+            offset = fileobj.tell()
+            written = 0
+            while remaining > 0:
+                sent = os.sendfile(out_fd, src.fileno(), written, remaining)
+                if sent == 0:
+                    break
+                written += sent
+                remaining -= sent
+        fileobj.seek(offset + written)
+        return written
+
+    async def download_to(
+        self, key: str, fileobj: BinaryIO, limit: Optional[int] = None
+    ) -> int:
+        # Копирование ядром без прохода данных через Python
+        try:
+            fileobj.fileno()
+        except (AttributeError, OSError, ValueError):
+            return await super().download_to(key, fileobj, limit)
+        return await asyncio.to_thread(self._sendfile, key, fileobj, limit)
+
+    def _delete(self, keys: list[str]) -> list[str]:
+        deleted = []
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+            deleted.append(key)
+        return deleted
+
+    async def delete_batch(self, keys: list[str]) -> list[str]:
+        return await asyncio.to_thread(self._delete, keys)
+
+    async def presign(self, key: str, expiration: int = 3600) -> Optional[str]:
+        return None
+
+    def _walk(self, directory: Path, relative: str) -> Iterator[ObjectInfo]:
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return
+        # Каталог сортируем как "имя/", чтобы порядок совпал с байтовым порядком ключей
+        entries.sort(
+            key=lambda e: (e.name + "/" if e.is_dir() else e.name).encode("utf-8")
+        )
+        for entry in entries:
+            key = f"{relative}{entry.name}"
+            if entry.is_dir():
+                yield from self._walk(Path(entry.path), f"{key}/")
+            elif not entry.name.startswith(_TMP_PREFIX):
+                stat = entry.stat()
+                yield ObjectInfo(
+                    key=key,
+                    size=stat.st_size,
+                    last_modified=datetime.datetime.fromtimestamp(
+                        stat.st_mtime, tz=datetime.timezone.utc
+                    ),
+                )
+
+    async def list(
+        self, prefix: str, page_size: int = 1000
+    ) -> AsyncIterator[ObjectInfo]:
+        # Обходим только каталог префикса, отсекая по строковому префиксу
+        base, _, _ = prefix.rpartition("/")
+        directory = self.root / base if base else self.root
+        relative = f"{base}/" if base else ""
+        walker = self._walk(directory, relative)
+        while True:
+            page = await asyncio.to_thread(
+                lambda: [obj for _, obj in zip(range(page_size), walker)]
+            )
+            for obj in page:
+                if obj.key.startswith(prefix):
+                    yield obj
+            if len(page) < page_size:
+                return
@@ -0,0 +1,46 @@
+import datetime
+from typing import AsyncIterator, BinaryIO, Optional
+
+from app.storage.base import ObjectInfo, StorageBackend
+
+
+class MemoryStorageBackend(StorageBackend):
+    """Хранилище в памяти процесса — для тестов и бенчмарков."""
+
+    def __init__(self):
+        self._objects: dict[str, tuple[bytes, datetime.datetime]] = {}
+
+    async def put_stream(
+        self, key: str, fileobj: BinaryIO, metadata: Optional[dict[str, str]] = None
+    ) -> None:
+        self._objects[key] = (
+            fileobj.read(),
+            datetime.datetime.now(datetime.timezone.utc),
+        )
+
+    async def get_stream(
+        self, key: str, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        data, _ = self._objects[key]
+        for i in range(0, len(data), chunk_size):
+            yield data[i : i + chunk_size]
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        data, _ = self._objects[key]
+        return data[start : end + 1]
+
+    async def delete_batch(self, keys: list[str]) -> list[str]:
+        for key in keys:
+            self._objects.pop(key, None)
+        return keys
+
+    async def presign(self, key: str, expiration: int = 3600) -> Optional[str]:
+        return None
+
+    async def list(
+        self, prefix: str, page_size: int = 1000
+    ) -> AsyncIterator[ObjectInfo]:
+        for key in sorted(self._objects, key=lambda k: k.encode("utf-8")):
+            if key.startswith(prefix):
+                data, modified = self._objects[key]
+                yield ObjectInfo(key=key, size=len(data), last_modified=modified)
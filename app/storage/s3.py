@@ -0,0 +1,158 @@
+from contextlib import AsyncExitStack, nullcontext
+from typing import AsyncIterator, BinaryIO, Optional
+
+import aioboto3
+from botocore.exceptions import ClientError
+from loguru import logger
+
+from app.storage.base import ObjectInfo, StorageBackend
+
+
+class S3StorageBackend(StorageBackend):
+    def __init__(
+        self,
+        bucket_name: Optional[str],
+        endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = None,
+        aws_access_key_id: Optional[str] = None,
+        aws_secret_access_key: Optional[str] = None,
+    ):
+        self.bucket_name = bucket_name
+        self.endpoint_url = endpoint_url
+        self.region_name = region_name
+        self.aws_access_key_id = aws_access_key_id
+        self.aws_secret_access_key = aws_secret_access_key
+        self._session = None
+        self._client = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+
+    def _get_session(self):
+        # Сессия загружает модели botocore — создаём один раз
+        if self._session is None:
+            self._session = aioboto3.Session()
+        return self._session
+
+    def _get_client(self):
+        if self._client is not None:
+            return nullcontext(self._client)
+        session = self._get_session()
+        return session.client(
+            "s3",
+            endpoint_url=self.endpoint_url,
+            region_name=self.region_name,
+            aws_access_key_id=self.aws_access_key_id,
+            aws_secret_access_key=self.aws_secret_access_key,
+        )
+
+    async def start(self) -> None:
+        # Один клиент на процесс: без TLS-рукопожатия и сборки клиента
+        # на каждую операцию. Вызывается из lifespan, то есть после fork
+        if self._client is not None:
+            return
+        self._exit_stack = AsyncExitStack()
+        self._client = await self._exit_stack.enter_async_context(self._get_client())
+
+    async def warmup(self) -> None:
+        # HEAD бакета открывает TLS-соединение в пуле клиента
+        async with self._get_client() as s3:  # type: ignore[attr-defined]
+            await s3.head_bucket(Bucket=self.bucket_name)
+
+    async def close(self) -> None:
+        if self._exit_stack is not None:
+            self._client = None
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+
+    async def put_stream(
+        self, key: str, fileobj: BinaryIO, metadata: Optional[dict[str, str]] = None
+    ) -> None:
+        # Читаем файл частями (multipart), не держа его целиком в памяти
+        extra_args: dict = {"ACL": "private"}
+        if metadata:
+            extra_args["Metadata"] = metadata
+        async with self._get_client() as s3:  # type: ignore[attr-defined]
+            try:
+                await s3.upload_fileobj(
+                    fileobj, self.bucket_name, key, ExtraArgs=extra_args
+                )
+            except ClientError as e:
+                logger.error(f"Ошибка загрузки: {e}")
+                raise
+
+    async def get_stream(
+        self, key: str, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        async with self._get_client() as s3:  # type: ignore[attr-defined]
+            try:
+                response = await s3.get_object(Bucket=self.bucket_name, Key=key)
+            except ClientError as e:
+                logger.error(f"Ошибка при чтении файла {key}: {e}")
+                raise
+            async with response["Body"] as body:
+                while chunk := await body.read(chunk_size):
+                    yield chunk
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        async with self._get_client() as s3:  # type: ignore[attr-defined]
+            try:
+                response = await s3.get_object(
+                    Bucket=self.bucket_name, Key=key, Range=f"bytes={start}-{end}"
+                )
+            except ClientError as e:
+                logger.error(f"Ошибка при чтении диапазона {key}: {e}")
+                raise
+            async with response["Body"] as body:
+                return await body.read()
+
+    async def delete_batch(self, keys: list[str]) -> list[str]:
+        deleted: list[str] = []
+        async with self._get_client() as s3:  # type: ignore[attr-defined]
+            for i in range(0, len(keys), 1000):
+                batch = keys[i : i + 1000]
+                try:
+                    response = await s3.delete_objects(
+                        Bucket=self.bucket_name,
+                        Delete={
+                            "Objects": [{"Key": key} for key in batch],
+                            "Quiet": False,
+                        },
+                    )
+                except ClientError as e:
+                    logger.error(f"Ошибка при пакетном удалении файлов: {e}")
+                    raise
+                deleted.extend(obj["Key"] for obj in response.get("Deleted", []))
+                for error in response.get("Errors", []):
+                    logger.error(
+                        f"Не удалось удалить {error.get('Key')}: {error.get('Message')}"
+                    )
+        return deleted
+
+    async def presign(self, key: str, expiration: int = 3600) -> Optional[str]:
+        async with self._get_client() as s3:  # type: ignore[attr-defined]
+            try:
+                return await s3.generate_presigned_url(
+                    ClientMethod="get_object",
+                    Params={"Bucket": self.bucket_name, "Key": key},
+                    ExpiresIn=expiration,
+                )
+            except ClientError as e:
+                logger.error(f"Ошибка при генерации ссылки: {e}")
+                return None
+
+    async def list(
+        self, prefix: str, page_size: int = 1000
+    ) -> AsyncIterator[ObjectInfo]:
+        # Ключи приходят постранично в лексикографическом (байтовом) порядке
+        async with self._get_client() as s3:  # type: ignore[attr-defined]
+            paginator = s3.get_paginator("list_objects_v2")
+            async for page in paginator.paginate(
+                Bucket=self.bucket_name,
+                Prefix=prefix,
+                PaginationConfig={"PageSize": page_size},
+            ):
+                for obj in page.get("Contents", []):
+                    yield ObjectInfo(
+                        key=obj["Key"],
+                        size=obj["Size"],
+                        last_modified=obj["LastModified"],
+                    )
@@ -0,0 +1,76 @@
+"""
+Изменения договоров и файлов для внешних подписчиков.
+
+Очередь вебхуков — outbox: record_change вызывается в той же транзакции,
+что и само изменение, и ставит доставки одной вставкой (запросы к партнёрам
+отправляет WebhookDispatcher в фоне). Изменение без доставок не
+закоммитится, а откат не оставит доставок о том, чего не было. Лента для
+SSE не транзакционна, поэтому publish_change вызывается уже после коммита.
+"""
+
+import json
+from typing import Any, NamedTuple, Optional
+from uuid import UUID
+
+from loguru import logger
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.utils.change_feed import change_feed
+
+CONTRACT_CREATED = "contract.created"
+CONTRACT_UPDATED = "contract.updated"
+CONTRACT_DELETED = "contract.deleted"
+CONTRACT_FILE_CREATED = "contract_file.created"
+CONTRACT_FILE_UPDATED = "contract_file.updated"
+CONTRACT_FILE_DELETED = "contract_file.deleted"
+
+CHANGE_EVENTS = (
+    CONTRACT_CREATED,
+    CONTRACT_UPDATED,
+    CONTRACT_DELETED,
+    CONTRACT_FILE_CREATED,
+    CONTRACT_FILE_UPDATED,
+    CONTRACT_FILE_DELETED,
+)
+
+_ENQUEUE_WEBHOOKS_SQL = """
+    INSERT INTO webhook_deliveries
+        (subscription_id, event, payload, status, attempts, next_attempt_at, created_at)
+    SELECT id, $1::text, $2::jsonb, 'pending', 0, now(), now()
+    FROM webhook_subscriptions
+    WHERE company_id = $3 AND is_active
+        AND (events = '[]'::jsonb OR events ? $1::text)
+"""
+
+
+class Change(NamedTuple):
+    event: str
+    company_id: UUID
+    data: dict[str, Any]
+
+
+async def record_change(
+    connection: BaseDBAsyncClient,
+    event: str,
+    company_id: Optional[UUID],
+    data: dict[str, Any],
+) -> Optional[Change]:
+    """
+    Ставит вебхуки в очередь через соединение транзакции изменения.
+    Ошибка пробрасывается и откатывает изменение вместе с очередью.
+    """
+    if company_id is None:
+        return None
+    payload = json.dumps(data, default=str)
+    await connection.execute_query(_ENQUEUE_WEBHOOKS_SQL, [event, payload, company_id])
+    return Change(event, company_id, data)
+
+
+async def publish_change(change: Optional[Change]) -> None:
+    """Лента изменений после коммита. Ошибка не ломает запрос."""
+    if change is None:
+        return
+    try:
+        await change_feed.publish(change.event, change.company_id, change.data)
+    except Exception as e:
+        logger.error(f"Не удалось опубликовать {change.event} в ленту изменений: {e!r}")
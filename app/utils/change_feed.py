@@ -0,0 +1,263 @@
+"""
+Лента изменений договоров для SSE.
+
+publish_change пишет событие в короткий Redis stream компании (и общий —
+для суперадминов) и публикует его в один канал pub/sub. Каждый воркер
+держит одну подписку на канал и раздаёт события своим подключениям по
+компании. У подключения своя ограниченная очередь: если клиент не
+успевает читать, очередь сбрасывается, и недостающее досылается из
+stream — так медленный клиент не копит память и не тормозит остальных.
+Тот же stream обслуживает Last-Event-ID при переподключении.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+
+from metrics.sse_metrics import (
+    sse_connections,
+    sse_events_sent_total,
+    sse_resets_total,
+    sse_resyncs_total,
+)
+
+CHANGES_CHANNEL = "contract-service:changes"
+_STREAM_PREFIX = "contract-service:changes"
+ALL_COMPANIES = "all"
+_START_ID = "0-0"
+# Маркер в очереди клиента: живые события потеряны, дочитать из stream
+_RESYNC = object()
+
+
+def stream_key(company: str) -> str:
+    return f"{_STREAM_PREFIX}:{company}"
+
+
+def _parse_id(entry_id: str) -> tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def format_event(entry_id: str, event: str, data: str) -> bytes:
+    return f"id: {entry_id}\nevent: {event}\ndata: {data}\n\n".encode()
+
+
+class _Client:
+    def __init__(self, key: str, queue_size: int):
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Живые события этого клиента выбрасываем — он дочитает их из stream
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_RESYNC)
+            sse_resyncs_total.labels(reason="overflow").inc()
+
+
+class ChangeFeed:
+    def __init__(
+        self,
+        stream_maxlen: int = 1000,
+        stream_ttl_seconds: int = 3600,
+        queue_size: int = 100,
+        heartbeat_seconds: float = 15.0,
+        replay_limit: int = 500,
+        max_connections: int = 1000,
+    ):
+        self.configure(
+            stream_maxlen,
+            stream_ttl_seconds,
+            queue_size,
+            heartbeat_seconds,
+            replay_limit,
+            max_connections,
+        )
+        self.redis = None
+        self._clients: dict[str, set[_Client]] = {}
+        self._count = 0
+
+    def configure(
+        self,
+        stream_maxlen: int,
+        stream_ttl_seconds: int,
+        queue_size: int,
+        heartbeat_seconds: float,
+        replay_limit: int,
+        max_connections: int,
+    ):
+        self.stream_maxlen = stream_maxlen
+        self.stream_ttl_seconds = stream_ttl_seconds
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.replay_limit = replay_limit
+        self.max_connections = max_connections
+
+    def bind(self, redis):
+        self.redis = redis
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.max_connections
+
+    async def publish(self, event: str, company_id, data: dict):
+        if self.redis is None:
+            return
+        company = str(company_id)
+        body = json.dumps(data, default=str)
+        pipe = self.redis.pipeline(transaction=True)
+        for key in (stream_key(company), stream_key(ALL_COMPANIES)):
+            pipe.xadd(
+                key,
+                {"event": event, "data": body},
+                maxlen=self.stream_maxlen,
+                approximate=True,
+            )
+            pipe.expire(key, self.stream_ttl_seconds)
+        company_entry, _, all_entry, _ = await pipe.execute()
+        message = {
+            "company_id": company,
+            "event": event,
+            "data": body,
+            "ids": {company: _text(company_entry), ALL_COMPANIES: _text(all_entry)},
+        }
+        await self.redis.publish(CHANGES_CHANNEL, json.dumps(message))
+
+    async def run(self):
+        """Одна подписка воркера на канал изменений — до отмены задачи."""
+        delay = 1.0
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(CHANGES_CHANNEL)
+                # Пока подписки не было, события могли пройти мимо
+                self._resync_all()
+                delay = 1.0
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    self._dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Подписка на ленту изменений прервана: {e!r}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                await pubsub.aclose()
+
+    def _dispatch(self, message: dict):
+        for company, entry_id in message["ids"].items():
+            item = (entry_id, message["event"], message["data"])
+            for client in self._clients.get(stream_key(company), ()):
+                client.offer(item)
+
+    def _resync_all(self):
+        for clients in self._clients.values():
+            for client in clients:
+                sse_resyncs_total.labels(reason="reconnect").inc()
+                client.offer(_RESYNC)
+
+    def _subscribe(self, key: str) -> _Client:
+        client = _Client(key, self.queue_size)
+        self._clients.setdefault(key, set()).add(client)
+        self._count += 1
+        sse_connections.inc()
+        return client
+
+    def _unsubscribe(self, client: _Client):
+        clients = self._clients.get(client.key)
+        if clients is not None:
+            clients.discard(client)
+            if not clients:
+                del self._clients[client.key]
+        self._count -= 1
+        sse_connections.dec()
+
+    async def _latest_id(self, key: str) -> str:
+        entries = await self.redis.xrevrange(key, count=1)
+        return _text(entries[0][0]) if entries else _START_ID
+
+    async def stream(
+        self, company: Optional[str], last_event_id: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        SSE-поток событий компании (None — всех компаний). С Last-Event-ID
+        сначала досылает пропущенное из stream, затем идут живые события.
+        """
+        key = stream_key(company or ALL_COMPANIES)
+        # Подписываемся до чтения stream, чтобы не потерять события между ними
+        client = self._subscribe(key)
+        try:
+            resync = False
+            last_id = None
+            if last_event_id:
+                try:
+                    _parse_id(last_event_id)
+                    last_id, resync = last_event_id, True
+                    sse_resyncs_total.labels(reason="resume").inc()
+                except ValueError:
+                    pass
+            if last_id is None:
+                last_id = await self._latest_id(key)
+            yield b"retry: 3000\n\n"
+
+            while True:
+                if resync:
+                    resync = False
+                    async for chunk, last_id in self._replay(key, last_id):
+                        yield chunk
+                try:
+                    item = await asyncio.wait_for(
+                        client.queue.get(), self.heartbeat_seconds
+                    )
+                except asyncio.TimeoutError:
+                    # Комментарий держит соединение через прокси
+                    yield b": ping\n\n"
+                    continue
+                if item is _RESYNC:
+                    resync = True
+                    continue
+                entry_id, event, data = item
+                # Уже отправлено при досылке из stream
+                if _parse_id(entry_id) <= _parse_id(last_id):
+                    continue
+                last_id = entry_id
+                sse_events_sent_total.inc()
+                yield format_event(entry_id, event, data)
+        finally:
+            self._unsubscribe(client)
+
+    async def _replay(self, key: str, last_id: str) -> AsyncIterator[tuple]:
+        entries = await self.redis.xrange(
+            key, min=f"({last_id}", max="+", count=self.replay_limit + 1
+        )
+        # Stream обрезается с начала: если последнее увиденное клиентом
+        # событие ещё в нём, ничего после него не потеряно
+        oldest = await self.redis.xrange(key, count=1)
+        trimmed = last_id != _START_ID and (
+            not oldest or _parse_id(_text(oldest[0][0])) > _parse_id(last_id)
+        )
+        if trimmed or len(entries) > self.replay_limit:
+            # Часть истории уже обрезана — клиенту проще перечитать список
+            sse_resets_total.inc()
+            latest = await self._latest_id(key)
+            yield format_event(latest, "reset", "{}"), latest
+            return
+        for entry_id, fields in entries:
+            entry_id = _text(entry_id)
+            fields = {_text(k): _text(v) for k, v in fields.items()}
+            sse_events_sent_total.inc()
+            yield format_event(entry_id, fields["event"], fields["data"]), entry_id
+
+
+change_feed = ChangeFeed()
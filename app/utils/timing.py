@@ -0,0 +1,97 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from fastapi_cache.types import Backend
+
+AUTH = "auth"
+CACHE = "cache"
+DB = "db"
+STORAGE = "storage"
+RENDER = "render"
+RATE_LIMIT = "ratelimit"
+IDEMPOTENCY = "idempotency"
+
+
+class RequestTimings:
+    """Накопленное время запроса по категориям: {категория: [секунды, вызовы]}."""
+
+    __slots__ = ("categories",)
+
+    def __init__(self):
+        self.categories: dict[str, list] = {}
+
+    def add(self, category: str, elapsed: float):
+        entry = self.categories.get(category)
+        if entry is None:
+            self.categories[category] = [elapsed, 1]
+        else:
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request() -> Tuple[RequestTimings, Any]:
+    timings = RequestTimings()
+    return timings, _timings.set(timings)
+
+
+def end_request(token):
+    _timings.reset(token)
+
+
+def record(category: str, elapsed: float):
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(category, elapsed)
+
+
+@contextmanager
+def measure(category: str):
+    # Без активного запроса (фон, CLI, выключенный Server-Timing) — только get()
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(category, time.perf_counter() - started)
+
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with measure(RENDER):
+            return super().render(content)
+
+
+class TimedCacheBackend(Backend):
+    """Обёртка бэкенда fastapi-cache, относящая время обращений к категории cache."""
+
+    def __init__(self, backend: Backend):
+        self.backend = backend
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        with measure(CACHE):
+            return await self.backend.get_with_ttl(key)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with measure(CACHE):
+            return await self.backend.get(key)
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        with measure(CACHE):
+            return await self.backend.set(key, value, expire)
+
+    async def clear(
+        self, namespace: Optional[str] = None, key: Optional[str] = None
+    ) -> int:
+        with measure(CACHE):
+            return await self.backend.clear(namespace, key)
@@ -0,0 +1,37 @@
+from opentelemetry import trace
+
+
+def current_trace_id() -> str | None:
+    """Идентификатор текущей трассы для логов или None вне трассы."""
+    context = trace.get_current_span().get_span_context()
+    if not context.is_valid:
+        return None
+    return format(context.trace_id, "032x")
+
+
+def set_span_attributes(**attributes):
+    """
+    Атрибуты на текущий спан (обычно серверный спан запроса) — по ним
+    ищутся трассы: компания, пользователь, число строк. Вне записи ничего
+    не делает, поэтому дёшево при сэмплировании.
+    """
+    span = trace.get_current_span()
+    if not span.is_recording():
+        return
+    for name, value in attributes.items():
+        if value is not None:
+            span.set_attribute(
+                name, value if isinstance(value, (bool, int, float)) else str(value)
+            )
+
+
+def annotate_context(context):
+    """Пользователь и компания из контекста прав — на спан запроса."""
+    if isinstance(context, dict):
+        set_span_attributes(
+            **{
+                "app.user_id": context.get("user_id"),
+                "app.company_id": context.get("company_id"),
+                "app.is_superadmin": context.get("is_superadmin"),
+            }
+        )
@@ -0,0 +1,153 @@
+import asyncio
+import datetime
+import zipfile
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional, Sequence
+
+# Уже сжатые форматы кладём в архив без компрессии (store mode)
+STORED_EXTENSIONS = {
+    "7z",
+    "avi",
+    "bz2",
+    "docx",
+    "gif",
+    "gz",
+    "heic",
+    "jpeg",
+    "jpg",
+    "mkv",
+    "mov",
+    "mp3",
+    "mp4",
+    "odp",
+    "ods",
+    "odt",
+    "pdf",
+    "png",
+    "pptx",
+    "rar",
+    "webp",
+    "xlsx",
+    "xz",
+    "zip",
+    "zst",
+}
+
+
+@dataclass
+class ZipEntry:
+    arcname: str
+    key: str
+    extension: str = ""
+    codec: str = "identity"
+    modified_at: Optional[datetime.datetime] = None
+
+
+class _ZipSink:
+    """Несикаемый приёмник для zipfile: копит байты до следующего drain()."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_info(entry: ZipEntry) -> zipfile.ZipInfo:
+    modified_at = entry.modified_at or datetime.datetime.now()
+    date_time = modified_at.timetuple()[:6]
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)
+    info = zipfile.ZipInfo(entry.arcname, date_time=date_time)
+    info.external_attr = 0o644 << 16
+    if entry.extension.lower() in STORED_EXTENSIONS:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+async def _fetch(
+    open_stream: Callable[[ZipEntry], AsyncIterator[bytes]],
+    entry: ZipEntry,
+    queue: asyncio.Queue,
+):
+    try:
+        async for chunk in open_stream(entry):
+            await queue.put(chunk)
+        await queue.put(None)
+    except Exception as e:
+        await queue.put(e)
+
+
+async def stream_zip(
+    entries: Sequence[ZipEntry],
+    open_stream: Callable[[ZipEntry], AsyncIterator[bytes]],
+    concurrency: int = 4,
+    buffer_chunks: int = 4,
+) -> AsyncIterator[bytes]:
+    """
+    Собирает ZIP на лету. Одновременно читается не больше `concurrency`
+    объектов, у каждого в очереди не больше `buffer_chunks` чанков, поэтому
+    пиковая память не зависит от размера архива.
+    """
+    sink = _ZipSink()
+    pending: deque = deque()
+    next_index = 0
+
+    def _schedule():
+        nonlocal next_index
+        while next_index < len(entries) and len(pending) < concurrency:
+            entry = entries[next_index]
+            queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_chunks)
+            task = asyncio.create_task(_fetch(open_stream, entry, queue))
+            pending.append((entry, queue, task))
+            next_index += 1
+
+    try:
+        with zipfile.ZipFile(sink, mode="w", allowZip64=True) as archive:
+            _schedule()
+            while pending:
+                entry, queue, _ = pending[0]
+                info = _zip_info(entry)
+                deflated = info.compress_type == zipfile.ZIP_DEFLATED
+                with archive.open(info, mode="w", force_zip64=True) as dest:
+                    while True:
+                        chunk = await queue.get()
+                        if chunk is None:
+                            break
+                        if isinstance(chunk, Exception):
+                            raise chunk
+                        if deflated:
+                            await asyncio.to_thread(dest.write, chunk)
+                        else:
+                            dest.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                pending.popleft()
+                _schedule()
+                data = sink.drain()
+                if data:
+                    yield data
+        data = sink.drain()
+        if data:
+            yield data
+    finally:
+        for _, _, task in pending:
+            task.cancel()
@@ -0,0 +1,390 @@
+"""
+Доставка вебхуков.
+
+Очередь — таблица webhook_deliveries. Воркеры всех процессов забирают
+созревшие строки через FOR UPDATE SKIP LOCKED и сразу сдвигают их
+next_attempt_at на время аренды: если процесс умрёт посреди отправки,
+строки снова станут видны после аренды. Перед каждой пачкой аренда
+оставшихся строк продлевается; attempts, увеличенный при захвате, служит
+маркером владельца — строку, перехваченную другим воркером после истечения
+аренды, этот воркер уже не отправит и не обновит. События одного адреса уходят
+пачкой в одном подписанном запросе; быстрые повторы делает tenacity,
+дальше — отложенный повтор через очередь с экспоненциальной паузой.
+Адрес, который подряд падает, отключается предохранителем на время.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Optional
+
+import httpx
+from loguru import logger
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
+from tortoise import Tortoise
+
+from app.database.models import WebhookSubscription
+from app.webhooks.targets import UnsafeWebhookTarget, resolve_webhook_url
+from metrics.webhook_metrics import (
+    webhook_batch_size,
+    webhook_circuit_open_total,
+    webhook_deliveries_total,
+    webhook_delivery_lag_seconds,
+    webhook_request_duration_seconds,
+)
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+TIMESTAMP_HEADER = "X-Webhook-Timestamp"
+ID_HEADER = "X-Webhook-Id"
+_RESOURCE_PATHS = {
+    "contract": ("/api/contracts", "contract_id"),
+    "contract_file": ("/api/contract-files", "contract_file_id"),
+}
+
+_CLAIM_SQL = """
+    WITH due AS (
+        SELECT d.id FROM webhook_deliveries d
+        JOIN webhook_subscriptions s ON s.id = d.subscription_id
+        WHERE d.status = 'pending' AND d.next_attempt_at <= now()
+            AND s.is_active
+            AND (s.disabled_until IS NULL OR s.disabled_until <= now())
+        ORDER BY d.next_attempt_at
+        LIMIT $1
+        FOR UPDATE OF d SKIP LOCKED
+    )
+    UPDATE webhook_deliveries d
+    SET next_attempt_at = now() + make_interval(secs => $2),
+        attempts = d.attempts + 1
+    FROM due WHERE d.id = due.id
+    RETURNING d.id, d.subscription_id, d.event, d.payload, d.attempts,
+        extract(epoch FROM d.created_at) AS created_at
+"""
+# Строки, которые всё ещё принадлежат этому воркеру: ($1 id, $2 attempts)
+_OWNED = """
+    FROM unnest($1::bigint[], $2::int[]) AS owned(id, attempts)
+    WHERE d.id = owned.id AND d.attempts = owned.attempts AND d.status = 'pending'
+"""
+_RENEW_SQL = f"""
+    UPDATE webhook_deliveries d
+    SET next_attempt_at = now() + make_interval(secs => $3)
+    {_OWNED}
+    RETURNING d.id
+"""
+_DELIVERED_SQL = f"""
+    UPDATE webhook_deliveries d
+    SET status = 'delivered', delivered_at = now(), last_error = NULL
+    {_OWNED}
+"""
+# Пауза до повтора: base * 2^(attempts-1) с разбросом ±20%, не больше max
+_RETRY_SQL = f"""
+    UPDATE webhook_deliveries d
+    SET status = CASE WHEN d.attempts >= $3 THEN 'failed' ELSE 'pending' END,
+        next_attempt_at = now() + make_interval(
+            secs => LEAST($4 * power(2, d.attempts - 1), $5) * (0.8 + random() * 0.4)
+        ),
+        last_error = $6
+    {_OWNED}
+    RETURNING d.status
+"""
+_ENDPOINT_OK_SQL = """
+    UPDATE webhook_subscriptions
+    SET failure_count = 0, disabled_until = NULL, last_error = NULL
+    WHERE id = $1 AND (failure_count > 0 OR disabled_until IS NOT NULL)
+"""
+_ENDPOINT_FAILED_SQL = """
+    UPDATE webhook_subscriptions
+    SET failure_count = failure_count + 1,
+        last_error = $2,
+        disabled_until = CASE
+            WHEN failure_count + 1 >= $3 THEN now() + make_interval(secs => $4)
+            ELSE disabled_until
+        END
+    WHERE id = $1
+    RETURNING failure_count
+"""
+
+
+class WebhookError(Exception):
+    def __init__(self, message: str, transient: bool = True):
+        self.transient = transient
+        super().__init__(message)
+
+
+def sign_payload(secret: str, timestamp: int, body: bytes) -> str:
+    """HMAC-SHA256 от "<timestamp>.<тело>" — получатель сверяет тем же секретом."""
+    message = str(timestamp).encode() + b"." + body
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def _is_transient(error: BaseException) -> bool:
+    if isinstance(error, WebhookError):
+        return error.transient
+    return isinstance(error, httpx.TransportError)
+
+
+def _owned(rows: list[dict]) -> tuple[list, list]:
+    return [row["id"] for row in rows], [row["attempts"] for row in rows]
+
+
+class WebhookSender:
+    """Подписанный POST пачки событий с быстрыми повторами на сбоях сети и 5xx."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        attempts: int = 3,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 5.0,
+    ):
+        self.client = client
+        self.attempts = attempts
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+    async def send(self, url: str, secret: str, body: bytes) -> int:
+        batch_id = uuid.uuid4().hex
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(self.attempts),
+            wait=wait_exponential(
+                multiplier=self.backoff_initial, max=self.backoff_max
+            ),
+            retry=retry_if_exception(_is_transient),
+            reraise=True,
+        ):
+            with attempt:
+                target = await self._pin(url)
+                # Метка времени и подпись новые на каждую попытку
+                timestamp = int(time.time())
+                response = await self.client.post(
+                    target,
+                    content=body,
+                    headers={
+                        "Host": httpx.URL(url).netloc.decode("ascii"),
+                        "Content-Type": "application/json",
+                        ID_HEADER: batch_id,
+                        TIMESTAMP_HEADER: str(timestamp),
+                        SIGNATURE_HEADER: sign_payload(secret, timestamp, body),
+                    },
+                    # Сертификат проверяется по имени из адреса, а не по IP
+                    extensions={"sni_hostname": httpx.URL(url).host},
+                )
+                status = response.status_code
+                if status == 429 or status >= 500:
+                    raise WebhookError(f"HTTP {status}")
+                if status >= 400:
+                    raise WebhookError(f"HTTP {status}", transient=False)
+        return status
+
+    async def _pin(self, url: str) -> httpx.URL:
+        """Адрес с проверенным публичным IP вместо имени."""
+        try:
+            addresses = await resolve_webhook_url(url)
+        except UnsafeWebhookTarget as e:
+            raise WebhookError(str(e), transient=False) from e
+        except OSError as e:
+            raise WebhookError(f"DNS: {e}") from e
+        return httpx.URL(url).copy_with(host=addresses[0])
+
+
+class WebhookDispatcher:
+    def __init__(self, settings, client: Optional[httpx.AsyncClient] = None):
+        self.settings = settings
+        self._own_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.WEBHOOK_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+                keepalive_expiry=30,
+            ),
+            headers={"User-Agent": "contract-service-webhooks"},
+        )
+        self.sender = WebhookSender(
+            self.client,
+            attempts=settings.WEBHOOK_SEND_ATTEMPTS,
+            backoff_initial=settings.WEBHOOK_SEND_BACKOFF_SECONDS,
+        )
+        self._semaphore = asyncio.Semaphore(settings.WEBHOOK_CONCURRENCY)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"📮 Доставка вебхуков запущена ({self.settings.WEBHOOK_CONCURRENCY})"
+        )
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._own_client:
+            await self.client.aclose()
+
+    async def _run(self):
+        while True:
+            try:
+                claimed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка цикла доставки вебхуков: {e!r}")
+                claimed = 0
+            # Полная пачка — очередь, скорее всего, не пуста: без паузы
+            if claimed < self.settings.WEBHOOK_CLAIM_LIMIT:
+                await asyncio.sleep(self.settings.WEBHOOK_POLL_SECONDS)
+
+    async def run_once(self) -> int:
+        """Забирает созревшие доставки и отправляет их. Возвращает их число."""
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(
+            _CLAIM_SQL,
+            [self.settings.WEBHOOK_CLAIM_LIMIT, self.settings.WEBHOOK_LEASE_SECONDS],
+        )
+        if not rows:
+            return 0
+
+        by_endpoint: dict[Any, list[dict]] = defaultdict(list)
+        for row in rows:
+            by_endpoint[row["subscription_id"]].append(row)
+        subscriptions = {
+            s.id: s for s in await WebhookSubscription.filter(id__in=list(by_endpoint))
+        }
+        await asyncio.gather(
+            *(
+                self._deliver(subscriptions[sid], endpoint_rows)
+                for sid, endpoint_rows in by_endpoint.items()
+                if sid in subscriptions
+            )
+        )
+        return len(rows)
+
+    async def _deliver(self, subscription: WebhookSubscription, rows: list[dict]):
+        batch = self.settings.WEBHOOK_BATCH_SIZE
+        async with self._semaphore:
+            # Пачки одного адреса — по очереди, чтобы сохранить порядок событий
+            while rows:
+                # Ожидание семафора и предыдущие пачки могли съесть аренду
+                rows = await self._renew(rows)
+                chunk, rows = rows[:batch], rows[batch:]
+                if chunk and not await self._deliver_batch(subscription, chunk):
+                    # Остальное уйдёт после паузы вместе с повтором
+                    await self._retry(rows, "отложено")
+                    break
+
+    async def _renew(self, rows: list[dict]) -> list[dict]:
+        """Продлевает аренду; возвращает строки, которые по-прежнему наши."""
+        if not rows:
+            return rows
+        conn = Tortoise.get_connection("default")
+        result = await conn.execute_query_dict(
+            _RENEW_SQL, [*_owned(rows), self.settings.WEBHOOK_LEASE_SECONDS]
+        )
+        owned = {row["id"] for row in result}
+        if len(owned) < len(rows):
+            logger.warning(
+                f"📮 {len(rows) - len(owned)} доставок забрал другой воркер "
+                "после истечения аренды"
+            )
+        return [row for row in rows if row["id"] in owned]
+
+    async def _deliver_batch(
+        self, subscription: WebhookSubscription, rows: list[dict]
+    ) -> bool:
+        body = json.dumps(
+            {"deliveries": [self._envelope(row) for row in rows]}, default=str
+        ).encode()
+        webhook_batch_size.observe(len(rows))
+        conn = Tortoise.get_connection("default")
+        started = time.perf_counter()
+        try:
+            await self.sender.send(subscription.url, subscription.secret, body)
+        except Exception as e:
+            webhook_request_duration_seconds.observe(time.perf_counter() - started)
+            error = f"{type(e).__name__}: {e}"[:1000]
+            logger.warning(f"📮 Вебхук {subscription.url} не доставлен: {error}")
+            await self._retry(rows, error)
+            await self._endpoint_failed(subscription, error)
+            return False
+
+        webhook_request_duration_seconds.observe(time.perf_counter() - started)
+        await conn.execute_query(_DELIVERED_SQL, list(_owned(rows)))
+        await conn.execute_query(_ENDPOINT_OK_SQL, [subscription.id])
+        webhook_deliveries_total.labels(outcome="delivered").inc(len(rows))
+        now = time.time()
+        for row in rows:
+            webhook_delivery_lag_seconds.observe(max(now - float(row["created_at"]), 0))
+        return True
+
+    async def _retry(self, rows: list[dict], error: str):
+        if not rows:
+            return
+        conn = Tortoise.get_connection("default")
+        result = await conn.execute_query_dict(
+            _RETRY_SQL,
+            [
+                *_owned(rows),
+                self.settings.WEBHOOK_MAX_ATTEMPTS,
+                self.settings.WEBHOOK_RETRY_BASE_SECONDS,
+                self.settings.WEBHOOK_RETRY_MAX_SECONDS,
+                error,
+            ],
+        )
+        for row in result:
+            outcome = "failed" if row["status"] == "failed" else "retry"
+            webhook_deliveries_total.labels(outcome=outcome).inc()
+
+    async def _endpoint_failed(self, subscription: WebhookSubscription, error: str):
+        conn = Tortoise.get_connection("default")
+        threshold = self.settings.WEBHOOK_CIRCUIT_THRESHOLD
+        result = await conn.execute_query_dict(
+            _ENDPOINT_FAILED_SQL,
+            [
+                subscription.id,
+                error,
+                threshold,
+                self.settings.WEBHOOK_CIRCUIT_OPEN_SECONDS,
+            ],
+        )
+        if result and result[0]["failure_count"] >= threshold:
+            webhook_circuit_open_total.inc()
+            logger.warning(
+                f"📮 Адрес {subscription.url} отключён на "
+                f"{self.settings.WEBHOOK_CIRCUIT_OPEN_SECONDS} с после "
+                f"{result[0]['failure_count']} ошибок подряд"
+            )
+
+    def _envelope(self, row: dict) -> dict:
+        payload = row["payload"]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        envelope = {
+            "id": row["id"],
+            "event": row["event"],
+            "created_at": float(row["created_at"]),
+            "data": payload,
+        }
+        url = self._resource_url(row["event"], payload)
+        if url:
+            envelope["url"] = url
+        return envelope
+
+    def _resource_url(self, event: str, payload: dict) -> Optional[str]:
+        base = self.settings.WEBHOOK_BASE_URL
+        resource = _RESOURCE_PATHS.get(event.partition(".")[0])
+        if not base or not resource or event.endswith(".deleted"):
+            return None
+        path, key = resource
+        if not payload.get(key):
+            return None
+        return f"{base.rstrip('/')}{path}/{payload[key]}"
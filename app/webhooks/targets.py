@@ -0,0 +1,74 @@
+"""
+Проверка адресов вебхуков.
+
+Адрес задаёт клиент, а запрос уходит из нашей сети, поэтому разрешены
+только https и только публичные адреса: иначе подпиской можно было бы
+опросить Redis, метаданные облака или другие внутренние сервисы, а
+результат прочитать в last_error. Имя проверяется при сохранении подписки
+и ещё раз перед каждой отправкой — DNS мог измениться; отправка идёт на
+уже проверенный IP, чтобы повторное разрешение имени не подменило адрес.
+"""
+
+import asyncio
+import ipaddress
+import socket
+from typing import Union
+from urllib.parse import urlsplit
+
+_BLOCKED_HOSTS = {"localhost", "localhost.localdomain"}
+_BLOCKED_SUFFIXES = (".localhost", ".local", ".internal")
+
+
+class UnsafeWebhookTarget(ValueError):
+    pass
+
+
+def _is_public(ip: Union[ipaddress.IPv4Address, ipaddress.IPv6Address]) -> bool:
+    mapped = getattr(ip, "ipv4_mapped", None)
+    if mapped is not None:
+        ip = mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_webhook_url(url: str) -> str:
+    """Проверка без обращения к DNS: схема, хост и IP, если он указан явно."""
+    parts = urlsplit(url)
+    if parts.scheme != "https":
+        raise UnsafeWebhookTarget("Адрес вебхука должен начинаться с https://")
+    host = (parts.hostname or "").rstrip(".").lower()
+    if not host:
+        raise UnsafeWebhookTarget("В адресе вебхука не указан хост")
+    if parts.username or parts.password:
+        raise UnsafeWebhookTarget("Учётные данные в адресе вебхука не допускаются")
+    if host in _BLOCKED_HOSTS or host.endswith(_BLOCKED_SUFFIXES):
+        raise UnsafeWebhookTarget("Адрес вебхука указывает на внутреннюю сеть")
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return url
+    if not _is_public(ip):
+        raise UnsafeWebhookTarget("Адрес вебхука указывает на внутреннюю сеть")
+    return url
+
+
+async def _resolve_host(host: str, port: int) -> list[str]:
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+async def resolve_webhook_url(url: str) -> list[str]:
+    """
+    Разрешает имя из адреса и возвращает его IP. Если хотя бы один адрес
+    внутренний — UnsafeWebhookTarget; ошибки DNS пробрасываются как OSError.
+    """
+    check_webhook_url(url)
+    parts = urlsplit(url)
+    addresses = await _resolve_host(parts.hostname, parts.port or 443)
+    if not addresses:
+        raise OSError(f"Имя {parts.hostname} не разрешается")
+    for address in addresses:
+        # У IPv6 с зоной (fe80::1%eth0) отрезаем идентификатор зоны
+        if not _is_public(ipaddress.ip_address(address.split("%", 1)[0])):
+            raise UnsafeWebhookTarget("Адрес вебхука указывает на внутреннюю сеть")
+    return addresses
@@ -0,0 +1,97 @@
+"""
+Бенчмарк zstd для хранения файлов контрактов: скорость сжатия/распаковки
+против степени сжатия на разных уровнях.
+
+    python -m benchmarks.compression_bench --level 1 3 6 9 19 [--files путь ...]
+
+Без --files используется синтетический корпус (CSV, XML, TXT, случайные байты).
+Результат — JSON в stdout.
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+import zstandard
+
+
+def _synthetic_corpus(size: int) -> dict[str, bytes]:
+    rnd = random.Random(42)
+    rows = [
+        f"{i},{rnd.randint(10**9, 10**10)},ООО Ромашка {rnd.randint(1, 500)},"
+        f"{rnd.uniform(100, 10**6):.2f},2025-{rnd.randint(1, 12):02d}-01\n"
+        for i in range(size // 60)
+    ]
+    xml = "".join(
+        f'<item id="{i}"><name>Позиция {rnd.randint(1, 999)}</name>'
+        f"<qty>{rnd.randint(1, 50)}</qty></item>\n"
+        for i in range(size // 70)
+    )
+    words = ["договор", "поставка", "сторона", "обязуется", "оплата", "срок", "акт"]
+    text = " ".join(rnd.choice(words) for _ in range(size // 8))
+    return {
+        "csv": "".join(rows).encode()[:size],
+        "xml": xml.encode()[:size],
+        "txt": text.encode()[:size],
+        "random": os.urandom(size),
+    }
+
+
+def _bench(data: bytes, level: int, repeat: int) -> dict:
+    compressor = zstandard.ZstdCompressor(level=level)
+    decompressor = zstandard.ZstdDecompressor()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = io.BytesIO()
+        compressor.copy_stream(io.BytesIO(data), out)
+    compress_time = (time.perf_counter() - start) / repeat
+    compressed = out.getvalue()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decompressor.copy_stream(io.BytesIO(compressed), io.BytesIO())
+    decompress_time = (time.perf_counter() - start) / repeat
+
+    mb = len(data) / 1024 / 1024
+    return {
+        "level": level,
+        "original_bytes": len(data),
+        "compressed_bytes": len(compressed),
+        "ratio": round(len(data) / max(len(compressed), 1), 3),
+        "compress_mb_s": round(mb / compress_time, 1),
+        "decompress_mb_s": round(mb / decompress_time, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--level", type=int, nargs="+", default=[1, 3, 6, 9, 19])
+    parser.add_argument("--files", type=Path, nargs="*")
+    parser.add_argument("--size", type=int, default=4 * 1024 * 1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.files:
+        corpus = {path.name: path.read_bytes() for path in args.files}
+    else:
+        corpus = _synthetic_corpus(args.size)
+
+    results = [
+        {"sample": name, **_bench(data, level, args.repeat)}
+        for name, data in corpus.items()
+        for level in args.level
+    ]
+    print(
+        json.dumps(
+            {"zstd_version": zstandard.__version__, "results": results}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Нагрузочный бенчмарк эндпоинтов контрактов и файлов.
+
+    CONFIG_NAME=Test python -m benchmarks.load.run --concurrency 32 --duration 60 \
+        [--mix contracts_list=40,contract_get=30,...] [--output result.json]
+
+Приложение запускается в том же процессе через httpx.ASGITransport: сеть и
+сериализация HTTP исключены, измеряются маршруты, зависимости и запросы к БД.
+Хранилище подменяется на MemoryStorageBackend, авторизация — токеном
+суперадмина, как в tests/conftest.py. БД должна быть заполнена через
+benchmarks.load.seed. Результат — JSON с RPS и p50/p95/p99 по сценариям.
+"""
+
+import argparse
+import asyncio
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+os.environ.setdefault("CONFIG_NAME", "Test")
+os.environ["STORAGE_BACKEND"] = "memory"
+
+import httpx  # noqa: E402
+from fastapi_cache import FastAPICache  # noqa: E402
+from fastapi_cache.backends.inmemory import InMemoryBackend  # noqa: E402
+from tiacore_lib.handlers.auth_handler import create_access_token  # noqa: E402
+from tiacore_lib.handlers.cache_handler import save_user_to_cache  # noqa: E402
+from tortoise import Tortoise  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.config import ConfigName, _load_settings  # noqa: E402
+from app.database.models import Contract, ContractFile  # noqa: E402
+
+DEFAULT_MIX = {
+    "contracts_list": 35,
+    "contract_get": 30,
+    "contract_create": 5,
+    "files_list": 15,
+    "file_upload": 5,
+    "file_content": 10,
+}
+_SAMPLE_SIZE = 10_000
+
+
+class Scenario:
+    """Пул идентификаторов из БД, из которого сценарии берут цели запросов."""
+
+    def __init__(self, args, contract_ids, files, contract_types, companies):
+        self.args = args
+        self.rnd = random.Random(args.seed)
+        self.contract_ids = contract_ids
+        self.files = files
+        self.contract_types = contract_types
+        self.companies = companies
+        self.upload_body = os.urandom(args.upload_size)
+
+    async def contracts_list(self, client: httpx.AsyncClient) -> httpx.Response:
+        params = {
+            "page": self.rnd.randint(1, self.args.max_page),
+            "page_size": self.args.page_size,
+            "sort_by": self.rnd.choice(["name", "date", "created_at"]),
+            "order": self.rnd.choice(["asc", "desc"]),
+        }
+        if self.rnd.random() < 0.2:
+            params["contract_name"] = f"контрагентом {self.rnd.randint(1, 5000)}"
+        return await client.get("/api/contracts/all", params=params)
+
+    async def contract_get(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.get(f"/api/contracts/{self.rnd.choice(self.contract_ids)}")
+
+    async def contract_create(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.post(
+            "/api/contracts/add",
+            json={
+                "contract_name": f"Бенчмарк {uuid.uuid4().hex[:8]}",
+                "contract_number": str(self.rnd.randint(1, 10**9)),
+                "date": datetime.date.today().isoformat(),
+                "buyer_id": str(uuid.uuid4()),
+                "seller_id": str(uuid.uuid4()),
+                "contract_type_id": self.rnd.choice(self.contract_types),
+                "company_id": str(self.rnd.choice(self.companies)),
+                "responsible_id": str(uuid.uuid4()),
+            },
+        )
+
+    async def files_list(self, client: httpx.AsyncClient) -> httpx.Response:
+        params = {
+            "page": self.rnd.randint(1, self.args.max_page),
+            "page_size": self.args.page_size,
+        }
+        return await client.get("/api/contract-files/all", params=params)
+
+    async def file_upload(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.post(
+            "/api/contract-files/add",
+            data={
+                "contract_file_name": "Бенчмарк",
+                "contract_id": str(self.rnd.choice(self.contract_ids)),
+            },
+            files={"file": ("bench.bin", io.BytesIO(self.upload_body))},
+        )
+
+    async def file_content(self, client: httpx.AsyncClient) -> httpx.Response:
+        file_id, _ = self.rnd.choice(self.files)
+        return await client.get(f"/api/contract-files/{file_id}/content")
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(
+        0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
+
+
+def _summarize(latencies: dict, errors: dict, statuses: dict, elapsed: float) -> dict:
+    endpoints = {}
+    for name in sorted(set(latencies) | set(errors)):
+        values = sorted(latencies.get(name, []))
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": errors.get(name, 0),
+            "statuses": dict(statuses.get(name, {})),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(_percentile(values, 50) * 1000, 3),
+            "p95_ms": round(_percentile(values, 95) * 1000, 3),
+            "p99_ms": round(_percentile(values, 99) * 1000, 3),
+            "max_ms": round((values[-1] if values else 0) * 1000, 3),
+        }
+    total = sum(item["requests"] for item in endpoints.values())
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "total_requests": total,
+        "total_rps": round(total / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+
+def _parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Неизвестный сценарий: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def _load_targets(args, storage):
+    contract_rows = (
+        await Contract.all()
+        .limit(_SAMPLE_SIZE)
+        .values_list("id", "company_id", "contract_type_id")
+    )
+    if not contract_rows:
+        raise SystemExit("БД пуста — сначала запустите benchmarks.load.seed")
+    file_rows = await ContractFile.all().limit(_SAMPLE_SIZE).values_list("id", "s3_key")
+
+    # Кладём в хранилище самого приложения, чтобы file_content не упирался в 404
+    payload = os.urandom(args.download_size)
+    for _, key in file_rows:
+        await storage.put_stream(key, io.BytesIO(payload))
+    return Scenario(
+        args,
+        contract_ids=[row[0] for row in contract_rows],
+        files=file_rows,
+        contract_types=sorted({row[2] for row in contract_rows}),
+        companies=sorted({row[1] for row in contract_rows}),
+    )
+
+
+async def run(args) -> dict:
+    settings = _load_settings(ConfigName(os.environ["CONFIG_NAME"]))
+    await Tortoise.init(
+        config={
+            "connections": {"default": args.db_url or settings.db_url},
+            "apps": {
+                "models": {
+                    "models": ["app.database.models"],
+                    "default_connection": "default",
+                },
+            },
+        }
+    )
+    try:
+        FastAPICache.init(InMemoryBackend())
+        await save_user_to_cache("bench", uuid.uuid4(), True, None, None, None)
+        token = create_access_token({"sub": "bench"}, settings)
+        app = create_app(config_name=ConfigName(os.environ["CONFIG_NAME"]))
+        scenario = await _load_targets(args, app.state.container.storage)
+
+        mix = args.mix or DEFAULT_MIX
+        names = [name for name, weight in mix.items() if weight > 0]
+        weights = [mix[name] for name in names]
+        latencies: dict[str, list[float]] = defaultdict(list)
+        errors: dict[str, int] = defaultdict(int)
+        statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=args.timeout,
+        ) as client:
+
+            async def _worker(deadline: float, record: bool):
+                rnd = random.Random()
+                while time.perf_counter() < deadline:
+                    name = rnd.choices(names, weights)[0]
+                    started = time.perf_counter()
+                    try:
+                        response = await getattr(scenario, name)(client)
+                    except Exception:
+                        if record:
+                            errors[name] += 1
+                        continue
+                    elapsed = time.perf_counter() - started
+                    if not record:
+                        continue
+                    statuses[name][response.status_code] += 1
+                    if response.status_code >= 400:
+                        errors[name] += 1
+                    else:
+                        latencies[name].append(elapsed)
+
+            if args.warmup > 0:
+                deadline = time.perf_counter() + args.warmup
+                await asyncio.gather(
+                    *(_worker(deadline, False) for _ in range(args.concurrency))
+                )
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(
+                *(_worker(deadline, True) for _ in range(args.concurrency))
+            )
+            elapsed = time.perf_counter() - started
+    finally:
+        await Tortoise.close_connections()
+
+    result = _summarize(latencies, errors, statuses, elapsed)
+    result["config"] = {
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "mix": mix,
+        "page_size": args.page_size,
+        "upload_size": args.upload_size,
+        "download_size": args.download_size,
+    }
+    result["environment"] = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+    return result
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк API")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Секунды")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Секунды")
+    parser.add_argument("--mix", type=_parse_mix, help="имя=вес,… (см. DEFAULT_MIX)")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--max-page", type=int, default=50)
+    parser.add_argument("--upload-size", type=int, default=256 * 1024)
+    parser.add_argument("--download-size", type=int, default=256 * 1024)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--output", help="Файл для JSON (по умолчанию stdout)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    result = json.dumps(asyncio.run(run(args)), ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(result + "\n")
+    else:
+        sys.stdout.write(result + "\n")
@@ -0,0 +1,193 @@
+"""
+Заполнение БД синтетическими контрактами для нагрузочного бенчмарка.
+
+    python -m benchmarks.load.seed --contracts 1000000 --companies 50 \
+        --files-per-contract 2 [--db-url postgres://...] [--truncate]
+
+Строки пишутся через COPY пачками, поэтому миллионы записей занимают минуты,
+а не часы. Распределение по компаниям неравномерное (Zipf), как в проде:
+несколько крупных клиентов и длинный хвост мелких.
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import sys
+import time
+import uuid
+
+import asyncpg
+from tortoise import Tortoise
+
+from app.config import ConfigName, _load_settings
+
+CONTRACT_TYPES = [
+    ("delivery", "Договор оказания курьерских услуг", "#b70094"),
+    ("supply", "Договор поставки", "#2f6fdb"),
+    ("lease", "Договор аренды", "#1b9e5a"),
+    ("service", "Договор оказания услуг", "#e08a00"),
+]
+EXTENSIONS = ["pdf", "docx", "xlsx", "txt", "csv"]
+
+_CONTRACT_COLUMNS = [
+    "id",
+    "number",
+    "name",
+    "date",
+    "buyer_id",
+    "seller_id",
+    "company_id",
+    "responsible_id",
+    "contract_type_id",
+    "created_at",
+    "created_by",
+    "modified_at",
+    "modified_by",
+]
+_FILE_COLUMNS = [
+    "id",
+    "name",
+    "extension",
+    "s3_key",
+    "codec",
+    "original_size",
+    "contract_id",
+    "created_at",
+    "created_by",
+    "modified_at",
+    "modified_by",
+]
+
+
+def _company_weights(companies: int) -> list[float]:
+    return [1 / (rank + 1) for rank in range(companies)]
+
+
+def _generate(args, rnd: random.Random):
+    companies = [uuid.UUID(int=rnd.getrandbits(128)) for _ in range(args.companies)]
+    weights = _company_weights(args.companies)
+    users = [uuid.UUID(int=rnd.getrandbits(128)) for _ in range(100)]
+    counterparties = [uuid.UUID(int=rnd.getrandbits(128)) for _ in range(1000)]
+    now = datetime.datetime.now(datetime.timezone.utc)
+    start = datetime.date(2020, 1, 1)
+
+    contracts, files = [], []
+    for i in range(args.contracts):
+        contract_id = uuid.UUID(int=rnd.getrandbits(128))
+        user = rnd.choice(users)
+        created = now - datetime.timedelta(seconds=rnd.randint(0, 5 * 365 * 86400))
+        contracts.append(
+            (
+                contract_id,
+                str(100000 + i),
+                f"Договор {i} с контрагентом {rnd.randint(1, 5000)}",
+                start + datetime.timedelta(days=rnd.randint(0, 5 * 365)),
+                rnd.choice(counterparties),
+                rnd.choice(counterparties),
+                rnd.choices(companies, weights)[0],
+                user,
+                rnd.choice(CONTRACT_TYPES)[0],
+                created,
+                user,
+                created,
+                user,
+            )
+        )
+        for j in range(args.files_per_contract):
+            extension = rnd.choice(EXTENSIONS)
+            files.append(
+                (
+                    uuid.UUID(int=rnd.getrandbits(128)),
+                    f"Приложение {j + 1}",
+                    extension,
+                    f"{args.app}/{contract_id}/file_{j}.{extension}",
+                    "identity",
+                    rnd.randint(10_000, 5_000_000),
+                    contract_id,
+                    created,
+                    user,
+                    created,
+                    user,
+                )
+            )
+        if len(contracts) >= args.batch_size:
+            yield contracts, files
+            contracts, files = [], []
+    if contracts:
+        yield contracts, files
+
+
+async def seed(args) -> dict:
+    await Tortoise.init(
+        config={
+            "connections": {"default": args.db_url},
+            "apps": {
+                "models": {
+                    "models": ["app.database.models"],
+                    "default_connection": "default",
+                },
+            },
+        }
+    )
+    try:
+        await Tortoise.generate_schemas(safe=True)
+    finally:
+        await Tortoise.close_connections()
+
+    conn = await asyncpg.connect(args.db_url)
+    try:
+        if args.truncate:
+            await conn.execute("TRUNCATE contracts, contract_files CASCADE")
+        await conn.executemany(
+            "INSERT INTO contract_types (id, name, colour) VALUES ($1, $2, $3) "
+            "ON CONFLICT (id) DO NOTHING",
+            CONTRACT_TYPES,
+        )
+        started = time.perf_counter()
+        total_contracts = total_files = 0
+        for contracts, files in _generate(args, random.Random(args.seed)):
+            async with conn.transaction():
+                await conn.copy_records_to_table(
+                    "contracts", records=contracts, columns=_CONTRACT_COLUMNS
+                )
+                if files:
+                    await conn.copy_records_to_table(
+                        "contract_files", records=files, columns=_FILE_COLUMNS
+                    )
+            total_contracts += len(contracts)
+            total_files += len(files)
+            print(
+                f"… {total_contracts}/{args.contracts} контрактов",
+                flush=True,
+                file=sys.stderr,
+            )
+        await conn.execute("ANALYZE contracts")
+        await conn.execute("ANALYZE contract_files")
+        return {
+            "contracts": total_contracts,
+            "files": total_files,
+            "companies": args.companies,
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+    finally:
+        await conn.close()
+
+
+def _parse_args():
+    settings = _load_settings(ConfigName(os.getenv("CONFIG_NAME", "Test")))
+    parser = argparse.ArgumentParser(description="Заполнение БД для бенчмарка")
+    parser.add_argument("--contracts", type=int, default=10_000)
+    parser.add_argument("--companies", type=int, default=20)
+    parser.add_argument("--files-per-contract", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-url", default=settings.db_url)
+    parser.add_argument("--app", default=settings.APP, help="Префикс ключей S3")
+    parser.add_argument("--truncate", action="store_true", help="Очистить таблицы")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(asyncio.run(seed(_parse_args())))
@@ -0,0 +1,182 @@
+"""
+Бенчмарк накладных расходов middleware перехвата ошибок: прежний
+CatchAllExceptionsMiddleware на BaseHTTPMiddleware против чистого ASGI
+(RequestContextMiddleware + CatchAllExceptionsMiddleware).
+
+    python -m benchmarks.middleware_bench [--requests 5000] [--chunks 64]
+
+Приложение вызывается напрямую через ASGI, без сети и HTTP-клиента, поэтому
+разница во времени — это стоимость самих middleware. Сценарии: маленький
+JSON-ответ, потоковая выдача и потоковая загрузка. Результат — JSON в stdout.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import traceback
+
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.exceptions.catch_middleware import CatchAllExceptionsMiddleware
+from app.middleware.request_context import RequestContextMiddleware
+
+CHUNK = b"x" * 64 * 1024
+
+
+class LegacyCatchAllExceptionsMiddleware(BaseHTTPMiddleware):
+    """Копия прежней реализации для сравнения."""
+
+    async def dispatch(self, request, call_next):
+        try:
+            response = await call_next(request)
+            if response.status_code == 400:
+                body = await request.body()
+                logger.error("🚨 400 Bad Request от FastAPI")
+                logger.error(f"➡️ URL: {request.url}")
+                logger.error(f"➡️ Headers: {dict(request.headers)}")
+                logger.error(f"➡️ Body: {body.decode('utf-8', errors='ignore')}")
+            return response
+        except Exception as e:
+            tb = traceback.format_exc()
+            logger.critical("🔥 Исключение в middleware!")
+            logger.critical(f"{e}\n{tb}")
+            return JSONResponse(
+                status_code=500, content={"detail": "Internal Server Error"}
+            )
+
+
+def _build_app(middleware: list[Middleware], chunks: int) -> Starlette:
+    async def small(request: Request):
+        return JSONResponse({"id": 1, "name": "Договор поставки"})
+
+    async def download(request: Request):
+        async def _chunks():
+            for _ in range(chunks):
+                yield CHUNK
+
+        return StreamingResponse(_chunks(), media_type="application/octet-stream")
+
+    async def upload(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return JSONResponse({"size": size})
+
+    return Starlette(
+        routes=[
+            Route("/small", small),
+            Route("/download", download),
+            Route("/upload", upload, methods=["POST"]),
+        ],
+        middleware=middleware,
+    )
+
+
+STACKS = {
+    "bare": [],
+    "legacy": [Middleware(LegacyCatchAllExceptionsMiddleware)],
+    "asgi": [
+        Middleware(RequestContextMiddleware),
+        Middleware(CatchAllExceptionsMiddleware),
+    ],
+}
+
+
+async def _call(app, method: str, path: str, chunks: int) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    remaining = chunks if method == "POST" else 1
+    received = 0
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal remaining
+        if remaining:
+            remaining -= 1
+            body = CHUNK if method == "POST" else b""
+            return {"type": "http.request", "body": body, "more_body": remaining > 0}
+        # Тело прочитано — дальше приложение ждёт только отключения клиента
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    return received
+
+
+async def _bench(app, method: str, path: str, requests: int, chunks: int) -> dict:
+    for _ in range(min(50, requests)):
+        await _call(app, method, path, chunks)
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await _call(app, method, path, chunks)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 1),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 1),
+        "p99_us": round(samples[int(len(samples) * 0.99)] * 1e6, 1),
+    }
+
+
+async def _run(requests: int, chunks: int) -> dict:
+    scenarios = {
+        "small": ("GET", "/small", requests),
+        "download": ("GET", "/download", max(1, requests // 10)),
+        "upload": ("POST", "/upload", max(1, requests // 10)),
+    }
+    results = {}
+    for name, (method, path, count) in scenarios.items():
+        results[name] = {}
+        for stack, middleware in STACKS.items():
+            app = _build_app(middleware, chunks)
+            results[name][stack] = await _bench(app, method, path, count, chunks)
+        bare = results[name]["bare"]["mean_us"]
+        for stack in ("legacy", "asgi"):
+            results[name][stack]["overhead_us"] = round(
+                results[name][stack]["mean_us"] - bare, 1
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument(
+        "--chunks", type=int, default=64, help="Чанков по 64 КБ в загрузке/выдаче"
+    )
+    args = parser.parse_args()
+
+    logger.remove()
+    results = asyncio.run(_run(args.requests, args.chunks))
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Микробенчмарки горячего пути чтения: выборка и гидрация моделей Tortoise,
+prefetch_related, сборка ContractSchema/ContractFileSchema, повторная
+валидация response_model в FastAPI и рендеринг JSON.
+
+    python -m benchmarks.serialization_bench --rows 10 100 1000 \
+        [--min-time 0.5] [--db-url postgres://...] \
+        [--output результат.json] [--compare базовый.json]
+
+По умолчанию данные живут в SQLite в памяти, поэтому стадии с запросами
+измеряют ORM, а не сеть. SQLite отдаёт UUID и даты строками, и гидрация
+включает их разбор — для цифр, сравнимых с продом, передайте --db-url
+на пустую базу Postgres. Для каждой стадии — медиана и лучшее время на вызов,
+время на строку и аллокации (tracemalloc: пик и число блоков) за один вызов.
+С --compare печатается отношение медиан к сохранённому прогону; базовый
+прогон (SQLite, 10/100/1000 строк) лежит в benchmarks/baselines/serialization.json.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from tortoise import Tortoise
+
+from app.database.models import Contract, ContractFile, ContractType
+from app.pydantic_models.contract_file_models import (
+    ContractFileListResponseSchema,
+    ContractFileSchema,
+)
+from app.pydantic_models.contract_models import (
+    ContractListResponseSchema,
+    ContractSchema,
+)
+from app.routes.contract_file_route import contract_file_router
+from app.routes.contract_route import contract_router
+
+
+def _route(router, path: str) -> APIRoute:
+    return next(r for r in router.routes if isinstance(r, APIRoute) and r.path == path)
+
+
+async def _setup(db_url: str, max_rows: int):
+    await Tortoise.init(
+        config={
+            "connections": {"default": db_url},
+            "apps": {
+                "models": {
+                    "models": ["app.database.models"],
+                    "default_connection": "default",
+                },
+            },
+        }
+    )
+    await Tortoise.generate_schemas(safe=True)
+    contract_type, _ = await ContractType.get_or_create(
+        id="delivery",
+        defaults={"name": "Договор оказания курьерских услуг", "colour": "#b70094"},
+    )
+    user = uuid.uuid4()
+    contracts = [
+        Contract(
+            id=uuid.uuid4(),
+            number=str(100000 + i),
+            name=f"Договор поставки № {i} с контрагентом",
+            date=datetime.date(2025, 1, 1) + datetime.timedelta(days=i % 365),
+            buyer_id=uuid.uuid4(),
+            seller_id=uuid.uuid4(),
+            company_id=uuid.uuid4(),
+            responsible_id=user,
+            contract_type=contract_type,
+            created_by=user,
+            modified_by=user,
+        )
+        for i in range(max_rows)
+    ]
+    await Contract.bulk_create(contracts, batch_size=500)
+    await ContractFile.bulk_create(
+        [
+            ContractFile(
+                id=uuid.uuid4(),
+                name=f"Приложение к договору {i}",
+                extension="pdf",
+                s3_key=f"contract_app/{contract.id}/file.pdf",
+                contract_id=contract.id,
+                created_by=user,
+                modified_at=contract.modified_at,
+                modified_by=user,
+            )
+            for i, contract in enumerate(contracts)
+        ],
+        batch_size=500,
+    )
+
+
+def _contract_schemas(contracts) -> ContractListResponseSchema:
+    # Повторяет сборку ответа в get_contracts
+    return ContractListResponseSchema(
+        total=len(contracts),
+        contracts=[
+            ContractSchema(
+                contract_id=contract.id,
+                contract_name=contract.name,
+                contract_number=contract.number,
+                date=contract.date,
+                buyer_id=contract.buyer_id,
+                seller_id=contract.seller_id,
+                contract_type_id=contract.contract_type.id,
+                company_id=contract.company_id,
+                responsible_id=contract.responsible_id,
+                modified_by=contract.modified_by,
+                modified_at=contract.modified_at,
+                created_at=contract.created_at,
+                created_by=contract.created_by,
+            )
+            for contract in contracts
+        ],
+    )
+
+
+def _file_schemas(files) -> ContractFileListResponseSchema:
+    # Повторяет сборку ответа в get_contract_files
+    return ContractFileListResponseSchema(
+        total=len(files),
+        contract_files=[
+            ContractFileSchema(
+                contract_file_id=contract_file.id,
+                contract_file_name=contract_file.name,
+                contract_id=contract_file.contract.id,
+                created_at=contract_file.created_at,
+                created_by=contract_file.created_by,
+                modified_at=contract_file.modified_at,
+                modified_by=contract_file.modified_by,
+            )
+            for contract_file in files
+        ],
+    )
+
+
+async def _stages(rows: int) -> dict:
+    """Стадии для `rows` строк; каждая — корутина без аргументов."""
+    conn = Tortoise.get_connection("default")
+    contract_rows = await conn.execute_query_dict(
+        f"SELECT * FROM contracts LIMIT {int(rows)}"
+    )
+    file_rows = await conn.execute_query_dict(
+        f"SELECT * FROM contract_files LIMIT {int(rows)}"
+    )
+    contracts = await Contract.all().limit(rows).prefetch_related("contract_type")
+    files = await ContractFile.all().limit(rows).prefetch_related("contract")
+    contract_response = _contract_schemas(contracts)
+    file_response = _file_schemas(files)
+    contract_field = _route(contract_router, "/all").response_field
+    file_field = _route(contract_file_router, "/all").response_field
+    contract_content = await serialize_response(
+        field=contract_field, response_content=contract_response
+    )
+    file_content = await serialize_response(
+        field=file_field, response_content=file_response
+    )
+
+    async def contracts_fetch():
+        await Contract.all().limit(rows)
+
+    async def contracts_hydrate():
+        [Contract._init_from_db(**row) for row in contract_rows]
+
+    async def contracts_prefetch():
+        await Contract.all().limit(rows).prefetch_related("contract_type")
+
+    async def contracts_schema():
+        _contract_schemas(contracts)
+
+    async def contracts_response_model():
+        await serialize_response(
+            field=contract_field, response_content=contract_response
+        )
+
+    async def contracts_render():
+        JSONResponse(contract_content)
+
+    async def files_fetch():
+        await ContractFile.all().limit(rows)
+
+    async def files_hydrate():
+        [ContractFile._init_from_db(**row) for row in file_rows]
+
+    async def files_prefetch():
+        await ContractFile.all().limit(rows).prefetch_related("contract")
+
+    async def files_schema():
+        _file_schemas(files)
+
+    async def files_response_model():
+        await serialize_response(field=file_field, response_content=file_response)
+
+    async def files_render():
+        JSONResponse(file_content)
+
+    return {
+        "contracts.fetch": contracts_fetch,
+        "contracts.hydrate": contracts_hydrate,
+        "contracts.prefetch": contracts_prefetch,
+        "contracts.schema": contracts_schema,
+        "contracts.response_model": contracts_response_model,
+        "contracts.render": contracts_render,
+        "files.fetch": files_fetch,
+        "files.hydrate": files_hydrate,
+        "files.prefetch": files_prefetch,
+        "files.schema": files_schema,
+        "files.response_model": files_response_model,
+        "files.render": files_render,
+    }
+
+
+async def _measure(stage, rows: int, min_time: float, repeats: int) -> dict:
+    # Подбираем число итераций так, чтобы один замер длился не меньше min_time
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            await stage()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / repeats or loops >= 1_000_000:
+            break
+        loops *= 2
+
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(loops):
+            await stage()
+        timings.append((time.perf_counter() - started) / loops)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        await stage()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(
+        stat.count_diff
+        for stat in after.compare_to(before, "lineno")
+        if stat.count_diff > 0
+    )
+
+    median = statistics.median(timings)
+    return {
+        "median_us": round(median * 1e6, 2),
+        "best_us": round(min(timings) * 1e6, 2),
+        "per_row_us": round(median * 1e6 / rows, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "alloc_blocks": blocks,
+        "loops": loops,
+    }
+
+
+async def run(args) -> dict:
+    try:
+        await _setup(args.db_url, max(args.rows))
+        results = {}
+        for rows in args.rows:
+            for name, stage in (await _stages(rows)).items():
+                results.setdefault(name, {})[str(rows)] = await _measure(
+                    stage, rows, args.min_time, args.repeats
+                )
+    finally:
+        await Tortoise.close_connections()
+    return {
+        "results": results,
+        "environment": {
+            "database": args.db_url.split("://", 1)[0],
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        },
+    }
+
+
+def _compare(current: dict, baseline: dict) -> dict:
+    ratios = {}
+    for name, by_rows in current["results"].items():
+        for rows, stats in by_rows.items():
+            base = baseline.get("results", {}).get(name, {}).get(rows)
+            if base and base["median_us"]:
+                ratios.setdefault(name, {})[rows] = round(
+                    stats["median_us"] / base["median_us"], 3
+                )
+    return ratios
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Микробенчмарки сериализации")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--min-time", type=float, default=0.5, help="Секунды")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--db-url", default="sqlite://:memory:", help="Пустая БД для прогона"
+    )
+    parser.add_argument("--output", help="Файл для JSON (по умолчанию stdout)")
+    parser.add_argument("--compare", help="JSON предыдущего прогона")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            result["ratio_to_baseline"] = _compare(result, json.load(f))
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
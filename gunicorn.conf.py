@@ -1,5 +1,9 @@
+import os
+import shutil
 from multiprocessing import cpu_count
 
+from prometheus_client import multiprocess
+
 # Получаем порт из переменной окружения или 5015
 PORT = 8000
 
@@ -15,10 +19,27 @@ loglevel = "info"
 accesslog = "-"
 errorlog = "-"
 
+# Код приложения импортируется в мастере один раз. Соединения (БД, Redis,
+# S3, RabbitMQ) открываются в lifespan каждого воркера, то есть после fork,
+# и воркер принимает запросы только после прогрева (см. AppContainer)
 preload_app = True
 worker_connections = 1000
 max_requests = 500
 max_requests_jitter = 50
-
-preload_app = True
 lifespan = "on"
+
+# Метрики Prometheus пишутся каждым воркером в общий каталог и агрегируются
+# при отдаче /metrics. Каталог очищается при старте мастера: файлы прошлого
+# запуска исказили бы счётчики. Переменная должна быть выставлена до импорта
+# приложения (preload_app), иначе prometheus_client выберет обычный реестр.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc"
+)
+shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # live*-гейджи завершившегося воркера (в т.ч. по max_requests)
+    # не должны попадать в агрегат
+    multiprocess.mark_process_dead(worker.pid)
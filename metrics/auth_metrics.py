@@ -0,0 +1,12 @@
+from prometheus_client import Counter
+
+permission_cache_requests_total = Counter(
+    "permission_cache_requests_total",
+    "Обращения к L1-кэшу контекстов прав",
+    ["result"],
+)
+permission_cache_evictions_total = Counter(
+    "permission_cache_evictions_total",
+    "Вытесненные записи L1-кэша контекстов прав",
+    ["reason"],
+)
@@ -0,0 +1,64 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+db_query_duration_seconds = Histogram(
+    "db_query_duration_seconds",
+    "Длительность SQL-запроса по нормализованному отпечатку",
+    ["fingerprint", "operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+db_slow_queries_total = Counter(
+    "db_slow_queries_total", "Запросы дольше порога медленного лога", ["fingerprint"]
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request",
+    "Число SQL-запросов на один HTTP-запрос",
+    ["route"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+db_n_plus_one_total = Counter(
+    "db_n_plus_one_total",
+    "HTTP-запросы, повторившие один отпечаток SQL не меньше порога",
+    ["route", "fingerprint"],
+)
+db_pool_size = Gauge(
+    "db_pool_size",
+    "Открытые соединения пула asyncpg",
+    ["connection"],
+    multiprocess_mode="livesum",
+)
+db_pool_in_use = Gauge(
+    "db_pool_in_use",
+    "Соединения пула asyncpg, выданные запросам",
+    ["connection"],
+    multiprocess_mode="livesum",
+)
+db_pool_max_size = Gauge(
+    "db_pool_max_size",
+    "Максимальный размер пула asyncpg",
+    ["connection"],
+    multiprocess_mode="livesum",
+)
+db_pool_acquire_seconds = Histogram(
+    "db_pool_acquire_seconds",
+    "Ожидание свободного соединения в пуле asyncpg",
+    ["connection"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+db_pool_acquire_timeouts_total = Counter(
+    "db_pool_acquire_timeouts_total",
+    "Запросы, не дождавшиеся соединения из пула",
+    ["connection"],
+)
+db_replica_lag_seconds = Gauge(
+    "db_replica_lag_seconds",
+    "Отставание реплики Postgres по последней проверке",
+    multiprocess_mode="livemax",
+)
+db_replica_healthy = Gauge(
+    "db_replica_healthy",
+    "Реплика принимает чтения (1) или они идут в primary (0)",
+    multiprocess_mode="livemin",
+)
+db_reads_total = Counter(
+    "db_reads_total", "ORM-чтения по целевому соединению", ["target"]
+)
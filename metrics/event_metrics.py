@@ -0,0 +1,32 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+user_events_total = Counter(
+    "user_events_total",
+    "События user.* из RabbitMQ по результату обработки",
+    ["event", "outcome"],
+)
+user_event_lag_seconds = Histogram(
+    "user_event_lag_seconds",
+    "Задержка от публикации события до окончания его обработки",
+    buckets=(0.05, 0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600),
+)
+user_event_handle_seconds = Histogram(
+    "user_event_handle_seconds",
+    "Длительность обработки одного события user.*",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+user_event_batch_size = Histogram(
+    "user_event_batch_size",
+    "Сообщений в пачке потребителя событий user.*",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+user_events_in_flight = Gauge(
+    "user_events_in_flight",
+    "События user.*, полученные воркером и ещё не подтверждённые",
+    multiprocess_mode="livesum",
+)
+user_events_queue_depth = Gauge(
+    "user_events_queue_depth",
+    "Сообщений в очереди событий user.* по последнему объявлению очереди",
+    multiprocess_mode="livemax",
+)
@@ -0,0 +1,28 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+extraction_files_total = Counter(
+    "extraction_files_total",
+    "Обработанные файлы контрактов в пайплайне извлечения текста",
+    ["status"],
+)
+extraction_bytes_total = Counter(
+    "extraction_bytes_total", "Объём файлов, прошедших извлечение текста"
+)
+extraction_duration_seconds = Histogram(
+    "extraction_duration_seconds",
+    "Время извлечения текста из одного файла",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+extraction_queue_depth = Gauge(
+    "extraction_queue_depth",
+    "Файлы в очереди на извлечение текста",
+    multiprocess_mode="livesum",
+)
+extraction_backfill_remaining = Gauge(
+    "extraction_backfill_remaining",
+    "Файлы без извлечённого текста (backfill)",
+    multiprocess_mode="mostrecent",
+)
+extraction_dropped_total = Counter(
+    "extraction_dropped_total", "Файлы, не попавшие в переполненную очередь"
+)
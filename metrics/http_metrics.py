@@ -0,0 +1,64 @@
+from typing import Optional, Sequence
+
+from prometheus_client import Gauge, Histogram
+
+DEFAULT_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DEFAULT_SIZE_BUCKETS = (
+    256,
+    1024,
+    4096,
+    16384,
+    65536,
+    262144,
+    1048576,
+    4194304,
+    16777216,
+)
+
+
+class HttpMetrics:
+    def __init__(
+        self,
+        duration_buckets: Sequence[float] = DEFAULT_DURATION_BUCKETS,
+        size_buckets: Sequence[float] = DEFAULT_SIZE_BUCKETS,
+    ):
+        labels = ["route", "method", "status"]
+        self.duration = Histogram(
+            "http_request_duration_seconds",
+            "Длительность обработки HTTP-запроса",
+            labels,
+            buckets=duration_buckets,
+        )
+        self.request_size = Histogram(
+            "http_request_size_bytes",
+            "Размер тела HTTP-запроса",
+            labels,
+            buckets=size_buckets,
+        )
+        self.response_size = Histogram(
+            "http_response_size_bytes",
+            "Размер тела HTTP-ответа",
+            labels,
+            buckets=size_buckets,
+        )
+        # Шаблон маршрута известен только после роутинга, поэтому только метод
+        self.inflight = Gauge(
+            "http_requests_inflight",
+            "HTTP-запросы в обработке",
+            ["method"],
+            multiprocess_mode="livesum",
+        )
+
+
+_http_metrics: Optional[HttpMetrics] = None
+
+
+def get_http_metrics(
+    duration_buckets: Sequence[float] = DEFAULT_DURATION_BUCKETS,
+    size_buckets: Sequence[float] = DEFAULT_SIZE_BUCKETS,
+) -> HttpMetrics:
+    # Метрики регистрируются один раз на процесс — повторный create_app их переиспользует
+    global _http_metrics
+    if _http_metrics is None:
+        _http_metrics = HttpMetrics(duration_buckets, size_buckets)
+    return _http_metrics
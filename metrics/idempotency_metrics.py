@@ -0,0 +1,12 @@
+from prometheus_client import Counter, Histogram
+
+idempotency_requests_total = Counter(
+    "idempotency_requests_total",
+    "Запросы с Idempotency-Key по исходу",
+    ["outcome"],
+)
+idempotency_wait_seconds = Histogram(
+    "idempotency_wait_seconds",
+    "Ожидание повтором завершения исходного запроса с тем же ключом",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
@@ -1,5 +1,9 @@
 import logging
+import os
+import queue
+import random
 import sys
+import threading
 
 from loguru import logger
 from prometheus_client import Counter
@@ -11,6 +15,26 @@ error_counter_by_user = Counter(
     "Total number of errors per user",
     ["user_id", "login", "role"],
 )
+log_records_dropped = Counter(
+    "log_records_dropped_total",
+    "Записи логов, отброшенные из-за переполнения очереди",
+    ["sink"],
+)
+
+TEXT_FORMAT = """{time:YYYY-MM-DDTHH:mm:ss.SSSZ} | {level} 
+        | {name}:{function}:{line} - {message}"""
+FILE_FORMAT = """{time:YYYY-MM-DD HH:mm:ss} | {level:<8}
+          | {name}:{function}:{line} - {message}"""
+
+STDLIB_LOGGERS = (
+    "uvicorn",
+    "uvicorn.error",
+    "uvicorn.access",
+    "fastapi",
+    "gunicorn",
+    "gunicorn.access",
+    "gunicorn.error",
+)
 
 
 def exclude_metrics_log(record):
@@ -36,69 +60,249 @@ def prometheus_hook(message):
             print(f"[PrometheusHook] Ошибка при инкременте метрик: {e}")
 
 
+# Запись logging, которая сейчас передаётся в loguru (см. InterceptHandler)
+_local = threading.local()
+
+
+def _level_no(level) -> int:
+    if isinstance(level, int):
+        return level
+    return logger.level(str(level).upper()).no
+
+
+def _match_prefix(name: str, table: dict):
+    # Самый длинный префикс модуля: "app.routes" перекрывает "app"
+    best, best_len = None, -1
+    for prefix, value in table.items():
+        if len(prefix) <= best_len:
+            continue
+        if not prefix or name == prefix or name.startswith(prefix + "."):
+            best, best_len = value, len(prefix)
+    return best
+
+
+class LogPolicy:
+    """Уровни по модулям и сэмплирование INFO и ниже.
+
+    Решение для имени модуля кэшируется: набор модулей конечен, а проверка
+    выполняется на каждую запись. Решение о сэмплировании принимается один
+    раз на запись, чтобы stdout и файл получали одинаковый поток.
+    """
+
+    def __init__(self, level="DEBUG", levels=None, sample_rates=None):
+        self.level = _level_no(level)
+        self.levels = {k: _level_no(v) for k, v in (levels or {}).items()}
+        self.sample_rates = dict(sample_rates or {})
+        self.min_level = min([self.level, *self.levels.values()])
+        self._cache: dict[str, tuple[int, float]] = {}
+
+    def _resolve(self, name: str) -> tuple[int, float]:
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        level = _match_prefix(name, self.levels)
+        rate = _match_prefix(name, self.sample_rates)
+        resolved = (
+            self.level if level is None else level,
+            1.0 if rate is None else float(rate),
+        )
+        self._cache[name] = resolved
+        return resolved
+
+    def allows(self, name, levelno: int) -> bool:
+        level, rate = self._resolve(name or "")
+        if levelno < level:
+            return False
+        if levelno <= logging.INFO and rate < 1.0:
+            return random.random() < rate
+        return True
+
+    def filter(self, record) -> bool:
+        # Записи из logging уже прошли проверку в InterceptHandler
+        if getattr(_local, "record", None) is None:
+            last = getattr(_local, "decision", None)
+            if last is not None and last[0] is record:
+                keep = last[1]
+            else:
+                keep = self.allows(record["name"], record["level"].no)
+                _local.decision = (record, keep)
+            if not keep:
+                return False
+        return exclude_metrics_log(record)
+
+
+class QueueSink:
+    """Неблокирующий sink: запись кладётся в ограниченную очередь и пишется
+    в поток фоновым потоком. При переполнении запись отбрасывается и
+    учитывается в log_records_dropped_total — логирование не тормозит
+    обработку запросов.
+    """
+
+    def __init__(self, stream, maxsize: int = 10000, name: str = "stdout"):
+        self._stream = stream
+        self._maxsize = maxsize
+        self._dropped = log_records_dropped.labels(sink=name)
+        self._pid = None
+        self._start()
+
+    def _start(self):
+        # После fork (preload_app в gunicorn) поток мастера в воркере
+        # не существует — очередь и поток создаются заново
+        self._pid = os.getpid()
+        self._queue = queue.Queue(self._maxsize)
+        self._thread = threading.Thread(
+            target=self._drain, args=(self._queue,), name="log-sink", daemon=True
+        )
+        self._thread.start()
+
+    def _drain(self, q):
+        stream = self._stream
+        while True:
+            message = q.get()
+            if message is None:
+                break
+            try:
+                stream.write(message)
+                if q.empty():
+                    stream.flush()
+            except Exception:
+                pass
+
+    def write(self, message):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self._dropped.inc()
+
+    def stop(self):
+        if self._pid != os.getpid():
+            return
+        try:
+            self._queue.put(None, timeout=1)
+        except queue.Full:
+            return
+        self._thread.join(timeout=1)
+
+
 # 🔁 Перехват логов из logging в loguru
 class InterceptHandler(logging.Handler):
+    """Передаёт записи logging в loguru.
+
+    Вместо обхода стека на каждую запись имя модуля, функция и строка
+    берутся из самой LogRecord через патчер; уровень и сэмплирование
+    проверяются до форматирования сообщения.
+    """
+
+    def __init__(self, policy: LogPolicy | None = None):
+        super().__init__()
+        self.policy = policy or LogPolicy()
+        self._levels: dict[str, str | int] = {}
+        self._logger = logger.patch(self._patch)
+
+    @staticmethod
+    def _patch(record):
+        origin = getattr(_local, "record", None)
+        if origin is None:
+            return
+        record["name"] = origin.name
+        record["function"] = origin.funcName
+        record["line"] = origin.lineno
+        record["module"] = origin.module
+
+    def _level(self, record):
+        try:
+            return self._levels[record.levelname]
+        except KeyError:
+            try:
+                level = logger.level(record.levelname).name
+            except ValueError:
+                level = record.levelno
+            self._levels[record.levelname] = level
+            return level
+
     def emit(self, record):
+        if not self.policy.allows(record.name, record.levelno):
+            return
+
         message = record.getMessage()
 
         # 💡 Отфильтровываем /metrics для access-логов
         if "GET /metrics" in message and ("200" in message or "307" in message):
             return
 
+        _local.record = record
         try:
-            level = logger.level(record.levelname).name
-        except Exception:
-            level = record.levelno
+            self._logger.opt(exception=record.exc_info).log(
+                self._level(record), message
+            )
+        finally:
+            _local.record = None
 
-        frame, depth = logging.currentframe(), 2
-        while frame and frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
 
-        logger.opt(depth=depth, exception=record.exc_info).log(level, message)
+# 🛠 Настройка логгера
+def setup_logger(settings=None):
+    """Настраивает loguru по настройкам приложения.
 
+    Без настроек — режим разработки: текст в stdout и файл, уровень DEBUG.
+    LOG_FORMAT="json" включает структурированный вывод в stdout через
+    ограниченную очередь.
+    """
+    log_format = getattr(settings, "LOG_FORMAT", "text")
+    log_file = getattr(settings, "LOG_FILE", "logs/app.log")
+    diagnose = getattr(settings, "LOG_DIAGNOSE", False)
+    policy = LogPolicy(
+        level=getattr(settings, "LOG_LEVEL", "DEBUG"),
+        levels=getattr(settings, "LOG_LEVELS", None),
+        sample_rates=getattr(settings, "LOG_SAMPLE_RATES", None),
+    )
 
-# 🛠 Настройка логгера
-def setup_logger():
     logger.remove()
 
-    # 🎯 STDOUT для Loki (можно включить serialize=True)
-    logger.add(
-        sys.stdout,
-        level="DEBUG",
-        format="""{time:YYYY-MM-DDTHH:mm:ss.SSSZ} | {level} 
-        | {name}:{function}:{line} - {message}""",
-        enqueue=True,
-        backtrace=True,
-        diagnose=True,
-        filter=exclude_metrics_log,
-    )
+    if log_format == "json":
+        # 🎯 STDOUT для Loki: JSON, без diagnose и без блокировок
+        logger.add(
+            QueueSink(sys.stdout, maxsize=getattr(settings, "LOG_QUEUE_SIZE", 10000)),
+            level=policy.min_level,
+            serialize=True,
+            backtrace=False,
+            diagnose=False,
+            filter=policy.filter,
+        )
+    else:
+        # 🎯 STDOUT
+        logger.add(
+            sys.stdout,
+            level=policy.min_level,
+            format=TEXT_FORMAT,
+            enqueue=True,
+            backtrace=True,
+            diagnose=diagnose,
+            filter=policy.filter,
+        )
 
     # 🧾 Файл логов
-    logger.add(
-        "logs/app.log",
-        level="DEBUG",
-        rotation="10 MB",
-        retention="7 days",
-        format="""{time:YYYY-MM-DD HH:mm:ss} | {level:<8}
-          | {name}:{function}:{line} - {message}""",
-        enqueue=True,
-    )
+    if log_file:
+        logger.add(
+            log_file,
+            level=policy.min_level,
+            rotation="10 MB",
+            retention="7 days",
+            format=FILE_FORMAT,
+            enqueue=True,
+            diagnose=diagnose,
+            filter=policy.filter,
+        )
 
     # 📡 Интеграция Prometheus hook
     logger.add(prometheus_hook, level="ERROR")
 
     # 🔗 Перехват логов
-    logging.basicConfig(handlers=[InterceptHandler()], level=logging.INFO, force=True)
-
-    for name in (
-        "uvicorn",
-        "uvicorn.error",
-        "uvicorn.access",
-        "fastapi",
-        "gunicorn",
-        "gunicorn.access",
-        "gunicorn.error",
-    ):
-        logging.getLogger(name).handlers = [InterceptHandler()]
+    handler = InterceptHandler(policy)
+    logging.basicConfig(handlers=[handler], level=logging.INFO, force=True)
+
+    for name in STDLIB_LOGGERS:
+        logging.getLogger(name).handlers = [handler]
         logging.getLogger(name).setLevel(logging.INFO)
@@ -0,0 +1,12 @@
+from prometheus_client import Counter
+
+rate_limit_rejections_total = Counter(
+    "rate_limit_rejections_total",
+    "Запросы, отклонённые лимитом компании (429)",
+    ["company_id", "endpoint_class"],
+)
+rate_limit_decisions_total = Counter(
+    "rate_limit_decisions_total",
+    "Решения лимитера по источнику: локально, через Redis или без Redis",
+    ["source"],
+)
@@ -0,0 +1,20 @@
+from prometheus_client import Counter, Gauge
+
+reconcile_orphans = Gauge(
+    "reconcile_orphan_objects",
+    "Объекты S3 без записи в contract_files",
+    multiprocess_mode="mostrecent",
+)
+reconcile_dangling_rows = Gauge(
+    "reconcile_dangling_rows",
+    "Записи contract_files без объекта в S3",
+    multiprocess_mode="mostrecent",
+)
+reconcile_deleted_total = Counter(
+    "reconcile_deleted_objects_total", "Удалённые осиротевшие объекты S3"
+)
+reconcile_last_success = Gauge(
+    "reconcile_last_success_timestamp",
+    "Время последней успешной сверки S3 и БД",
+    multiprocess_mode="max",
+)
@@ -0,0 +1,20 @@
+from prometheus_client import Counter, Gauge
+
+sse_connections = Gauge(
+    "sse_connections",
+    "Открытые SSE-подключения к ленте изменений",
+    multiprocess_mode="livesum",
+)
+sse_events_sent_total = Counter(
+    "sse_events_sent_total",
+    "События ленты изменений, отправленные клиентам",
+)
+sse_resyncs_total = Counter(
+    "sse_resyncs_total",
+    "Досылки клиенту из Redis stream по причине",
+    ["reason"],
+)
+sse_resets_total = Counter(
+    "sse_resets_total",
+    "Клиенту предложено перечитать список: история в stream уже обрезана",
+)
@@ -1,30 +1,106 @@
+import importlib
 import platform
 
+from loguru import logger
 from opentelemetry import trace
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind
 
+# Инструментаторы ставятся отдельными пакетами; без пакета спаны этого
+# клиента просто не пишутся
+OPTIONAL_INSTRUMENTORS = (
+    ("opentelemetry.instrumentation.asyncpg", "AsyncPGInstrumentor"),
+    ("opentelemetry.instrumentation.redis", "RedisInstrumentor"),
+    ("opentelemetry.instrumentation.aio_pika", "AioPikaInstrumentor"),
+)
+
+# Пробы и метрики не трассируем
+EXCLUDED_URLS = "metrics,ready"
+
+
+def init_tracer(app, settings):
+    if not settings.OTEL_ENABLED:
+        return None
 
-def init_tracer(app):
     resource = Resource(
         attributes={
-            "service.name": "contract-fastapi",
+            "service.name": settings.OTEL_SERVICE_NAME,
             "host.name": platform.node(),
-            "deployment.environment": "dev",
+            "deployment.environment": settings.OTEL_ENVIRONMENT,
         }
     )
 
-    tracer_provider = TracerProvider(resource=resource)
+    # Решение о записи принимается в начале трассы и наследуется: если
+    # вызывающий сервис уже сэмплировал запрос, мы его тоже пишем целиком
+    sampler = ParentBased(TraceIdRatioBased(settings.OTEL_SAMPLE_RATIO))
+    tracer_provider = TracerProvider(resource=resource, sampler=sampler)
     trace.set_tracer_provider(tracer_provider)
 
     span_processor = BatchSpanProcessor(
         OTLPSpanExporter(
-            endpoint="http://jaeger:4318/v1/traces"  # 👈 это всё
-        )
+            endpoint=settings.OTEL_EXPORTER_ENDPOINT,
+            timeout=settings.OTEL_EXPORTER_TIMEOUT,
+        ),
+        max_queue_size=settings.OTEL_BSP_MAX_QUEUE_SIZE,
+        schedule_delay_millis=settings.OTEL_BSP_SCHEDULE_DELAY_MS,
+        max_export_batch_size=settings.OTEL_BSP_MAX_EXPORT_BATCH_SIZE,
     )
     tracer_provider.add_span_processor(span_processor)
 
-    FastAPIInstrumentor.instrument_app(app)
+    FastAPIInstrumentor.instrument_app(
+        app, tracer_provider=tracer_provider, excluded_urls=EXCLUDED_URLS
+    )
+    for module_name, class_name in OPTIONAL_INSTRUMENTORS:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            logger.info(f"{module_name} не установлен — спаны клиента не пишутся")
+            continue
+        instrumentor = getattr(module, class_name)()
+        if not instrumentor.is_instrumented_by_opentelemetry:
+            instrumentor.instrument(tracer_provider=tracer_provider)
+    instrument_aiobotocore(tracer_provider)
+    return tracer_provider
+
+
+def instrument_aiobotocore(tracer_provider=None):
+    """
+    Спан на каждый вызов API S3 (включая части multipart и страницы
+    листинга). Инструментатор botocore асинхронный клиент aiobotocore
+    не покрывает, поэтому оборачиваем его _make_api_call.
+    """
+    from aiobotocore.client import AioBaseClient
+
+    original = AioBaseClient._make_api_call
+    if getattr(original, "__otel_instrumented__", False):
+        return
+    tracer = trace.get_tracer(__name__, tracer_provider=tracer_provider)
+
+    async def _make_api_call(self, operation_name, api_params):
+        service = self.meta.service_model.service_id
+        attributes = {
+            "rpc.system": "aws-api",
+            "rpc.service": str(service),
+            "rpc.method": operation_name,
+        }
+        if api_params.get("Bucket"):
+            attributes["aws.s3.bucket"] = api_params["Bucket"]
+        if api_params.get("Key"):
+            attributes["aws.s3.key"] = api_params["Key"]
+        with tracer.start_as_current_span(
+            f"{service}.{operation_name}", kind=SpanKind.CLIENT, attributes=attributes
+        ) as span:
+            result = await original(self, operation_name, api_params)
+            status = result.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            if status is not None:
+                span.set_attribute("http.status_code", status)
+            return result
+
+    _make_api_call.__otel_instrumented__ = True
+    _make_api_call.__wrapped_original__ = original
+    AioBaseClient._make_api_call = _make_api_call
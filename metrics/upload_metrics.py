@@ -0,0 +1,28 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+upload_admitted_total = Counter(
+    "upload_admission_admitted_total", "Загрузки файлов, допущенные к обработке"
+)
+upload_rejected_total = Counter(
+    "upload_admission_rejected_total",
+    "Загрузки файлов, отклонённые с 503",
+    ["reason"],
+)
+upload_queue_depth = Gauge(
+    "upload_admission_queue_depth",
+    "Загрузки, ожидающие допуска",
+    multiprocess_mode="livesum",
+)
+upload_inflight = Gauge(
+    "upload_admission_inflight", "Загрузки в обработке", multiprocess_mode="livesum"
+)
+upload_inflight_bytes = Gauge(
+    "upload_admission_inflight_bytes",
+    "Объём загрузок в обработке",
+    multiprocess_mode="livesum",
+)
+upload_wait_seconds = Histogram(
+    "upload_admission_wait_seconds",
+    "Время ожидания допуска загрузки",
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
@@ -0,0 +1,26 @@
+from prometheus_client import Counter, Histogram
+
+webhook_deliveries_total = Counter(
+    "webhook_deliveries_total",
+    "Доставки вебхуков по исходу",
+    ["outcome"],
+)
+webhook_request_duration_seconds = Histogram(
+    "webhook_request_duration_seconds",
+    "Длительность отправки пачки вебхуков с повторами",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+webhook_batch_size = Histogram(
+    "webhook_batch_size",
+    "Событий в одном запросе вебхука",
+    buckets=(1, 2, 5, 10, 25, 50, 100),
+)
+webhook_delivery_lag_seconds = Histogram(
+    "webhook_delivery_lag_seconds",
+    "Время от события до успешной доставки",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600),
+)
+webhook_circuit_open_total = Counter(
+    "webhook_circuit_open_total",
+    "Срабатывания предохранителя адреса вебхука",
+)
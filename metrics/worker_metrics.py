@@ -0,0 +1,12 @@
+from prometheus_client import Gauge, Histogram
+
+worker_ready = Gauge(
+    "worker_ready",
+    "Воркеры, прошедшие прогрев и принимающие трафик",
+    multiprocess_mode="livesum",
+)
+worker_warmup_seconds = Histogram(
+    "worker_warmup_seconds",
+    "Длительность прогрева воркера",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
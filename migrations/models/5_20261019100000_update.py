@@ -0,0 +1,21 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "contract_file_contents" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "text" TEXT NOT NULL,
+    "status" VARCHAR(20) NOT NULL,
+    "error" TEXT,
+    "extracted_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "contract_file_id" UUID NOT NULL UNIQUE REFERENCES "contract_files" ("id") ON DELETE CASCADE
+);
+        CREATE INDEX IF NOT EXISTS "idx_contract_file_contents_tsv"
+    ON "contract_file_contents" USING GIN (to_tsvector('russian', "text"));"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_contract_file_contents_tsv";
+        DROP TABLE IF EXISTS "contract_file_contents";"""
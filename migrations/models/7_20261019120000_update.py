@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "contract_files" ADD "codec" VARCHAR(16) NOT NULL DEFAULT 'identity';
+        ALTER TABLE "contract_files" ADD "original_size" BIGINT;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "contract_files" DROP COLUMN "codec";
+        ALTER TABLE "contract_files" DROP COLUMN "original_size";"""
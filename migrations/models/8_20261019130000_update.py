@@ -0,0 +1,42 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "webhook_subscriptions" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "company_id" UUID NOT NULL,
+    "url" VARCHAR(2048) NOT NULL,
+    "secret" VARCHAR(128) NOT NULL,
+    "events" JSONB NOT NULL,
+    "is_active" BOOL NOT NULL DEFAULT True,
+    "failure_count" INT NOT NULL DEFAULT 0,
+    "disabled_until" TIMESTAMPTZ,
+    "last_error" TEXT,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "created_by" UUID NOT NULL,
+    "modified_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "modified_by" UUID NOT NULL
+);
+        CREATE INDEX IF NOT EXISTS "idx_webhook_sub_company_id"
+    ON "webhook_subscriptions" ("company_id");
+        CREATE TABLE IF NOT EXISTS "webhook_deliveries" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "event" VARCHAR(100) NOT NULL,
+    "payload" JSONB NOT NULL,
+    "status" VARCHAR(20) NOT NULL DEFAULT 'pending',
+    "attempts" INT NOT NULL DEFAULT 0,
+    "next_attempt_at" TIMESTAMPTZ NOT NULL,
+    "last_error" TEXT,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "delivered_at" TIMESTAMPTZ,
+    "subscription_id" UUID NOT NULL REFERENCES "webhook_subscriptions" ("id") ON DELETE CASCADE
+);
+        CREATE INDEX IF NOT EXISTS "idx_webhook_deliveries_due"
+    ON "webhook_deliveries" ("next_attempt_at") WHERE "status" = 'pending';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "webhook_deliveries";
+        DROP TABLE IF EXISTS "webhook_subscriptions";"""
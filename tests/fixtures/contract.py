@@ -3,7 +3,7 @@ from uuid import uuid4
 
 import pytest
 
-from app.database.models import Contract, ContractType
+from app.database.models import Contract, ContractFile, ContractType
 
 
 @pytest.fixture(scope="function")
@@ -32,3 +32,18 @@ async def seed_contract(seed_contract_type: ContractType):
     )
 
     return contract
+
+
+@pytest.fixture(scope="function")
+@pytest.mark.asyncio
+async def seed_contract_file(seed_contract: Contract):
+    contract_file = await ContractFile.create(
+        name="Договор поставки",
+        extension="docx",
+        s3_key=f"contract_app/{seed_contract.id}/contract.docx",
+        contract=seed_contract,
+        created_by=uuid4(),
+        modified_by=uuid4(),
+    )
+
+    return contract_file
@@ -0,0 +1,146 @@
+import asyncio
+import json
+from collections import defaultdict
+
+import pytest
+
+from app.utils.change_feed import CHANGES_CHANNEL, ChangeFeed, _parse_id, stream_key
+
+
+class StreamRedis:
+    """Streams и publish в памяти — ровно то, что использует ChangeFeed."""
+
+    def __init__(self):
+        self.streams = defaultdict(list)
+        self.published = []
+        self.clock = 1000
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+    def xadd_now(self, key, fields, maxlen=None):
+        self.clock += 1
+        entry_id = f"{self.clock}-0"
+        self.streams[key].append((entry_id.encode(), fields))
+        if maxlen is not None:
+            del self.streams[key][:-maxlen]
+        return entry_id.encode()
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    async def xrange(self, key, min="-", max="+", count=None):
+        entries = self.streams.get(key, [])
+        if min.startswith("("):
+            bound = _parse_id(min[1:])
+            entries = [e for e in entries if _parse_id(e[0].decode()) > bound]
+        return entries[:count] if count else list(entries)
+
+    async def xrevrange(self, key, count=None):
+        return list(reversed(self.streams.get(key, [])))[:count]
+
+
+class _Pipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        self.calls.append(lambda: self.redis.xadd_now(key, fields, maxlen))
+
+    def expire(self, key, seconds):
+        self.calls.append(lambda: True)
+
+    async def execute(self):
+        return [call() for call in self.calls]
+
+
+async def _publish(feed: ChangeFeed, redis: StreamRedis, event: str, company: str):
+    await feed.publish(event, company, {"contract_id": event})
+    channel, message = redis.published.pop()
+    assert channel == CHANGES_CHANNEL
+    feed._dispatch(json.loads(message))
+
+
+async def _read(stream, count: int) -> list[bytes]:
+    chunks = []
+    while len(chunks) < count:
+        chunk = await asyncio.wait_for(stream.__anext__(), 1)
+        if not chunk.startswith((b"retry:", b":")):
+            chunks.append(chunk)
+    return chunks
+
+
+def _events(chunks: list[bytes]) -> list[str]:
+    return [chunk.decode().split("\n")[1].removeprefix("event: ") for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_live_events_are_scoped_to_company():
+    """Тест: подключение получает только события своей компании."""
+    redis = StreamRedis()
+    feed = ChangeFeed(heartbeat_seconds=0.05)
+    feed.bind(redis)
+
+    own = feed.stream("c1")
+    everything = feed.stream(None)
+    await own.__anext__()
+    await everything.__anext__()
+
+    await _publish(feed, redis, "contract.created", "c2")
+    await _publish(feed, redis, "contract.updated", "c1")
+
+    assert _events(await _read(own, 1)) == ["contract.updated"]
+    assert _events(await _read(everything, 2)) == [
+        "contract.created",
+        "contract.updated",
+    ]
+    await own.aclose()
+    await everything.aclose()
+    assert feed._count == 0
+
+
+@pytest.mark.asyncio
+async def test_resume_from_last_event_id():
+    """Тест досылки пропущенных событий по Last-Event-ID."""
+    redis = StreamRedis()
+    feed = ChangeFeed(heartbeat_seconds=0.05)
+    feed.bind(redis)
+    for event in ("contract.created", "contract.updated", "contract.deleted"):
+        await _publish(feed, redis, event, "c1")
+    first_id = redis.streams[stream_key("c1")][0][0].decode()
+
+    stream = feed.stream("c1", last_event_id=first_id)
+    assert _events(await _read(stream, 2)) == ["contract.updated", "contract.deleted"]
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_is_resynced_from_stream():
+    """Тест: медленный клиент досылается из stream без потерь."""
+    redis = StreamRedis()
+    feed = ChangeFeed(heartbeat_seconds=0.05, queue_size=2)
+    feed.bind(redis)
+    stream = feed.stream("c1")
+    await stream.__anext__()
+
+    # Клиент не читает, очередь переполняется — события не теряются
+    for i in range(5):
+        await _publish(feed, redis, f"contract.e{i}", "c1")
+
+    assert _events(await _read(stream, 5)) == [f"contract.e{i}" for i in range(5)]
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_trimmed_history_asks_client_to_reload():
+    """Тест: при обрезанной истории клиенту уходит reset."""
+    redis = StreamRedis()
+    feed = ChangeFeed(heartbeat_seconds=0.05, stream_maxlen=2)
+    feed.bind(redis)
+    for i in range(4):
+        await _publish(feed, redis, f"contract.e{i}", "c1")
+
+    stream = feed.stream("c1", last_event_id="1001-0")
+    assert _events(await _read(stream, 1)) == ["reset"]
+    await stream.aclose()
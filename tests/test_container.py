@@ -0,0 +1,42 @@
+import pytest
+from fastapi import Request
+from httpx import ASGITransport, AsyncClient
+from tiacore_lib.config import get_settings
+
+from app import create_app
+from app.config import ConfigName
+from app.dependencies.container import get_s3_manager
+
+
+def test_settings_built_once():
+    """Тест контейнера: настройки создаются один раз и отдаются без парсинга env."""
+    app = create_app(config_name=ConfigName.TEST)
+    container = app.state.container
+
+    provider = app.dependency_overrides[get_settings]
+    assert provider() is container.settings
+    assert provider() is provider()
+    assert container.s3.backend is container.storage
+
+
+def test_s3_manager_dependency():
+    """Тест зависимости менеджера файлов: общий экземпляр из контейнера."""
+    app = create_app(config_name=ConfigName.TEST)
+    request = Request({"type": "http", "app": app})
+    assert get_s3_manager(request) is app.state.container.s3
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint():
+    """Тест /ready: 503 до прогрева, 200 после."""
+    app = create_app(config_name=ConfigName.TEST)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/ready")
+        assert response.status_code == 503
+
+        # В тестовой конфигурации прогрев выключен — готовность сразу
+        await app.state.container.become_ready()
+        response = await client.get("/ready")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}
@@ -0,0 +1,54 @@
+import zipfile
+
+import pytest
+from httpx import AsyncClient
+
+from app.database.models import ContractFile, ContractFileContent
+from app.extraction.extractors import extract_text
+
+
+@pytest.mark.asyncio
+async def test_search_contract_files(
+    test_app: AsyncClient, jwt_token_admin: dict, seed_contract_file: ContractFile
+):
+    """Тест полнотекстового поиска по содержимому файлов."""
+    await ContractFileContent.create(
+        contract_file=seed_contract_file,
+        text="Договор поставки товара: поставщик передаёт товар в течение десяти дней",
+        status="ok",
+    )
+    headers = {"Authorization": f"Bearer {jwt_token_admin['access_token']}"}
+
+    response = await test_app.get(
+        "/api/contract-files/search", headers=headers, params={"q": "поставка товара"}
+    )
+
+    assert response.status_code == 200, (
+        f"Ошибка: {response.status_code}, {response.text}"
+    )
+    response_data = response.json()
+    assert response_data["total"] == 1
+    assert response_data["results"][0]["contract_file_id"] == str(seed_contract_file.id)
+
+    response = await test_app.get(
+        "/api/contract-files/search", headers=headers, params={"q": "аренда помещения"}
+    )
+
+    assert response.status_code == 200, (
+        f"Ошибка: {response.status_code}, {response.text}"
+    )
+    assert response.json()["total"] == 0
+
+
+def test_extract_text_docx(tmp_path):
+    """Тест извлечения текста из DOCX."""
+    path = tmp_path / "contract.docx"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "word/document.xml",
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            "<w:body><w:p><w:r><w:t>Договор </w:t></w:r><w:r><w:t>поставки</w:t></w:r></w:p>"
+            "<w:p><w:r><w:t>Приложение 1</w:t></w:r></w:p></w:body></w:document>",
+        )
+
+    assert extract_text(str(path), "docx", 1000) == "Договор поставки Приложение 1"
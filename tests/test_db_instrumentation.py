@@ -0,0 +1,38 @@
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from app.database.instrumentation import fingerprint
+from app.database.models import Contract
+
+
+def test_fingerprint_normalizes_literals():
+    """Тест нормализации SQL: литералы, параметры и списки IN схлопываются."""
+    sql = "SELECT * FROM t1 WHERE id=$1 AND name='x''y' AND n IN ($2, $3, $4) LIMIT 10"
+    assert (
+        fingerprint(sql)
+        == "SELECT * FROM t1 WHERE id=? AND name=? AND n IN (?+) LIMIT ?"
+    )
+
+
+@pytest.mark.asyncio
+async def test_queries_per_request_recorded(
+    test_app: AsyncClient, jwt_token_admin: dict, seed_contract: Contract
+):
+    """Тест подсчёта SQL-запросов HTTP-запроса: COUNT, страница и prefetch."""
+    headers = {"Authorization": f"Bearer {jwt_token_admin['access_token']}"}
+    labels = {"route": "/api/contracts/all"}
+    before_count = (
+        REGISTRY.get_sample_value("db_queries_per_request_count", labels) or 0
+    )
+    before_sum = REGISTRY.get_sample_value("db_queries_per_request_sum", labels) or 0
+
+    response = await test_app.get("/api/contracts/all", headers=headers)
+    assert response.status_code == 200
+
+    assert REGISTRY.get_sample_value("db_queries_per_request_count", labels) == (
+        before_count + 1
+    )
+    assert REGISTRY.get_sample_value("db_queries_per_request_sum", labels) >= (
+        before_sum + 3
+    )
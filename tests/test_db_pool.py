@@ -0,0 +1,21 @@
+from app.database.config import build_db_connection
+
+
+def test_build_db_connection_pool_settings(test_settings):
+    """Тест параметров пула asyncpg: настройки, приоритет URL и режим PgBouncer."""
+    connection = build_db_connection(
+        test_settings, "postgres://user:pass@db:5432/contracts?maxsize=20"
+    )
+    credentials = connection["credentials"]
+
+    assert connection["engine"] == "app.database.backend"
+    assert int(credentials["maxsize"]) == 20
+    assert credentials["minsize"] == test_settings.DB_POOL_MIN_SIZE
+    assert credentials["statement_cache_size"] == test_settings.DB_STATEMENT_CACHE_SIZE
+
+    pgbouncer = test_settings.model_copy(update={"DB_PGBOUNCER_MODE": True})
+    connection = build_db_connection(pgbouncer, "postgres://user:pass@db:5432/db")
+    assert connection["credentials"]["statement_cache_size"] == 0
+
+    sqlite = build_db_connection(test_settings, "sqlite://:memory:")
+    assert sqlite["engine"] == "tortoise.backends.sqlite"
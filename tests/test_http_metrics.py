@@ -0,0 +1,37 @@
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from app.database.models import Contract
+
+
+def _count(route: str, status: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "http_request_duration_seconds_count",
+            {"route": route, "method": "GET", "status": status},
+        )
+        or 0
+    )
+
+
+@pytest.mark.asyncio
+async def test_http_metrics_route_template(
+    test_app: AsyncClient, jwt_token_admin: dict, seed_contract: Contract
+):
+    """Тест меток HTTP-метрик: шаблон маршрута вместо пути и класс статуса."""
+    headers = {"Authorization": f"Bearer {jwt_token_admin['access_token']}"}
+    route = "/api/contracts/{contract_id}"
+    before = _count(route, "2xx")
+    before_unmatched = _count("__unmatched__", "4xx")
+
+    response = await test_app.get(f"/api/contracts/{seed_contract.id}", headers=headers)
+    assert response.status_code == 200
+    await test_app.get("/no-such-path", headers=headers)
+
+    assert _count(route, "2xx") == before + 1
+    assert _count("__unmatched__", "4xx") == before_unmatched + 1
+    assert REGISTRY.get_sample_value(
+        "http_response_size_bytes_sum",
+        {"route": route, "method": "GET", "status": "2xx"},
+    ) >= len(response.content)
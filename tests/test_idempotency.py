@@ -0,0 +1,135 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+from httpx import ASGITransport, AsyncClient
+
+from app.middleware.idempotency import (
+    BodyFingerprint,
+    IdempotencyMiddleware,
+    IdempotentReplay,
+    check_idempotency,
+    replay_response,
+)
+
+# Токен → пользователь: t1 и t2 — один пользователь до и после обновления токена
+TOKENS = {
+    "Bearer t1": {"user_id": "u1", "company_id": "c1"},
+    "Bearer t2": {"user_id": "u1", "company_id": "c1"},
+    "Bearer other": {"user_id": "u2", "company_id": "c1"},
+}
+
+
+class MemoryRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+async def _context(request: Request) -> dict:
+    context = TOKENS.get(request.headers.get("authorization", ""))
+    if context is None:
+        raise HTTPException(status_code=401, detail="Токен недействителен")
+    await check_idempotency(context)
+    return context
+
+
+def _app(calls: list, delay: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.add_exception_handler(IdempotentReplay, replay_response)
+
+    @app.post("/api/contracts/add", status_code=201)
+    async def _add(payload: dict, context=Depends(_context)):
+        await asyncio.sleep(delay)
+        calls.append(payload)
+        return {"contract_id": len(calls)}
+
+    container = SimpleNamespace(redis=MemoryRedis())
+    app.add_middleware(IdempotencyMiddleware, container=container)
+    return app
+
+
+def _client(app: FastAPI) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_completed_key_is_replayed():
+    """Тест повтора завершённого запроса по ключу идемпотентности."""
+    calls = []
+    headers = {"Idempotency-Key": "abc-1", "Authorization": "Bearer t1"}
+    async with _client(_app(calls)) as client:
+        first = await client.post("/api/contracts/add", json={"n": 1}, headers=headers)
+        refreshed = await client.post(
+            "/api/contracts/add",
+            json={"n": 1},
+            headers={"Idempotency-Key": "abc-1", "Authorization": "Bearer t2"},
+        )
+        other_user = await client.post(
+            "/api/contracts/add",
+            json={"n": 1},
+            headers={"Idempotency-Key": "abc-1", "Authorization": "Bearer other"},
+        )
+        expired = await client.post(
+            "/api/contracts/add",
+            json={"n": 1},
+            headers={"Idempotency-Key": "abc-1", "Authorization": "Bearer old"},
+        )
+        mismatch = await client.post(
+            "/api/contracts/add", json={"n": 2}, headers=headers
+        )
+
+    assert first.status_code == refreshed.status_code == 201
+    assert refreshed.json() == first.json()
+    assert refreshed.headers["idempotent-replayed"] == "true"
+    assert other_user.json() == {"contract_id": 2}
+    assert expired.status_code == 401
+    assert mismatch.status_code == 422
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicate_waits_for_original():
+    """Тест: параллельный дубль ждёт ответа исходного запроса."""
+    calls = []
+    headers = {"Idempotency-Key": "abc-2", "Authorization": "Bearer t1"}
+    async with _client(_app(calls, delay=0.1)) as client:
+        first, second = await asyncio.gather(
+            client.post("/api/contracts/add", json={"n": 1}, headers=headers),
+            client.post("/api/contracts/add", json={"n": 1}, headers=headers),
+        )
+
+    assert len(calls) == 1
+    assert first.json() == second.json() == {"contract_id": 1}
+
+
+def test_fingerprint_ignores_multipart_boundary():
+    """Тест отпечатка тела: граница multipart и размер чанков не важны."""
+
+    def _digest(boundary: bytes, chunk_size: int) -> str:
+        body = (
+            b"--" + boundary + b'\r\nContent-Disposition: form-data; name="file"'
+            b"\r\n\r\n" + b"x" * 100 + b"\r\n--" + boundary + b"--\r\n"
+        )
+        fp = BodyFingerprint(
+            "POST",
+            "/api/contract-files/add",
+            b"multipart/form-data; boundary=" + boundary,
+        )
+        for i in range(0, len(body), chunk_size):
+            fp.update(body[i : i + chunk_size])
+        return fp.hexdigest()
+
+    assert _digest(b"aaaaaaaaaaaa", 7) == _digest(b"bbbbbbbbbbbb", 13)
@@ -0,0 +1,40 @@
+import io
+
+import pytest
+
+from app.storage import LocalStorageBackend
+
+
+@pytest.mark.asyncio
+async def test_local_storage_roundtrip(tmp_path):
+    """Тест локального хранилища: запись, чтение, диапазон, список и удаление."""
+    storage = LocalStorageBackend(str(tmp_path))
+    data = bytes(range(256)) * 1000
+    await storage.put_stream("contract_app/1/act.pdf", io.BytesIO(data))
+    await storage.put_stream("contract_app/1-b/act.pdf", io.BytesIO(b"b"))
+    await storage.put_stream("contract_app/1/a.pdf", io.BytesIO(b"a"))
+
+    chunks = [chunk async for chunk in storage.get_stream("contract_app/1/act.pdf")]
+    assert b"".join(chunks) == data
+    assert await storage.get_range("contract_app/1/act.pdf", 10, 19) == data[10:20]
+
+    target = tmp_path / "copy.bin"
+    with open(target, "wb") as f:
+        assert await storage.download_to("contract_app/1/act.pdf", f) == len(data)
+    assert target.read_bytes() == data
+
+    keys = [obj.key async for obj in storage.list("contract_app/")]
+    assert keys == sorted(keys, key=lambda key: key.encode())
+    assert keys == [
+        "contract_app/1-b/act.pdf",
+        "contract_app/1/a.pdf",
+        "contract_app/1/act.pdf",
+    ]
+
+    await storage.delete_batch(["contract_app/1/a.pdf", "contract_app/missing.pdf"])
+    assert [obj.key async for obj in storage.list("contract_app/1/")] == [
+        "contract_app/1/act.pdf"
+    ]
+
+    with pytest.raises(ValueError):
+        await storage.put_stream("../escape.txt", io.BytesIO(b"x"))
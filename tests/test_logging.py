@@ -0,0 +1,72 @@
+import io
+import json
+import logging
+import time
+
+from loguru import logger
+from prometheus_client import REGISTRY
+
+from metrics.logger import InterceptHandler, LogPolicy, QueueSink
+
+
+def test_log_policy_levels_and_sampling():
+    """Тест политики логов: уровень по самому длинному префиксу и сэмплирование."""
+    policy = LogPolicy(
+        level="INFO",
+        levels={"app.routes": "WARNING", "app.routes.debug": "DEBUG"},
+        sample_rates={"uvicorn.access": 0.0},
+    )
+
+    assert policy.min_level == logging.DEBUG
+    assert policy.allows("app.jobs", logging.INFO)
+    assert not policy.allows("app.routes.contract_route", logging.INFO)
+    assert policy.allows("app.routes.debug", logging.DEBUG)
+    assert not policy.allows("app.routes_extra", logging.DEBUG)
+    # Сэмплирование касается только INFO и ниже
+    assert not policy.allows("uvicorn.access", logging.INFO)
+    assert policy.allows("uvicorn.access", logging.WARNING)
+
+
+def test_queue_sink_drops_on_overflow():
+    """Тест очереди логов: при переполнении записи отбрасываются и считаются."""
+
+    class SlowStream(io.StringIO):
+        def write(self, message):
+            time.sleep(0.05)
+            return super().write(message)
+
+    labels = {"sink": "test-overflow"}
+    before = REGISTRY.get_sample_value("log_records_dropped_total", labels) or 0
+    sink = QueueSink(SlowStream(), maxsize=2, name="test-overflow")
+    for i in range(20):
+        sink.write(f"{i}\n")
+    sink.stop()
+
+    dropped = REGISTRY.get_sample_value("log_records_dropped_total", labels) - before
+    assert dropped >= 10
+
+
+def test_intercept_handler_keeps_stdlib_origin():
+    """Тест перехвата logging: JSON-запись содержит имя исходного логгера."""
+    stream = io.StringIO()
+    policy = LogPolicy(level="DEBUG", sample_rates={"test.sampled": 0.0})
+    handler_id = logger.add(stream, serialize=True, filter=policy.filter)
+    std_logger = logging.getLogger("test.origin")
+    std_logger.addHandler(InterceptHandler(policy))
+    std_logger.propagate = False
+    std_logger.setLevel(logging.INFO)
+    sampled = logging.getLogger("test.sampled")
+    sampled.addHandler(InterceptHandler(policy))
+    sampled.propagate = False
+    try:
+        std_logger.info("запрос %s", "{не формат}")
+        sampled.info("не попадёт в вывод")
+    finally:
+        logger.remove(handler_id)
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])["record"]
+    assert record["name"] == "test.origin"
+    assert record["message"] == "запрос {не формат}"
+    assert record["function"] == "test_intercept_handler_keeps_stdlib_origin"
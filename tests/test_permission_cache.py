@@ -0,0 +1,130 @@
+import asyncio
+import base64
+import json
+import time
+from typing import Optional
+
+import pytest
+from fastapi import Depends, FastAPI, Security
+from fastapi.security import HTTPBearer
+from httpx import ASGITransport, AsyncClient
+
+from app.dependencies.permission_cache import (
+    PermissionContextCache,
+    cached_dependency,
+    subjects_from_event,
+)
+
+
+def _token(claims: dict) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=")
+    return f"header.{payload.decode()}.signature"
+
+
+def _app(cache: PermissionContextCache, calls: list) -> FastAPI:
+    async def load_user(credentials=Security(HTTPBearer())):
+        calls.append(credentials.credentials)
+        return {"user_id": "user-1", "company_id": "company-1"}
+
+    async def context(company: Optional[str] = None, user=Depends(load_user)):
+        return {**user, "company": company}
+
+    app = FastAPI()
+    dependency = cached_dependency(context, "view_contract", cache)
+
+    @app.get("/context")
+    async def read_context(ctx=Depends(dependency)):
+        return ctx
+
+    return app
+
+
+def test_cache_ttl_lru_and_subject_eviction():
+    """Тест кэша: вытеснение по LRU, по пользователю и по сроку токена."""
+    cache = PermissionContextCache(maxsize=2, ttl_seconds=60)
+    cache.put("a", {"n": 1}, ["alice"])
+    cache.put("b", {"n": 2}, ["bob"])
+    assert cache.get("a") == {"n": 1}
+    cache.put("c", {"n": 3}, ["alice"])
+    assert cache.get("b") is None  # самая старая по использованию
+
+    assert cache.evict_subjects(["alice"]) == 2
+    assert len(cache) == 0
+
+    cache.put("expired", {"n": 4}, ["carol"], expires_in=-1)
+    assert cache.get("expired") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_dependency_hits_and_evicts():
+    """Тест обёртки: повтор берётся из кэша, параметры и события дают промах."""
+    cache = PermissionContextCache(maxsize=100, ttl_seconds=60)
+    calls: list = []
+    app = _app(cache, calls)
+    token = _token({"sub": "alice", "exp": time.time() + 3600})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/context", headers=headers)
+        second = await client.get("/context", headers=headers)
+        assert first.json() == second.json()
+        assert len(calls) == 1
+
+        other = await client.get("/context?company=c2", headers=headers)
+        assert other.json()["company"] == "c2"
+        assert len(calls) == 2
+
+        cache.evict_subjects(subjects_from_event(b'{"data": {"login": "alice"}}'))
+        await client.get("/context", headers=headers)
+        assert len(calls) == 3
+
+        response = await client.get("/context")
+        assert response.status_code == 403
+
+    schemes = app.openapi()["components"]["securitySchemes"]
+    assert "HTTPBearer" in schemes
+
+
+@pytest.mark.asyncio
+async def test_eviction_during_resolve_is_not_lost():
+    """Тест: контекст, вычисленный до вытеснения пользователя, не кэшируется."""
+    cache = PermissionContextCache(maxsize=100, ttl_seconds=60)
+    calls: list = []
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_context(credentials=Security(HTTPBearer())):
+        calls.append(credentials.credentials)
+        started.set()
+        await release.wait()
+        return {"user_id": "user-1", "permissions": ["old"]}
+
+    app = FastAPI()
+    dependency = cached_dependency(slow_context, "view_contract", cache)
+
+    @app.get("/context")
+    async def read_context(ctx=Depends(dependency)):
+        return ctx
+
+    token = _token({"sub": "alice", "exp": time.time() + 3600})
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        for evict in (
+            lambda: cache.evict_subjects(["user-1"]),
+            cache.clear,
+        ):
+            started.clear()
+            release.clear()
+            request = asyncio.create_task(client.get("/context", headers=headers))
+            await started.wait()
+            evict()
+            release.set()
+            await request
+            assert len(cache) == 0
+
+        release.set()
+        await client.get("/context", headers=headers)
+        await client.get("/context", headers=headers)
+    assert len(calls) == 3
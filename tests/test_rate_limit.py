@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.middleware.rate_limit import (
+    RateLimiter,
+    RateLimitMiddleware,
+    endpoint_class,
+    enforce_rate_limit,
+)
+
+
+class BucketScript:
+    """Тот же контракт, что у Lua-скрипта, без пополнения."""
+
+    def __init__(self):
+        self.calls = 0
+        self.tokens = {}
+
+    async def __call__(self, keys, args):
+        # Как сетевой вызов: отдаёт управление другим запросам
+        await asyncio.sleep(0)
+        self.calls += 1
+        capacity, rate, debt, cost = args
+        tokens = self.tokens.get(keys[0], capacity) - debt
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self.tokens[keys[0]] = tokens
+        retry_after = 0 if allowed else (cost - tokens) / rate
+        return [int(allowed), str(tokens).encode(), str(retry_after).encode()]
+
+
+def _limiter(capacity: int = 10) -> tuple[RateLimiter, BucketScript]:
+    limiter = RateLimiter({"read": capacity}, {"read": 1}, local_fraction=0.5)
+    script = limiter._script = BucketScript()
+    return limiter, script
+
+
+def test_endpoint_class():
+    """Тест определения класса эндпоинта: чтение, запись, файлы."""
+    assert endpoint_class("GET", "/api/contracts/all") == "read"
+    assert endpoint_class("POST", "/api/contracts/add") == "write"
+    assert endpoint_class("GET", "/api/contract-files/1/download") == "file"
+
+
+@pytest.mark.asyncio
+async def test_local_precheck_defers_to_redis():
+    """Тест локальной предпроверки: при малом запасе решение за Redis."""
+    limiter, script = _limiter(capacity=10)
+    decisions = [await limiter.acquire("company:1", "read") for _ in range(10)]
+
+    assert all(decision.allowed for decision in decisions)
+    # Первый ответ Redis оставил 9 токенов: 4 запроса прошли локально,
+    # дальше запас меньше половины ёмкости и каждый идёт в Redis
+    assert script.calls == 6
+    assert script.tokens["contract-service:ratelimit:read:company:1"] == 0
+
+    rejected = await limiter.acquire("company:1", "read")
+    assert not rejected.allowed
+    assert rejected.headers()["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_acquire_sends_local_debt_once():
+    """Тест: параллельные запросы отправляют локальный долг в Redis один раз."""
+    limiter, script = _limiter(capacity=10)
+    key = "contract-service:ratelimit:read:company:1"
+    for _ in range(5):
+        await limiter.acquire("company:1", "read")
+    assert limiter._local[key].debt == 4
+    limiter._local[key].synced -= 10  # локальное окно истекло
+
+    decisions = await asyncio.gather(
+        *(limiter.acquire("company:1", "read") for _ in range(3))
+    )
+
+    assert all(decision.allowed for decision in decisions)
+    # 10 - 1 - 4 локальных - 3 параллельных
+    assert script.tokens[key] == 2
+
+
+@pytest.mark.asyncio
+async def test_fail_open_without_redis():
+    """Тест: без Redis запросы пропускаются."""
+    limiter, _ = _limiter()
+
+    async def _broken(keys, args):
+        raise ConnectionError("redis down")
+
+    limiter._script = _broken
+    assert await limiter.acquire("company:1", "read") is None
+
+
+@pytest.mark.asyncio
+async def test_rejects_with_headers():
+    """Тест отказа 429 и заголовков RateLimit в ответе."""
+    limiter, _ = _limiter(capacity=2)
+    app = FastAPI()
+
+    async def context():
+        context = {"company_id": "c1", "user_id": 1}
+        await enforce_rate_limit(context)
+        return context
+
+    @app.get("/api/contracts/all")
+    async def _all(context: dict = Depends(context)):
+        return context
+
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/api/contracts/all")
+        second = await client.get("/api/contracts/all")
+        third = await client.get("/api/contracts/all")
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["RateLimit-Limit"] == "2"
+    assert first.headers["RateLimit-Remaining"] == "1"
+    assert third.status_code == 429
+    assert third.headers["RateLimit-Remaining"] == "0"
+    assert "Retry-After" in third.headers
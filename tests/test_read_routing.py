@@ -0,0 +1,49 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.database.router import (
+    PRIMARY,
+    REPLICA,
+    mark_read_only,
+    read_alias,
+    replica_monitor,
+)
+from app.middleware.read_routing import COOKIE_NAME, ReadRoutingMiddleware
+
+
+async def _endpoint(scope, receive, send):
+    if scope["path"] == "/read":
+        mark_read_only()
+    body = read_alias().encode()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": body})
+
+
+@pytest.fixture
+def healthy_replica():
+    replica_monitor.healthy = True
+    yield
+    replica_monitor.healthy = False
+
+
+@pytest.mark.asyncio
+async def test_read_routing_read_your_writes(healthy_replica):
+    """Тест маршрутизации чтений: реплика для GET, primary после мутации."""
+    app = ReadRoutingMiddleware(_endpoint, window_seconds=5)
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        assert (await client.get("/read")).text == REPLICA
+        assert (await client.get("/other")).text == PRIMARY
+
+        response = await client.post("/read")
+        assert response.text == PRIMARY
+        assert COOKIE_NAME in response.cookies
+
+        # Cookie из ответа на мутацию закрепляет чтения за primary
+        assert (await client.get("/read")).text == PRIMARY
+
+        client.cookies.clear()
+        assert (await client.get("/read")).text == REPLICA
+        replica_monitor.healthy = False
+        assert (await client.get("/read")).text == PRIMARY
@@ -0,0 +1,95 @@
+import asyncio
+import datetime
+
+import pytest
+
+from app.database.models import ContractFile
+from app.jobs.reconcile import ReconcileLockLost, reconcile, run_locked
+from app.storage import ObjectInfo
+
+OLD = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class FakeS3Manager:
+    bucket_folder = "contract_app"
+
+    def __init__(self, objects: dict):
+        self.objects = objects
+        self.deleted: list[str] = []
+
+    async def iter_objects(self, prefix: str, page_size: int = 1000):
+        for key in sorted(self.objects):
+            if key.startswith(prefix):
+                yield ObjectInfo(key=key, size=0, last_modified=self.objects[key])
+
+    async def delete_files(self, keys: list[str]) -> list[str]:
+        self.deleted.extend(keys)
+        return keys
+
+
+@pytest.mark.asyncio
+async def test_reconcile_orphans_and_dangling(seed_contract_file: ContractFile):
+    """Тест сверки: сироты удаляются, висячие записи попадают в отчёт."""
+    await ContractFile.create(
+        name="missing",
+        extension="pdf",
+        s3_key="contract_app/zzz/missing.pdf",
+        contract_id=seed_contract_file.contract_id,
+        created_by=seed_contract_file.created_by,
+        modified_by=seed_contract_file.modified_by,
+    )
+    manager = FakeS3Manager(
+        {
+            seed_contract_file.s3_key: OLD,
+            "contract_app/aaa/orphan.pdf": OLD,
+            "contract_app/aaa/fresh.pdf": datetime.datetime.now(datetime.timezone.utc),
+        }
+    )
+
+    report = await reconcile(manager=manager, batch_size=1)  # type: ignore[arg-type]
+
+    assert manager.deleted == ["contract_app/aaa/orphan.pdf"]
+    assert report.orphans == 1
+    assert report.dangling == 1
+    assert report.dangling_sample == ["contract_app/zzz/missing.pdf"]
+
+
+class FakeLockRedis:
+    def __init__(self, token: str):
+        self.token = token
+        self.extensions = 0
+
+    async def eval(self, script, numkeys, key, token, ttl_ms):
+        if token != self.token:
+            return 0
+        self.extensions += 1
+        return 1
+
+
+@pytest.mark.asyncio
+async def test_run_locked_extends_lock_during_long_run():
+    """Тест: блокировка продлевается, пока сверка не закончилась."""
+    redis = FakeLockRedis("me")
+
+    async def slow_run():
+        await asyncio.sleep(0.1)
+        return "done"
+
+    assert await run_locked(redis, "me", 0.03, slow_run()) == "done"
+    assert redis.extensions >= 3
+
+
+@pytest.mark.asyncio
+async def test_run_locked_stops_when_lock_is_lost():
+    """Тест: потеряв блокировку, воркер прерывает сверку."""
+    redis = FakeLockRedis("other")
+    finished = False
+
+    async def slow_run():
+        nonlocal finished
+        await asyncio.sleep(1)
+        finished = True
+
+    with pytest.raises(ReconcileLockLost):
+        await run_locked(redis, "me", 0.03, slow_run())
+    assert not finished
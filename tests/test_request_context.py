@@ -0,0 +1,95 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.database.models import Contract
+from app.exceptions.catch_middleware import CatchAllExceptionsMiddleware
+from app.middleware.request_context import RequestContextMiddleware
+
+
+async def _reject(request: Request):
+    await request.body()
+    return JSONResponse({"detail": "bad"}, status_code=400)
+
+
+async def _fail(request: Request):
+    raise RuntimeError("boom")
+
+
+async def _stream(request: Request):
+    async def _chunks():
+        for _ in range(4):
+            yield b"x" * 1024
+
+    return StreamingResponse(_chunks())
+
+
+def _client() -> AsyncClient:
+    app = Starlette(
+        routes=[
+            Route("/reject", _reject, methods=["POST"]),
+            Route("/fail", _fail),
+            Route("/stream", _stream),
+        ],
+        middleware=[
+            Middleware(RequestContextMiddleware),
+            Middleware(CatchAllExceptionsMiddleware, body_limit=16),
+        ],
+    )
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_request_id_header(
+    test_app: AsyncClient, jwt_token_admin: dict, seed_contract: Contract
+):
+    """Тест X-Request-ID: входящий id возвращается, без него создаётся новый."""
+    headers = {"Authorization": f"Bearer {jwt_token_admin['access_token']}"}
+    response = await test_app.get(
+        f"/api/contracts/{seed_contract.id}",
+        headers={**headers, "X-Request-ID": "req-42"},
+    )
+    assert response.headers["x-request-id"] == "req-42"
+
+    response = await test_app.get(f"/api/contracts/{seed_contract.id}", headers=headers)
+    assert len(response.headers["x-request-id"]) == 32
+
+
+@pytest.mark.asyncio
+async def test_catch_all_logs_bounded_body_with_request_id():
+    """Тест логирования 400: тело обрезается, id запроса в контексте логов."""
+    records = []
+    handler_id = logger.add(lambda m: records.append(m.record), level="ERROR")
+    try:
+        async with _client() as client:
+            response = await client.post(
+                "/reject",
+                content=b"a" * 1000,
+                headers={"X-Request-ID": "req-400", "Authorization": "Bearer s"},
+            )
+    finally:
+        logger.remove(handler_id)
+
+    assert response.status_code == 400
+    messages = [r["message"] for r in records]
+    assert any("a" * 16 in m and "a" * 17 not in m for m in messages)
+    assert not any("Bearer s" in m for m in messages)
+    assert all(r["extra"]["request_id"] == "req-400" for r in records)
+
+
+@pytest.mark.asyncio
+async def test_catch_all_exception_and_streaming():
+    """Тест 500 при исключении и неизменённой потоковой выдачи."""
+    async with _client() as client:
+        response = await client.get("/fail")
+        assert response.status_code == 500
+        assert response.json() == {"detail": "Internal Server Error"}
+
+        response = await client.get("/stream")
+        assert response.status_code == 200
+        assert len(response.content) == 4096
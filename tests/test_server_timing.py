@@ -0,0 +1,20 @@
+import pytest
+from httpx import AsyncClient
+
+from app.database.models import Contract
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header(
+    test_app: AsyncClient, jwt_token_admin: dict, seed_contract: Contract
+):
+    """Тест заголовка Server-Timing: категории auth, db, render и total."""
+    headers = {"Authorization": f"Bearer {jwt_token_admin['access_token']}"}
+    response = await test_app.get(f"/api/contracts/{seed_contract.id}", headers=headers)
+    assert response.status_code == 200
+
+    metrics = {
+        part.split(";", 1)[0].strip()
+        for part in response.headers["server-timing"].split(",")
+    }
+    assert {"auth", "db", "render", "total"} <= metrics
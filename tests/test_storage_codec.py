@@ -0,0 +1,70 @@
+import io
+
+import pytest
+import zstandard
+
+from app.s3.codec import ZSTD, compress_to_spool, decompress_stream
+from app.s3.s3_manager import AsyncS3Manager
+from app.storage import MemoryStorageBackend
+
+DATA = b"\n".join(f"{i};поставка;{i * 7}".encode() for i in range(20000))
+
+
+async def _chunks(data: bytes, size: int = 1000):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+@pytest.mark.asyncio
+async def test_compress_decompress_roundtrip():
+    """Тест сжатия во временный файл и потоковой распаковки."""
+    spool, original_size, compressed_size = compress_to_spool(io.BytesIO(DATA))
+    compressed = spool.read()
+
+    assert original_size == len(DATA)
+    assert compressed_size == len(compressed) < len(DATA)
+    chunks = [chunk async for chunk in decompress_stream(_chunks(compressed))]
+    assert b"".join(chunks) == DATA
+
+
+@pytest.mark.asyncio
+async def test_decompress_stream_closes_source_on_early_exit():
+    """Тест: при обрыве чтения исходный поток закрывается."""
+    compressed = zstandard.ZstdCompressor().compress(DATA)
+    closed = False
+
+    async def source():
+        nonlocal closed
+        try:
+            async for chunk in _chunks(compressed, 100):
+                yield chunk
+        finally:
+            closed = True
+
+    stream = decompress_stream(source())
+    await anext(stream)
+    await stream.aclose()
+
+    assert closed
+
+
+@pytest.mark.asyncio
+async def test_store_and_stream_zstd_file(test_settings):
+    """Тест: файл хранится сжатым, а скачивается в исходном виде."""
+    backend = MemoryStorageBackend()
+    manager = AsyncS3Manager(backend=backend, settings=test_settings)
+    manager.compression_enabled = True
+
+    stored = await manager.store_fileobj(
+        io.BytesIO(DATA), "c1", "report.csv", size=len(DATA)
+    )
+
+    assert stored.codec == ZSTD
+    assert stored.original_size == len(DATA)
+    raw = b"".join([chunk async for chunk in backend.get_stream(stored.key)])
+    assert len(raw) < len(DATA)
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(raw) == DATA
+    downloaded = [
+        chunk async for chunk in manager.stream_file(stored.key, codec=stored.codec)
+    ]
+    assert b"".join(downloaded) == DATA
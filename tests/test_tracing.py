@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+from aiobotocore.client import AioBaseClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from app.database.instrumentation import _row_count
+from app.utils.tracing import annotate_context
+from metrics.tracer import instrument_aiobotocore
+
+
+@pytest.fixture
+def spans():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    yield provider, exporter
+    provider.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_s3_call_span(spans, monkeypatch):
+    """Тест span вызова S3: имя, вид, бакет, ключ и код ответа."""
+    provider, exporter = spans
+
+    async def _original(self, operation_name, api_params):
+        return {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    monkeypatch.setattr(AioBaseClient, "_make_api_call", _original)
+    instrument_aiobotocore(provider)
+    instrument_aiobotocore(provider)  # повторный вызов не оборачивает дважды
+    assert AioBaseClient._make_api_call.__wrapped_original__ is _original
+
+    client = SimpleNamespace(
+        meta=SimpleNamespace(service_model=SimpleNamespace(service_id="S3"))
+    )
+    result = await AioBaseClient._make_api_call(
+        client, "PutObject", {"Bucket": "docs", "Key": "a/b.pdf", "Body": b"x"}
+    )
+
+    assert result["ResponseMetadata"]["HTTPStatusCode"] == 200
+    (span,) = exporter.get_finished_spans()
+    assert span.name == "S3.PutObject"
+    assert span.kind == trace.SpanKind.CLIENT
+    assert span.attributes["aws.s3.bucket"] == "docs"
+    assert span.attributes["aws.s3.key"] == "a/b.pdf"
+    assert span.attributes["http.status_code"] == 200
+
+
+def test_context_attributes_on_current_span(spans):
+    """Тест атрибутов контекста пользователя на текущем span."""
+    provider, exporter = spans
+    tracer = provider.get_tracer(__name__)
+    with tracer.start_as_current_span("request"):
+        annotate_context({"user_id": 7, "company_id": None, "is_superadmin": False})
+
+    (span,) = exporter.get_finished_spans()
+    assert span.attributes["app.user_id"] == 7
+    assert span.attributes["app.is_superadmin"] is False
+    assert "app.company_id" not in span.attributes
+
+
+def test_row_count():
+    """Тест подсчёта строк в результате запроса к БД."""
+    assert _row_count((3, [{}, {}, {}])) == 3
+    assert _row_count([{}, {}]) == 2
+    assert _row_count(None) == 0
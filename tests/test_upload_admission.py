@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from app.middleware.upload_admission import UploadAdmissionController, UploadRejected
+
+
+@pytest.mark.asyncio
+async def test_upload_admission_limits():
+    """Тест лимитов допуска загрузок: ожидание, таймаут и переполнение очереди."""
+    controller = UploadAdmissionController(
+        max_concurrent=1, max_inflight_bytes=100, max_waiters=1, wait_timeout=0.05
+    )
+    await controller.acquire(10)
+
+    with pytest.raises(UploadRejected) as exc:
+        await controller.acquire(10)
+    assert exc.value.reason == "timeout"
+
+    waiter = asyncio.create_task(controller.acquire(10))
+    await asyncio.sleep(0)
+    with pytest.raises(UploadRejected) as exc:
+        await controller.acquire(10)
+    assert exc.value.reason == "queue_full"
+
+    controller.release(10)
+    await waiter
+    assert controller.active == 1
+    assert controller.inflight_bytes == 10
@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+import pytest
+
+from app.handlers import user_events
+from app.handlers.user_events import UserEventConsumer, user_key
+
+
+class FakeMessage:
+    def __init__(self, routing_key: str, payload, redelivered: bool = False):
+        self.routing_key = routing_key
+        self.body = (
+            payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        )
+        self.redelivered = redelivered
+        self.timestamp = None
+        self.settled = None
+
+    async def ack(self):
+        self.settled = "ack"
+
+    async def nack(self, requeue: bool = True):
+        self.settled = "requeue" if requeue else "reject"
+
+    async def reject(self, requeue: bool = False):
+        self.settled = "requeue" if requeue else "reject"
+
+
+async def _drain(consumer: UserEventConsumer, messages: list):
+    for message in messages:
+        await consumer.submit(message)
+    task = asyncio.create_task(consumer.process())
+    try:
+        while any(message.settled is None for message in messages):
+            await asyncio.sleep(0.005)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def test_user_key_prefers_nested_user_id():
+    """Тест ключа пользователя: сначала вложенный user_id, затем login."""
+    assert user_key({"id": "evt-1", "data": {"user_id": 7, "email": "a@b"}}) == "7"
+    assert user_key({"login": "alice"}) == "alice"
+    assert user_key({"event": "noop"}) is None
+
+
+@pytest.mark.asyncio
+async def test_per_user_order_and_coalescing():
+    """Тест порядка событий пользователя и слияния подряд идущих updated."""
+    handled = []
+
+    async def handler(event: dict):
+        await asyncio.sleep(0.01)
+        handled.append((event["data"]["user_id"], event["v"]))
+
+    consumer = UserEventConsumer("amqp://", handler, concurrency=4, batch_window_ms=20)
+    messages = [
+        FakeMessage("user.updated", {"v": 1, "data": {"user_id": 1}}),
+        FakeMessage("user.updated", {"v": 2, "data": {"user_id": 1}}),
+        FakeMessage("user.updated", {"v": 1, "data": {"user_id": 2}}),
+        FakeMessage("user.deleted", {"v": 3, "data": {"user_id": 1}}),
+        FakeMessage("user.updated", {"v": 4, "data": {"user_id": 1}}),
+    ]
+    await _drain(consumer, messages)
+
+    # Два подряд идущих updated слились, порядок пользователя 1 сохранён
+    assert [v for user, v in handled if user == 1] == [2, 3, 4]
+    assert [v for user, v in handled if user == 2] == [1]
+    assert all(message.settled == "ack" for message in messages)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    """Тест ограничения числа одновременно обрабатываемых событий."""
+    running = peak = 0
+
+    async def handler(event: dict):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    consumer = UserEventConsumer("amqp://", handler, concurrency=3, batch_window_ms=5)
+    messages = [FakeMessage("user.updated", {"user_id": i}) for i in range(30)]
+    await _drain(consumer, messages)
+
+    assert 1 < peak <= 3
+
+
+@pytest.mark.asyncio
+async def test_failed_event_requeued_once():
+    """Тест: событие с ошибкой возвращается в очередь только один раз."""
+
+    async def handler(event: dict):
+        raise RuntimeError("boom")
+
+    consumer = UserEventConsumer("amqp://", handler, batch_window_ms=1)
+    fresh = FakeMessage("user.updated", {"user_id": 1})
+    retried = FakeMessage("user.updated", {"user_id": 2}, redelivered=True)
+    broken = FakeMessage("user.updated", b"not json")
+    await _drain(consumer, [fresh, retried, broken])
+
+    assert fresh.settled == "requeue"
+    assert retried.settled == "reject"
+    assert broken.settled == "reject"
+
+
+@pytest.mark.asyncio
+async def test_run_retries_when_declare_fails(monkeypatch):
+    """Тест: ошибка после подключения не останавливает потребителя."""
+    attempts = []
+
+    class FakeConnection:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def channel(self):
+            attempts.append(1)
+            raise RuntimeError("PRECONDITION_FAILED")
+
+    async def connect_robust(url):
+        return FakeConnection()
+
+    monkeypatch.setattr(user_events.aio_pika, "connect_robust", connect_robust)
+    monkeypatch.setattr(user_events, "_RETRY_DELAY", 0.001)
+    consumer = UserEventConsumer("amqp://test", _noop)
+    task = asyncio.create_task(consumer.run())
+    try:
+        while len(attempts) < 3:
+            await asyncio.sleep(0.005)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert task.cancelled()
+
+
+async def _noop(event: dict):
+    return None
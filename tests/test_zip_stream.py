@@ -0,0 +1,40 @@
+import io
+import zipfile
+
+import pytest
+
+from app.utils.zip_stream import ZipEntry, stream_zip
+
+FILES = {
+    "contract_app/1/act.txt": b"act " * 50_000,
+    "contract_app/1/scan.pdf": b"%PDF-1.4" + bytes(range(256)) * 100,
+}
+
+
+async def _open_stream(entry: ZipEntry):
+    data = FILES[entry.key]
+    for i in range(0, len(data), 4096):
+        yield data[i : i + 4096]
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_roundtrip():
+    """Тест сборки ZIP на лету: содержимое и режим сжатия."""
+    entries = [
+        ZipEntry(arcname="act.txt", key="contract_app/1/act.txt", extension="txt"),
+        ZipEntry(arcname="scan.pdf", key="contract_app/1/scan.pdf", extension="pdf"),
+    ]
+
+    chunks = [
+        chunk
+        async for chunk in stream_zip(
+            entries, _open_stream, concurrency=2, buffer_chunks=2
+        )
+    ]
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    assert archive.read("act.txt") == FILES["contract_app/1/act.txt"]
+    assert archive.read("scan.pdf") == FILES["contract_app/1/scan.pdf"]
+    assert archive.getinfo("act.txt").compress_type == zipfile.ZIP_DEFLATED
+    assert archive.getinfo("scan.pdf").compress_type == zipfile.ZIP_STORED